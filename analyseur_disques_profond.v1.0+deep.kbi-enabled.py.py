@@ -6,15 +6,49 @@
 
 import sys
 import os
-import platform
-import traceback
-import hashlib
-import webbrowser  # ← ajouté pour liens cliquables
-from datetime import datetime
-import ast
+import threading
+import time
 import re
-import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox, filedialog
+import struct
+import zlib
+import heapq
+import mmap
+import importlib.util
+from collections import deque, namedtuple
+from datetime import datetime
+
+# Imports différés : chargés au premier usage seulement. Le mode ligne de commande
+# démarre ainsi sans payer tkinter, sqlite3, concurrent.futures… (cf. kerberos_cli).
+# tkinter et webbrowser ne sont importés que par lancer_interface().
+def _import_differe(nom):
+    if nom in sys.modules:
+        return sys.modules[nom]
+    spec = importlib.util.find_spec(nom)
+    chargeur = importlib.util.LazyLoader(spec.loader)
+    spec.loader = chargeur
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[nom] = module
+    chargeur.exec_module(module)
+    return module
+
+ast = _import_differe("ast")
+bisect = _import_differe("bisect")
+futures = _import_differe("concurrent.futures")  # ProcessPoolExecutor, ThreadPoolExecutor, Future
+hashlib = _import_differe("hashlib")
+json = _import_differe("json")
+platform = _import_differe("platform")
+queue = _import_differe("queue")
+sqlite3 = _import_differe("sqlite3")
+traceback = _import_differe("traceback")
+zipfile = _import_differe("zipfile")
+
+def _charger_differes():
+    # LazyLoader n’est pas sûr entre threads avant Python 3.12 : à appeler avant de lancer
+    # des workers susceptibles de toucher le même module différé en même temps
+    for module in (ast, bisect, futures, hashlib, json, platform, queue, sqlite3, traceback, zipfile):
+        module.__name__
+tk = ttk = scrolledtext = messagebox = filedialog = webbrowser = None  # ← renseignés par lancer_interface()
+MODE_INTERFACE = False  # True une fois la fenêtre Tk lancée (dialogue d’erreur, pause console)
 
 # === GESTIONNAIRE D'ERREUR GLOBAL – KERBEROS v2 ===
 def kerberos_excepthook(exc_type, exc_value, exc_tb):
@@ -30,6 +64,8 @@ def kerberos_excepthook(exc_type, exc_value, exc_tb):
         f.write(err)
     print("💥 ERREUR KERBEROS :\n" + err, file=sys.stderr)
     print(f"📝 Log sauvegardé : {log_path}", file=sys.stderr)
+    if not MODE_INTERFACE:  # ligne de commande / tâche planifiée : ni fenêtre, ni attente clavier
+        return
     try:
         tmp = tk.Tk()
         tmp.withdraw()
@@ -53,150 +89,4053 @@ EXT_IMPORTANTES = {'.py', '.txt', '.log', '.json', '.csv', '.html', '.exe', '.ba
 MAX_DEPTH = 4
 MAX_DEPTH_FULL = 5  # ← HDD-safe
 MAX_ITEMS_PER_DIR = 200
+EXT_ARCHIVES = {'.zip', '.whl', '.egg', '.pyz'}  # parcourues comme des dossiers virtuels (.py analysés sur place)
+ARCHIVE_MAX_MEMBRES = 10_000  # entrées du répertoire central retenues par archive
+ARCHIVE_MAX_OCTETS = 64 << 20  # .py décompressés en mémoire par archive (au-delà : comptés, non lus)
+BUDGET_RECENT_JOURS = 30  # parcours budgété : un dossier modifié depuis moins longtemps passe devant
+BUDGET_HERITAGE_MAX = 0.75  # part de priorité héritée du parent, < 1 (coût d’un niveau) : parcours en largeur
+PY_WORKERS = 1  # processus d’analyse .py (1 = série, comportement historique)
+PY_TAILLE_LOT = 32  # .py envoyés par lot à chaque processus
+ANALYSEUR_VERSION = "2.6.0"  # à incrémenter si analyser_source() change de résultat
+CACHE_FICHIER = "kerberos_cache_analyse.sqlite"  # à côté des rapports
+CACHE_MAX_ENTREES = 200_000
+INDEX_FICHIER = "kerberos_index.sqlite"  # index interrogeable des scans, à côté des rapports
+INDEX_LOT = 5000  # lignes écrites par transaction dans l’index
+KBI_TAMPON = 1 << 20  # tampon d’écriture des images .kbi (1 Mo)
+HASH_BLOC = 1 << 20  # lecture par blocs de 1 Mo (bytearray réutilisé)
+HASH_SEUIL_MMAP = 64 << 20  # au-delà : mmap plutôt que readinto
+HASH_WORKERS = 4  # threads de hachage (hashlib relâche le GIL)
+TYPE_DISQUE = "auto"  # "auto" (détection) | "hdd" | "ssd"
+ES_PARALLELES_SSD = 4  # lectures simultanées par SSD (1 sur disque rotatif)
+ES_FENETRE = 64  # lectures regroupées puis triées par inode avant lancement
+EXPLORATEUR_MAX_ENFANTS = 1000  # lignes par dossier dans l’explorateur (au-delà : « N autre(s) »)
+MESURES_TOP = 10  # dossiers / fichiers les plus lents retenus par scan
+TOP_CONSOMMATEURS = 15  # dossiers / fichiers les plus volumineux listés par cible
+ARBRE_TAMPON_TAILLES = 5000  # lignes retenues au plus en attente de la taille de leur dossier
+RAPPORT_TAMPON_SECTION = 8 << 20  # section d’une cible en attente de son tour : fichier temporaire au-delà
+CONSOLE_MAX_LIGNES = 20_000  # lignes gardées dans la console Tk (le rapport complet est sur disque)
+REPRISE_INTERVALLE = 30.0  # s entre deux points de reprise d’un rapport long (écrits à côté du rapport)
+VEILLE_INTERVALLE = 2.0  # s : attente max d’événements, ou pause entre deux passes de scrutation
+VEILLE_LOT = 500  # dossiers relus par passe de scrutation (sans inotify)
+VEILLE_APAISEMENT = 0.5  # s : rafale d’événements regroupée avant relecture
+VEILLE_ALERTES = 200  # .py à risque gardés dans la liste glissante du mode veille
+EXCLUSIONS_FICHIER = "kerberos_exclusions.txt"  # à côté des rapports ; absent → EXCLUSIONS_DEFAUT
+EXCLUSIONS_DEFAUT = """\
+# Exclusions Kerberos — un motif par ligne, syntaxe .gitignore simplifiée :
+#   nom/          dossier de ce nom, à toute profondeur (* et ? acceptés)
+#   a/b/ , a/**/c chemin relatif à la cible (** = plusieurs niveaux)
+#   re:motif      expression régulière cherchée dans le chemin relatif (séparateur /)
+#   !nom/         jamais exclu, prioritaire sur les autres règles
+# Les sous-arbres exclus ne sont jamais listés ; le rapport compte ce qui a été élagué.
+node_modules/
+.git/
+.hg/
+.svn/
+__pycache__/
+.mypy_cache/
+.pytest_cache/
+.ruff_cache/
+.tox/
+.nox/
+**/.cache/pip/
+WinSxS/
+"""
+
+# === INSTRUMENTATION ===
+# Échecs tolérés (stat, lecture…) comptés ici plutôt qu’avalés en silence ; chaque Mesures
+# en garde l’écart entre le début et la fin de son scan.
+ERREURS = {}
+_VERROU_ERREURS = threading.Lock()
+
+def compter_erreur(genre):
+    with _VERROU_ERREURS:
+        ERREURS[genre] = ERREURS.get(genre, 0) + 1
+
+class Mesures:
+    """Instrumentation d’un scan : temps mur + CPU (du thread) par phase, compteurs,
+    dossiers et fichiers les plus lents. Résumé en pied de rapport, détail en JSON.
+    Chaque phase n’est alimentée que par un thread (scan, ou Tk pour « rendu_tk ») ; les workers
+    d’un rapport multi-disques ont leurs propres Mesures, fusionnées à la fin (temps cumulés)."""
+    def __init__(self, top=MESURES_TOP):
+        self.top = top
+        self.debut = time.perf_counter()
+        self.duree = None
+        self.phases = {}  # nom → [mur, cpu, appels]
+        self.compteurs = {}
+        self.lents = {"dossiers": [], "fichiers": []}  # tas bornés de (durée, chemin)
+        self.erreurs = {}
+        self.elagues = {}  # règle d’exclusion → sous-arbres élagués
+        self._erreurs0 = dict(ERREURS)
+        self._stat = 0  # stat() émis par les entrées de ce scan (cf. EntreeFS), threads de hachage compris
+        self._verrou_stat = threading.Lock()
+
+    @staticmethod
+    def top_depart():
+        return time.perf_counter(), time.thread_time()
+
+    def fin(self, phase, depart, lent=None, chemin=None):
+        """Clôt une mesure ouverte par top_depart() ; lent="dossiers"|"fichiers" : candidat au classement."""
+        mur = time.perf_counter() - depart[0]
+        self.ajouter(phase, mur, time.thread_time() - depart[1])
+        if lent:
+            self.lent(lent, mur, chemin)
+        return mur
+
+    def ajouter(self, phase, mur, cpu=0.0, appels=1):
+        p = self.phases.get(phase)
+        if p is None:
+            p = self.phases[phase] = [0.0, 0.0, 0]
+        p[0] += mur
+        p[1] += cpu
+        p[2] += appels
+
+    def compter(self, nom, n=1):
+        self.compteurs[nom] = self.compteurs.get(nom, 0) + n
+
+    def elaguer(self, regle):
+        self.elagues[regle] = self.elagues.get(regle, 0) + 1
+        self.compter("elagues")
+
+    def lent(self, genre, duree, chemin):
+        tas = self.lents[genre]
+        if len(tas) < self.top:
+            heapq.heappush(tas, (duree, chemin))
+        elif duree > tas[0][0]:
+            heapq.heapreplace(tas, (duree, chemin))
+
+    def fusionner(self, autre):
+        """Ajoute phases, compteurs et plus lents d’un autre Mesures (worker parallèle)."""
+        for phase, (mur, cpu, appels) in autre.phases.items():
+            self.ajouter(phase, mur, cpu, appels)
+        for nom, n in autre.compteurs.items():
+            self.compter(nom, n)
+        for genre, tas in autre.lents.items():
+            for duree, chemin in tas:
+                self.lent(genre, duree, chemin)
+        for regle, n in autre.elagues.items():
+            self.elagues[regle] = self.elagues.get(regle, 0) + n
+        with self._verrou_stat:
+            self._stat += autre._stat
+
+    def compteurs_courants(self):
+        """Compteurs à cet instant, stat() émis compris (point de reprise)."""
+        return dict(self.compteurs, stat=self._stat)
+
+    def reprendre(self, compteurs, elagues):
+        """Compteurs d’un point de reprise : le scan repris continue de les incrémenter."""
+        self.compteurs.update(compteurs)
+        self.elagues.update(elagues)
+        self._stat += compteurs.get("stat", 0)
+
+    def compter_stat(self):
+        """Appelé par EntreeFS.stat(), y compris depuis les threads de hachage : seul compteur verrouillé."""
+        with self._verrou_stat:
+            self._stat += 1
+
+    def rapporteur_py(self, suivant=None):
+        """Enveloppe un rappel `rapporter` d’arbre_securise : compte les .py par statut."""
+        def rapporter(entree, resultat):
+            self.compter("py")
+            if resultat[0] != "ok":
+                self.compter(f"py_{resultat[0]}")
+            if resultat[2]:
+                self.compter("py_risques")
+            if suivant:
+                suivant(entree, resultat)
+        return rapporter
+
+    def terminer(self, etat=None):
+        self.duree = time.perf_counter() - self.debut
+        if etat:
+            self.compteurs["dossiers"] = etat.dossiers
+            self.compteurs["fichiers"] = etat.fichiers
+        self.compteurs["stat"] = self._stat
+        with _VERROU_ERREURS:
+            self.erreurs = {g: n - self._erreurs0.get(g, 0) for g, n in ERREURS.items()
+                            if n > self._erreurs0.get(g, 0)}
+
+    def vers_dict(self):
+        return {
+            "duree": self.duree if self.duree is not None else time.perf_counter() - self.debut,
+            "phases": {nom: {"mur": p[0], "cpu": p[1], "appels": p[2]} for nom, p in self.phases.items()},
+            "compteurs": dict(self.compteurs),
+            "erreurs_tolerees": dict(self.erreurs),
+            "elagues": dict(self.elagues),
+            "plus_lents": {g: [{"duree": d, "chemin": c} for d, c in sorted(t, reverse=True)]
+                           for g, t in self.lents.items()},
+        }
+
+    def ecrire_json(self, chemin):
+        with open(chemin, "w", encoding="utf-8") as f:
+            json.dump(self.vers_dict(), f, ensure_ascii=False, indent=2)
+
+    def resume(self, max_lents=5):
+        d = self.vers_dict()
+        c = d["compteurs"]
+        lignes = ["-" * 60, f"📈 MESURES DU SCAN — durée totale {d['duree']:.2f} s",
+                  f"   {'phase':<26}{'mur (s)':>10}{'CPU (s)':>10}{'appels':>10}"]
+        for nom, p in sorted(d["phases"].items(), key=lambda x: -x[1]["mur"]):
+            lignes.append(f"   {nom:<26}{p['mur']:>10.2f}{p['cpu']:>10.2f}{p['appels']:>10}")
+        lignes.append(f"   📂 {c.get('dossiers', 0)} dossiers | 📄 {c.get('fichiers', 0)} fichiers | "
+                      f"🚫 {c.get('refus', 0)} accès refusé(s) | scandir {c.get('scandir', 0)} | stat {c.get('stat', 0)}")
+        if c.get("py"):
+            parses = c["py"] - c.get("py_prefiltre", 0) - c.get("py_lecture", 0)
+            lignes.append(f"   🐍 {c['py']} .py ({c.get('py_risques', 0)} à risque, {c.get('py_syntaxe', 0)} SyntaxError "
+                          f"sur {parses} parsé(s), {c.get('py_prefiltre', 0)} non parsé(s) faute de motif, "
+                          f"{c.get('py_lecture', 0)} illisible(s))")
+        if c.get("archives"):
+            lignes.append(f"   📦 {c['archives']} archive(s) parcourue(s) sur place "
+                          f"({c.get('archives_cache', 0)} reprise(s) du cache)")
+        lignes.append(f"   💾 {c.get('octets_lus', 0) / (1024 * 1024):.1f} Mo lus (contenu .py + empreintes)")
+        if d["elagues"]:
+            lignes.append(f"   ✂️ {c.get('elagues', 0)} sous-arbre(s) élagué(s) : " + ", ".join(
+                f"{regle} ×{n}" for regle, n in sorted(d["elagues"].items(), key=lambda x: -x[1])[:8]))
+        if d["erreurs_tolerees"]:
+            lignes.append("   ⚠️ Erreurs tolérées : " + ", ".join(f"{g} ×{n}" for g, n in sorted(d["erreurs_tolerees"].items())))
+        for genre, titre in (("dossiers", "Dossiers les plus lents"), ("fichiers", "Fichiers les plus lents")):
+            if d["plus_lents"][genre]:
+                lignes.append(f"   🐢 {titre} :")
+                lignes.extend(f"      {e['duree']:7.3f} s  {e['chemin']}" for e in d["plus_lents"][genre][:max_lents])
+        return lignes
+
+def executer_profile(chemin_prof, fonction, *args):
+    """fonction(*args) sous cProfile (thread courant) ; statistiques pstats écrites dans chemin_prof.
+    Lecture : python -m pstats <fichier>."""
+    import cProfile
+    profil = cProfile.Profile()
+    try:
+        return profil.runcall(fonction, *args)
+    finally:
+        profil.dump_stats(chemin_prof)
+
+# === UTILITAIRES DISQUE ===
+def lister_lecteurs_windows():
+    if platform.system() != "Windows":
+        return ["C:\\"]
+    try:
+        import string
+        return [f"{c}:\\" for c in string.ascii_uppercase if os.path.exists(f"{c}:\\")] or ["C:\\"]
+    except Exception:
+        compter_erreur("lecteurs")
+        return ["C:\\"]
+
+def espace_disque_win(lecteur):
+    if platform.system() != "Windows":
+        return "N/A"
+    try:
+        import ctypes
+        _, total, free = ctypes.c_ulonglong(), ctypes.c_ulonglong(), ctypes.c_ulonglong()
+        ctypes.windll.kernel32.GetDiskFreeSpaceExW(
+            ctypes.c_wchar_p(lecteur),
+            ctypes.pointer(_),
+            ctypes.pointer(total),
+            ctypes.pointer(free)
+        )
+        used = (total.value - free.value) / (1024**3)
+        total_gb = total.value / (1024**3)
+        return f"{used:.1f} / {total_gb:.1f} Go"
+    except Exception:
+        compter_erreur("espace_disque")
+        return "⚠️ Indisponible"
+
+def taille_lisible(octets):
+    for unite in ("o", "Ko", "Mo", "Go"):
+        if octets < 1024:
+            break
+        octets /= 1024
+    else:
+        unite = "To"
+    return f"{octets:.0f} {unite}" if unite == "o" else f"{octets:.1f} {unite}"
+
+# === SCAN EN ARRIÈRE-PLAN (thread + file de lignes) ===
+class ScanAnnule(Exception):
+    """Levée dans le parcours quand l’utilisateur clique sur [⛔ Annuler]."""
+
+class EtatScan:
+    """État partagé thread de scan ↔ Tk : compteurs de progression + drapeau d’annulation."""
+    def __init__(self):
+        self.annulation = threading.Event()
+        self.dossiers = 0
+        self.fichiers = 0
+        self.debut = time.perf_counter()
+        self.mesures = Mesures()
+        self.enfants = []  # EtatScan des workers en cours (cf. sous_etat)
+
+    def verifier(self):
+        if self.annulation.is_set():
+            raise ScanAnnule()
+
+    def sous_etat(self):
+        """État d’un worker parallèle : même annulation, compteurs et mesures propres
+        (comptés dans progression(), reversés dans le parent par fusionner())."""
+        enfant = EtatScan()
+        enfant.annulation = self.annulation
+        self.enfants.append(enfant)
+        return enfant
+
+    def fusionner(self):
+        for enfant in self.enfants:
+            self.dossiers += enfant.dossiers
+            self.fichiers += enfant.fichiers
+            self.mesures.fusionner(enfant.mesures)
+        self.enfants = []
+
+    def progression(self):
+        dt = max(time.perf_counter() - self.debut, 1e-6)
+        enfants = self.enfants
+        dossiers = self.dossiers + sum(e.dossiers for e in enfants)
+        fichiers = self.fichiers + sum(e.fichiers for e in enfants)
+        return (f"📂 {dossiers} dossiers ({dossiers / dt:.0f}/s) | "
+                f"📄 {fichiers} fichiers ({fichiers / dt:.0f}/s) | ⏱️ {dt:.1f} s")
+
+class FluxLignes:
+    """Tampon de lignes envoyé par lots dans une queue.Queue (lu par root.after côté Tk)."""
+    def __init__(self, file, taille_lot=500, delai=0.1):
+        self.file = file
+        self.taille_lot = taille_lot
+        self.delai = delai
+        self.tampon = []
+        self.dernier = time.perf_counter()
+
+    def __call__(self, ligne):
+        self.tampon.append(ligne)
+        if len(self.tampon) >= self.taille_lot or time.perf_counter() - self.dernier >= self.delai:
+            self.vider()
+
+    def vider(self):
+        if self.tampon:
+            self.file.put(("lignes", self.tampon))
+            self.tampon = []
+        self.dernier = time.perf_counter()
+
+# === EXCLUSIONS (élagage des sous-arbres) ===
+def _glob_vers_re(motif):
+    # Glob façon .gitignore → regex : * et ? restent dans un niveau, ** les traverse
+    i, n, morceaux = 0, len(motif), []
+    while i < n:
+        c = motif[i]
+        if motif.startswith("**", i):
+            i += 2
+            if motif.startswith("/", i):
+                i += 1
+                morceaux.append("(?:.*/)?")  # « **/ » : zéro, un ou plusieurs dossiers
+            else:
+                morceaux.append(".*")
+            continue
+        if c == "*":
+            morceaux.append("[^/]*")
+        elif c == "?":
+            morceaux.append("[^/]")
+        elif c == "[" and motif.find("]", i + 2) != -1:
+            j = motif.find("]", i + 2)
+            classe = motif[i + 1:j]
+            morceaux.append("[" + ("^" + classe[1:] if classe.startswith("!") else classe) + "]")
+            i = j + 1
+            continue
+        else:
+            morceaux.append(re.escape(c))
+        i += 1
+    return "".join(morceaux)
+
+class _Motifs:
+    """Un jeu de règles compilé : noms exacts (dict), globs sur le nom et globs sur le chemin
+    (une regex combinée chacun, le groupe trouvé désigne la règle), expressions « re: »."""
+    def __init__(self, ignorer_casse):
+        self.ignorer_casse = ignorer_casse
+        self.noms = {}
+        self.globs_noms, self.globs_chemins, self.regex = [], [], []
+        self.re_noms = self.re_chemins = None
+
+    def compiler(self):
+        options = re.IGNORECASE if self.ignorer_casse else 0
+        if self.globs_noms:
+            self.re_noms = re.compile("(?:" + "|".join(f"({m})" for m, _ in self.globs_noms) + r")\Z", options)
+        if self.globs_chemins:
+            self.re_chemins = re.compile("(?:" + "|".join(f"({m})" for m, _ in self.globs_chemins) + r")\Z", options)
+
+    def trouver(self, nom, rel):
+        regle = self.noms.get(nom.casefold() if self.ignorer_casse else nom)
+        if regle:
+            return regle
+        if self.re_noms:
+            m = self.re_noms.match(nom)
+            if m:
+                return self.globs_noms[m.lastindex - 1][1]
+        if self.re_chemins:
+            m = self.re_chemins.match(rel)
+            if m:
+                return self.globs_chemins[m.lastindex - 1][1]
+        for rx, regle in self.regex:
+            if rx.search(rel):
+                return regle
+        return None
+
+class Exclusions:
+    """Règles d’élagage compilées une fois, testées avant de lister un dossier :
+    regle(nom, rel) → règle qui exclut ce sous-arbre, ou None. rel : chemin relatif à la cible.
+    Syntaxe (cf. EXCLUSIONS_DEFAUT) : un motif par ligne ; sans « / » il vise un nom de dossier
+    à toute profondeur, avec « / » un chemin relatif à la cible ; « re: » expression régulière
+    cherchée dans le chemin relatif ; « ! » : jamais exclu, prioritaire sur les autres règles.
+    Lève ValueError (avec le n° de ligne) sur une expression régulière invalide."""
+    def __init__(self, texte=None, source=None, ignorer_casse=os.name == "nt"):
+        self.source = source
+        self.texte = EXCLUSIONS_DEFAUT if texte is None else texte
+        self.regles = []
+        self._exclure = _Motifs(ignorer_casse)
+        self._garder = _Motifs(ignorer_casse)
+        for num, ligne in enumerate(self.texte.splitlines(), 1):
+            ligne = ligne.strip()
+            if not ligne or ligne.startswith("#"):
+                continue
+            motifs = self._garder if ligne.startswith("!") else self._exclure
+            corps = ligne.lstrip("!")
+            if corps.startswith("re:"):
+                try:
+                    motifs.regex.append((re.compile(corps[3:], re.IGNORECASE if ignorer_casse else 0), ligne))
+                except re.error as e:
+                    raise ValueError(f"ligne {num} : expression invalide « {corps[3:]} » ({e})") from None
+            else:
+                motif = corps.rstrip("/")
+                if not motif:
+                    continue
+                if "/" in motif:
+                    motifs.globs_chemins.append((_glob_vers_re(motif.lstrip("/")), ligne))
+                elif any(c in motif for c in "*?["):
+                    motifs.globs_noms.append((_glob_vers_re(motif), ligne))
+                else:
+                    motifs.noms[motif.casefold() if ignorer_casse else motif] = ligne
+            self.regles.append(ligne)
+        self._exclure.compiler()
+        self._garder.compiler()
+        self._nuls = not self.regles
+
+    def __len__(self):
+        return len(self.regles)
+
+    def regle(self, nom, rel):
+        if self._nuls:
+            return None
+        if os.sep != "/":
+            rel = rel.replace(os.sep, "/")
+        regle = self._exclure.trouver(nom, rel)
+        if regle and self._garder.trouver(nom, rel):
+            return None
+        return regle
+
+    def resume(self):
+        origine = self.source if self.source and os.path.exists(self.source) else "règles par défaut"
+        return f"{len(self)} règle(s) ({origine})"
+
+def charger_exclusions(chemin=EXCLUSIONS_FICHIER):
+    """Exclusions du fichier `chemin`, ou les règles par défaut s’il n’existe pas.
+    OSError si illisible, ValueError si une règle est invalide."""
+    texte = None
+    if os.path.exists(chemin):
+        with open(chemin, "r", encoding="utf-8") as f:
+            texte = f.read()
+    return Exclusions(texte, source=chemin)
+
+# === MOTEUR DE PARCOURS (os.scandir) ===
+class EntreeFS:
+    """Entrée typée issue d’os.scandir — type et stat mis en cache (zéro stat redondant).
+    `mesures` : Mesures du scan qui l’a listée, crédité de chaque stat() réellement émis."""
+    __slots__ = ("nom", "chemin", "est_dossier", "est_fichier", "_entry", "_stat", "_mesures")
+
+    def __init__(self, entry, mesures=None):
+        self._entry = entry
+        self._stat = None
+        self._mesures = mesures
+        self.nom = entry.name
+        self.chemin = entry.path
+        try:
+            self.est_dossier = entry.is_dir()
+        except OSError:
+            compter_erreur("type_entree")
+            self.est_dossier = False
+        try:
+            self.est_fichier = not self.est_dossier and entry.is_file()
+        except OSError:
+            compter_erreur("type_entree")
+            self.est_fichier = False
+
+    def stat(self):
+        # Windows : gratuit (données de FindNextFile) — Linux : 1 stat, mémorisé
+        if self._stat is None:
+            if self._mesures:
+                self._mesures.compter_stat()
+            self._stat = self._entry.stat()
+        return self._stat
+
+    @property
+    def taille(self):
+        return self.stat().st_size
+
+    @property
+    def mtime_ns(self):
+        return self.stat().st_mtime_ns
+
+    @property
+    def ext(self):
+        return os.path.splitext(self.nom)[1].lower()
+
+    @property
+    def inode(self):
+        # d_ino sous Linux (gratuit) ; un appel mémorisé sous Windows
+        try:
+            return self._entry.inode()
+        except OSError:
+            compter_erreur("inode")
+            return 0
+
+def scanner_dossier(racine, mesures=None):
+    """Un seul os.scandir par dossier → liste d’EntreeFS triée par nom. Lève OSError.
+    `mesures` : Mesures du scan en cours, à qui les stat() des entrées seront comptés."""
+    with os.scandir(racine) as it:
+        entrees = [EntreeFS(e, mesures) for e in it]
+    entrees.sort(key=lambda e: e.nom)
+    return entrees
+
+def _noter_refus(mesures, erreur):
+    mesures.compter("scandir")
+    mesures.compter("refus" if isinstance(erreur, PermissionError) else "erreurs_listage")
+
+def parcourir(racine, max_prof=5, limit_per_dir=100, etat=None, exclusions=None):
+    """Parcours en profondeur (pré-ordre) → (genre, prof, rel, entree).
+    genre : "D" dossier, "F" fichier, "LIMITE" profondeur dépassée, "REFUSE" accès refusé,
+    "EXCLU" dossier élagué par `exclusions` (jamais listé ; 4e élément : la règle)."""
+    pile = []
+
+    def empiler(chemin, rel, prof):
+        if prof > max_prof:
+            return ("LIMITE", prof, rel, None)
+        if etat:
+            etat.verifier()
+            depart = etat.mesures.top_depart()
+        try:
+            pile.append((iter(scanner_dossier(chemin, etat and etat.mesures)[:limit_per_dir]), rel, prof))
+        except OSError as e:
+            if etat:
+                _noter_refus(etat.mesures, e)
+            return ("REFUSE", prof, rel, None)
+        if etat:
+            etat.dossiers += 1
+            etat.mesures.compter("scandir")
+            etat.mesures.fin("listage", depart, "dossiers", chemin)
+        return None
+
+    ev = empiler(racine, "", 0)
+    if ev:
+        yield ev
+    while pile:
+        it, rel, prof = pile[-1]
+        entree = next(it, None)
+        if entree is None:
+            pile.pop()
+            continue
+        rel_path = os.path.join(rel, entree.nom).lstrip("\\/")
+        if entree.est_dossier:
+            regle = exclusions.regle(entree.nom, rel_path) if exclusions else None
+            if regle:
+                if etat:
+                    etat.mesures.elaguer(regle)
+                yield ("EXCLU", prof, rel_path, regle)
+                continue
+            yield ("D", prof, rel_path, entree)
+            ev = empiler(entree.chemin, rel_path, prof + 1)
+            if ev:
+                yield ev
+        elif entree.est_fichier:
+            if etat:
+                etat.fichiers += 1
+            yield ("F", prof, rel_path, entree)
+
+# === ORDONNANCEUR D’E/S (HDD-friendly) ===
+def _sysfs_bloc(dev):
+    # Linux : /sys/devices/…/<disque>[/<partition>] du périphérique bloc `dev`, ou None
+    if not sys.platform.startswith("linux") or not isinstance(dev, int) or not os.major(dev):
+        return None
+    return os.path.realpath(f"/sys/dev/block/{os.major(dev)}:{os.minor(dev)}")
+
+def type_disque(dev):
+    """"hdd" | "ssd" | None si inconnu. Linux : /sys/dev/block/<maj>:<min>/queue/rotational
+    (remonte au disque parent pour une partition). Ailleurs : None."""
+    base = _sysfs_bloc(dev)
+    if base is None:
+        return None
+    for d in (base, os.path.dirname(base)):
+        try:
+            with open(os.path.join(d, "queue", "rotational")) as f:
+                return "hdd" if f.read().strip() == "1" else "ssd"
+        except OSError:
+            continue
+    return None
+
+def _numero_disque_win(lecteur):
+    # IOCTL_VOLUME_GET_VOLUME_DISK_EXTENTS sur \\.\C: → DiskNumber du premier extent, ou None
+    try:
+        import ctypes
+        from ctypes import wintypes
+        k32 = ctypes.windll.kernel32
+        k32.CreateFileW.restype = wintypes.HANDLE
+        h = k32.CreateFileW(f"\\\\.\\{lecteur}", 0, 3, None, 3, 0, None)  # partage L/E, OPEN_EXISTING
+        if h in (None, wintypes.HANDLE(-1).value):
+            return None
+        try:
+            tampon = ctypes.create_string_buffer(64)
+            lus = wintypes.DWORD()
+            if not k32.DeviceIoControl(wintypes.HANDLE(h), 0x560000, None, 0, tampon, len(tampon),
+                                       ctypes.byref(lus), None):
+                return None
+            # VOLUME_DISK_EXTENTS : NumberOfDiskExtents (DWORD) puis DISK_EXTENT aligné sur 8
+            return struct.unpack_from("<I", tampon, 8)[0]
+        finally:
+            k32.CloseHandle(wintypes.HANDLE(h))
+    except Exception:
+        compter_erreur("disque_physique")
+        return None
+
+def disque_physique(chemin):
+    """Identifiant du disque physique portant `chemin` : deux partitions d’un même disque
+    donnent le même identifiant. Linux : disque parent dans /sys ; Windows : numéro de disque ;
+    à défaut : st_dev (ou la lettre de lecteur)."""
+    if sys.platform == "win32":
+        lecteur = os.path.splitdrive(os.path.abspath(chemin))[0].upper()
+        numero = _numero_disque_win(lecteur) if lecteur else None
+        return f"disque{numero}" if numero is not None else lecteur
+    try:
+        dev = os.stat(chemin).st_dev
+    except OSError:
+        compter_erreur("stat")
+        return chemin
+    base = _sysfs_bloc(dev)
+    if base and os.path.isdir(base):
+        if os.path.exists(os.path.join(base, "partition")):
+            base = os.path.dirname(base)
+        return os.path.basename(base)
+    return dev
+
+class OrdonnanceurES:
+    """Point de passage de toutes les lectures de contenu (.py, empreintes) :
+    regroupe par périphérique, trie par inode (proxy de localité sur le plateau)
+    et limite les lectures simultanées par périphérique (1 sur HDD, N sur SSD).
+    forcer="hdd"/"ssd" remplace la détection ; type inconnu → traité comme HDD."""
+    def __init__(self, forcer=TYPE_DISQUE, paralleles_ssd=ES_PARALLELES_SSD):
+        self.forcer = forcer if forcer in ("hdd", "ssd") else None
+        self.paralleles_ssd = paralleles_ssd
+        self._types = {}
+        self._verrous = {}
+        self._mutex = threading.Lock()
+
+    def peripherique(self, entree):
+        try:
+            dev = entree.stat().st_dev
+        except OSError:
+            compter_erreur("stat")
+            dev = 0
+        # DirEntry.stat() sous Windows : st_dev = 0 → la lettre de lecteur identifie le disque
+        return dev or os.path.splitdrive(entree.chemin)[0].upper()
+
+    def type(self, dev):
+        if self.forcer:
+            return self.forcer
+        if dev not in self._types:
+            self._types[dev] = type_disque(dev) or "hdd"
+        return self._types[dev]
+
+    def limite(self, dev):
+        return 1 if self.type(dev) == "hdd" else self.paralleles_ssd
+
+    def acces(self, dev):
+        with self._mutex:
+            verrou = self._verrous.get(dev)
+            if verrou is None:
+                verrou = self._verrous[dev] = threading.BoundedSemaphore(self.limite(dev))
+        return verrou
+
+    def ordonner(self, entrees):
+        return sorted(entrees, key=lambda e: (str(self.peripherique(e)), e.inode))
+
+    def lire(self, entree, fonction, *args):
+        """fonction(entree.chemin, *args) sous le quota de lectures du périphérique."""
+        with self.acces(self.peripherique(entree)):
+            return fonction(entree.chemin, *args)
+
+# === ANALYSE .PY ===
+# (genre, cible, message) — "appel" : cible d’appel résolue sur l’AST (alias d’import compris,
+# "x.*" = tout appel du module x) ; "attribut" : référence exacte (même sans appel) ;
+# "texte" : regex sur le source brut, toutes réunies dans une seule regex compilée.
+DANGEROUS_PATTERNS = [
+    ("appel", "exec", "exec détecté"),
+    ("appel", "eval", "eval détecté"),
+    ("appel", "__import__", "__import__ détecté"),
+    ("appel", "subprocess.*", "subprocess utilisé"),
+    ("texte", r"import\s+os\s*,\s*sys", "os + sys ensemble → système"),
+    ("attribut", "shutil.rmtree", "shutil.rmtree → suppression récursive"),
+    ("attribut", "ctypes.windll", "ctypes.windll → accès bas niveau"),
+]
+
+def _compiler_regles(regles):
+    appels, prefixes, attributs, textes, repli = {}, [], {}, [], []
+    for genre, cible, msg in regles:
+        if genre == "texte":
+            textes.append((cible, msg))
+            repli.append((cible, msg))
+        elif genre == "appel" and cible.endswith(".*"):
+            prefixes.append((cible[:-1], msg))
+            repli.append((re.escape(cible[:-1]) + r"\w+\s*\(", msg))
+        elif genre == "appel":
+            appels[cible] = msg
+            repli.append((r"\b" + re.escape(cible) + r"\s*\(", msg))
+        else:
+            attributs[cible] = msg
+            repli.append((r"\b" + re.escape(cible) + r"\b", msg))
+
+    def combiner(motifs):
+        if not motifs:
+            return None, []
+        return re.compile("|".join(f"(?P<r{i}>{m})" for i, (m, _) in enumerate(motifs))), [msg for _, msg in motifs]
+
+    # Regex de repli : AST indisponible (octets nuls, récursion…) → comportement historique
+    return appels, tuple(prefixes), attributs, combiner(textes), combiner(repli)
+
+_APPELS, _APPELS_PREFIXES, _ATTRIBUTS, _RE_TEXTE, _RE_REPLI = _compiler_regles(DANGEROUS_PATTERNS)
+
+def _compiler_prefiltre(regles):
+    # Une regex sur les octets bruts : tout fichier où une règle peut se déclencher la trouve.
+    # "x.*" → x (premier composant, présent dans tout import ou appel qualifié) ; "a.b" → b
+    # (présent même via un alias : import a as z ; z.b / from a import b as c) ; "texte" → sa regex.
+    # Alternative à plat, sans \b ni groupe (4× plus rapide) : bornes des jetons vérifiées à part.
+    # → (regex combinée, jetons, regex des seules règles « texte » ou None)
+    jetons, textes = set(), []
+    for genre, cible, _ in regles:
+        if genre == "texte":
+            textes.append(cible.encode("utf-8"))
+        elif cible.endswith(".*"):
+            jetons.add(cible[:-2].split(".")[0])
+        else:
+            jetons.add(cible.rsplit(".", 1)[-1])
+    motifs = [re.escape(j).encode("utf-8") for j in sorted(jetons, key=len, reverse=True)]
+    jetons = {j.encode("utf-8") for j in jetons}
+    texte = re.compile(b"|".join(b"(?:" + t + b")" for t in textes)) if textes else None
+    return re.compile(b"|".join(motifs + [b"(?:" + t + b")" for t in textes]) or rb"(?!)"), jetons, texte
+
+_PREFILTRE, _PREFILTRE_JETONS, _PREFILTRE_TEXTE = _compiler_prefiltre(DANGEROUS_PATTERNS)
+
+def _est_mot(donnees):
+    return donnees.isalnum() or donnees == b"_"
+
+def prefiltre_py(donnees):
+    """True si une règle de DANGEROUS_PATTERNS peut se déclencher dans ces octets (→ analyse AST)."""
+    for m in _PREFILTRE.finditer(donnees):
+        if m.group() not in _PREFILTRE_JETONS:  # règle « texte »
+            return True
+        debut, fin = m.span()
+        if not (debut and _est_mot(donnees[debut - 1:debut])) and not _est_mot(donnees[fin:fin + 1]):
+            return True
+        if _PREFILTRE_TEXTE and _PREFILTRE_TEXTE.match(donnees, debut):  # masquée par le jeton
+            return True
+    return False
+
+# Imports d’un fichier non parsé : instructions en début de ligne (ou après « ; » / « : »),
+# hors chaînes triple-quotées (exemples de docstrings)
+_RE_MOTS_IMPORT = re.compile(rb"import[ \t]|from[ \t]")
+_RE_IMPORT = re.compile(rb"import[ \t]+([\w.][^\r\n#;]*)|from[ \t]+\.*(\w[\w.]*)[ \t]+import\b")
+_RE_TRIPLES = re.compile(rb"\"\"\"|'''")
+
+def _chaines_longues(donnees):
+    # Bornes [début, fin, début, fin…] des chaînes triple-quotées (approximation : ni préfixe ni échappement)
+    bornes, ouvrant = [], None
+    for m in _RE_TRIPLES.finditer(donnees):
+        if ouvrant is None:
+            ouvrant = m.group()
+            bornes.append(m.start())
+        elif m.group() == ouvrant:
+            ouvrant = None
+            bornes.append(m.end())
+    return bornes
+
+def _imports_bruts(donnees):
+    imports = []
+    chaines = None
+    for mot in _RE_MOTS_IMPORT.finditer(donnees):
+        debut = mot.start()
+        avant = donnees[donnees.rfind(b"\n", 0, debut) + 1:debut].rstrip(b" \t")
+        if avant and avant[-1:] not in (b";", b":"):
+            continue
+        m = _RE_IMPORT.match(donnees, debut)
+        if m is None:
+            continue
+        if chaines is None:
+            chaines = _chaines_longues(donnees)
+        if bisect.bisect_right(chaines, m.start()) % 2:
+            continue  # dans une chaîne
+        if m.group(2):
+            imports.append(m.group(2).decode("utf-8", "ignore"))
+            continue
+        for nom in m.group(1).decode("utf-8", "ignore").strip(" \t\\()").split(","):
+            nom = nom.split()
+            if nom and re.fullmatch(r"[\w.]+", nom[0]):
+                imports.append(nom[0])
+    return imports
+
+def _risques_texte(source, regex):
+    motif, messages = regex
+    if motif is None:
+        return []
+    return [(source.count("\n", 0, m.start()) + 1, messages[int(m.lastgroup[1:])])
+            for m in motif.finditer(source)]
+
+class _ReglesAST:
+    """Un seul passage sur l’AST : imports + appels/attributs dangereux, avec n° de ligne.
+    Combinée à ast.NodeVisitor au premier usage (cf. _visiteur) : ast reste un import différé."""
+    def __init__(self):
+        self.alias = {}
+        self.imports = []
+        self.risques = []
+
+    def visit_Import(self, node):
+        for a in node.names:
+            self.imports.append(a.name)
+            if a.asname:
+                self.alias[a.asname] = a.name
+
+    def visit_ImportFrom(self, node):
+        if node.module:
+            self.imports.append(node.module)
+            for a in node.names:
+                self.alias[a.asname or a.name] = f"{node.module}.{a.name}"
+
+    def _qualifier(self, node):
+        if isinstance(node, ast.Name):
+            return self.alias.get(node.id, node.id)
+        if isinstance(node, ast.Attribute):
+            base = self._qualifier(node.value)
+            return base and f"{base}.{node.attr}"
+        return None
+
+    def visit_Call(self, node):
+        q = self._qualifier(node.func)
+        if q:
+            if q.startswith("builtins."):
+                q = q[9:]
+            msg = _APPELS.get(q)
+            if msg is None:
+                msg = next((m for p, m in _APPELS_PREFIXES if q.startswith(p)), None)
+            if msg:
+                self.risques.append((node.lineno, msg))
+        self.generic_visit(node)
+
+    def visit_Attribute(self, node):
+        msg = _ATTRIBUTS.get(self._qualifier(node))
+        if msg:
+            self.risques.append((node.lineno, msg))
+        self.generic_visit(node)
+
+    def visit_Name(self, node):
+        if node.id in self.alias:  # from ctypes import windll → windll.kernel32…
+            msg = _ATTRIBUTS.get(self.alias[node.id])
+            if msg:
+                self.risques.append((node.lineno, msg))
+
+_VisiteurRegles = None
+
+def _visiteur():
+    global _VisiteurRegles
+    if _VisiteurRegles is None:
+        _VisiteurRegles = type("_VisiteurRegles", (_ReglesAST, ast.NodeVisitor), {})
+    return _VisiteurRegles()
+
+def analyser_source(source, filename="<source>"):
+    """Analyse statique d’un source Python (un seul ast.parse).
+    Retourne (statut, imports, risques) — statut : "ok" | "syntaxe" | "ast" ; risques : [(ligne, message)].
+    (Sans parsing, cf. source_py : "prefiltre" ; fichier illisible : "lecture".)"""
+    try:
+        arbre = ast.parse(source, filename=filename)
+    except SyntaxError:
+        return ("syntaxe", [], [])
+    except (ValueError, RecursionError, MemoryError):
+        return ("ast", [], sorted(set(_risques_texte(source, _RE_REPLI))))
+    v = _visiteur()
+    v.visit(arbre)
+    return ("ok", v.imports, sorted(set(v.risques + _risques_texte(source, _RE_TEXTE))))
+
+def formater_analyse(resultat, max_risques=1):
+    """Résumé court pour l’arbre ; max_risques=None → tous les risques."""
+    statut, imports, risques = resultat
+    if statut == "lecture":
+        return "❓ Lecture impossible"
+    if statut == "syntaxe":
+        return "⚠️ SyntaxError"
+    if statut == "prefiltre":
+        # Aucun motif dangereux dans les octets : imports relevés par regex, syntaxe non vérifiée
+        return ("imports:" + ",".join(imports[:2]) if imports else "✅ Clean") + " (non parsé)"
+    parts = []
+    if statut == "ast": parts.append("❌ Syntaxe")
+    if imports: parts.append("imports:" + ",".join(imports[:2]))
+    if risques:
+        affiches = risques if max_risques is None else risques[:max_risques]
+        txt = " | ".join(f"{msg} (l.{ligne})" for ligne, msg in affiches)
+        if len(affiches) < len(risques):
+            txt += f" (+{len(risques) - len(affiches)})"
+        parts.append("⚠️ " + txt)
+    return " | ".join(parts) if parts else "✅ Clean"
+
+# octets : taille lue ; texte : source complète à parser (candidat du préfiltre), sinon None
+# et resultat : analyse déjà établie sans parsing
+SourcePy = namedtuple("SourcePy", "octets texte resultat")
+
+def source_py(donnees):
+    """Octets d’un .py (bytes, mmap) passés au préfiltre → SourcePy.
+    Sans motif dangereux : ("prefiltre", imports relevés par regex, []) sans ast.parse — un seul balayage
+    linéaire, quelle que soit la taille, mais une erreur de syntaxe n’y est pas détectée (statut distinct
+    de "ok", compté à part). Sinon le texte complet est décodé pour l’AST."""
+    taille = len(donnees)
+    if not taille:
+        return SourcePy(0, None, ("ok", [], []))
+    if not prefiltre_py(donnees):
+        return SourcePy(taille, None, ("prefiltre", _imports_bruts(donnees), []))
+    with memoryview(donnees) as vue:
+        texte = str(vue, "utf-8", "ignore")  # décodé depuis le tampon : pas de copie bytes de tout le fichier
+    if "\r" in texte:
+        texte = texte.replace("\r\n", "\n").replace("\r", "\n")  # comme la lecture en mode texte
+    return SourcePy(taille, texte, None)
+
+def lire_source_py(filepath):
+    """.py entier, projeté en mémoire (mmap) et passé au préfiltre → SourcePy, ou None si illisible."""
+    try:
+        with open(filepath, "rb") as f:
+            if not os.fstat(f.fileno()).st_size:
+                return source_py(b"")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return source_py(mm)
+    except (OSError, ValueError):
+        compter_erreur("lecture_py")
+        return None
+
+def analyser_lu(filepath, source):
+    if source is None:
+        return ("lecture", [], [])
+    return source.resultat or analyser_source(source.texte, filepath)
+
+def analyser_fichier(filepath):
+    """Analyse structurée d’un .py sur disque — statut "lecture" si illisible."""
+    return analyser_lu(filepath, lire_source_py(filepath))
+
+def analyser_fichier_py(filepath, max_risques=1):
+    return formater_analyse(analyser_fichier(filepath), max_risques)
+
+# === CACHE D’ANALYSE PERSISTANT (SQLite) ===
+def signature_regles():
+    """Change dès que DANGEROUS_PATTERNS ou ANALYSEUR_VERSION change → cache invalidé."""
+    return hashlib.sha1(repr((ANALYSEUR_VERSION, DANGEROUS_PATTERNS)).encode("utf-8")).hexdigest()[:16]
+
+class CacheAnalyse:
+    """(chemin, taille, mtime_ns, signature des règles) → résultat d’analyser_source().
+    Archives (cf. analyser_archive) : contenu analysé par empreinte SHA-256, et empreinte
+    par (chemin, taille, mtime_ns) — une archive inchangée n’est ni rouverte ni rehachée.
+    LRU borné à max_entrees ; écritures groupées en transactions.
+    Partagé par les workers d’un rapport multi-disques : chaque accès à la base passe par un verrou."""
+    def __init__(self, chemin_db=CACHE_FICHIER, max_entrees=CACHE_MAX_ENTREES):
+        self.max_entrees = max_entrees
+        self.hits = 0
+        self.miss = 0
+        self._ecritures = []
+        self._acces = []
+        self._archives, self._empreintes = [], []
+        self._verrou = threading.RLock()
+        self.db = sqlite3.connect(chemin_db, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        with self.db:
+            self.db.execute("CREATE TABLE IF NOT EXISTS meta (cle TEXT PRIMARY KEY, valeur TEXT)")
+            self.db.execute("CREATE TABLE IF NOT EXISTS analyses (chemin TEXT PRIMARY KEY, taille INTEGER NOT NULL, "
+                            "mtime_ns INTEGER NOT NULL, resultat TEXT NOT NULL, acces INTEGER NOT NULL)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS analyses_acces ON analyses(acces)")
+            self.db.execute("CREATE TABLE IF NOT EXISTS archives (empreinte TEXT PRIMARY KEY, contenu TEXT NOT NULL, "
+                            "acces INTEGER NOT NULL)")
+            self.db.execute("CREATE TABLE IF NOT EXISTS archives_chemins (chemin TEXT PRIMARY KEY, "
+                            "taille INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, empreinte TEXT NOT NULL)")
+            sig = signature_regles()
+            row = self.db.execute("SELECT valeur FROM meta WHERE cle = 'signature'").fetchone()
+            if row is None or row[0] != sig:
+                self.db.execute("DELETE FROM analyses")
+                self.db.execute("DELETE FROM archives")
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('signature', ?)", (sig,))
+
+    def lire(self, entree):
+        """Résultat en cache pour cette EntreeFS, ou None (miss / fichier modifié)."""
+        try:
+            st = entree.stat()
+        except OSError:
+            compter_erreur("stat")
+            return None
+        with self._verrou:
+            row = self.db.execute("SELECT taille, mtime_ns, resultat FROM analyses WHERE chemin = ?",
+                                  (entree.chemin,)).fetchone()
+            if row is None or row[0] != st.st_size or row[1] != st.st_mtime_ns:
+                self.miss += 1
+                return None
+            self.hits += 1
+            self._acces.append((time.time_ns(), entree.chemin))
+            if len(self._acces) >= 1000:
+                self.vider()
+        return json.loads(row[2])
+
+    def ecrire(self, entree, resultat):
+        if resultat[0] == "lecture":
+            return  # droits susceptibles de changer : on ne mémorise pas
+        try:
+            st = entree.stat()
+        except OSError:
+            compter_erreur("stat")
+            return
+        with self._verrou:
+            self._ecritures.append((entree.chemin, st.st_size, st.st_mtime_ns,
+                                    json.dumps(resultat, ensure_ascii=False), time.time_ns()))
+            if len(self._ecritures) >= 1000:
+                self.vider()
+
+    def empreinte_archive(self, entree):
+        """Empreinte mémorisée de cette archive si elle n’a pas changé (taille + mtime), sinon None."""
+        try:
+            st = entree.stat()
+        except OSError:
+            compter_erreur("stat")
+            return None
+        with self._verrou:
+            row = self.db.execute("SELECT taille, mtime_ns, empreinte FROM archives_chemins WHERE chemin = ?",
+                                  (entree.chemin,)).fetchone()
+        if row is None or row[0] != st.st_size or row[1] != st.st_mtime_ns:
+            return None
+        return row[2]
+
+    def lire_archive(self, empreinte):
+        """Contenu analysé d’une archive d’après son empreinte, ou None."""
+        with self._verrou:
+            row = self.db.execute("SELECT contenu FROM archives WHERE empreinte = ?", (empreinte,)).fetchone()
+            if row is None:
+                self.miss += 1
+                return None
+            self.hits += 1
+            self.db.execute("UPDATE archives SET acces = ? WHERE empreinte = ?", (time.time_ns(), empreinte))
+        return json.loads(row[0])
+
+    def ecrire_archive(self, entree, empreinte, contenu=None):
+        """Mémorise l’empreinte de l’archive (chemin, taille, mtime) et, s’il est fourni, son contenu."""
+        try:
+            st = entree.stat()
+        except OSError:
+            compter_erreur("stat")
+            return
+        with self._verrou:
+            self._empreintes.append((entree.chemin, st.st_size, st.st_mtime_ns, empreinte))
+            if contenu is not None:
+                self._archives.append((empreinte, json.dumps(contenu, ensure_ascii=False), time.time_ns()))
+            if len(self._empreintes) >= 1000:
+                self.vider()
+
+    def vider(self):
+        with self._verrou, self.db:
+            if self._ecritures:
+                self.db.executemany("INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?, ?)", self._ecritures)
+            if self._acces:
+                self.db.executemany("UPDATE analyses SET acces = ? WHERE chemin = ?", self._acces)
+            if self._archives:
+                self.db.executemany("INSERT OR REPLACE INTO archives VALUES (?, ?, ?)", self._archives)
+            if self._empreintes:
+                self.db.executemany("INSERT OR REPLACE INTO archives_chemins VALUES (?, ?, ?, ?)", self._empreintes)
+            self._ecritures, self._acces = [], []
+            self._archives, self._empreintes = [], []
+
+    def fermer(self):
+        self.vider()
+        with self._verrou, self.db:
+            n = self.db.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+            if n > self.max_entrees:
+                self.db.execute("DELETE FROM analyses WHERE chemin IN "
+                                "(SELECT chemin FROM analyses ORDER BY acces LIMIT ?)", (n - self.max_entrees,))
+            # Archives : une entrée pèse la liste de ses .py → dix fois moins d’entrées gardées
+            n = self.db.execute("SELECT COUNT(*) FROM archives").fetchone()[0]
+            if n > self.max_entrees // 10:
+                self.db.execute("DELETE FROM archives WHERE empreinte IN "
+                                "(SELECT empreinte FROM archives ORDER BY acces LIMIT ?)", (n - self.max_entrees // 10,))
+            n = self.db.execute("SELECT COUNT(*) FROM archives_chemins").fetchone()[0]
+            if n > self.max_entrees:
+                self.db.execute("DELETE FROM archives_chemins WHERE empreinte NOT IN (SELECT empreinte FROM archives)")
+        self.db.close()
+
+    def resume(self):
+        total = self.hits + self.miss
+        taux = 100 * self.hits / total if total else 0
+        return f"🗄️ Cache analyse : {self.hits} hit(s) / {self.miss} miss ({taux:.0f} %)"
+
+def ouvrir_cache(chemin_db=CACHE_FICHIER):
+    """CacheAnalyse, ou None si la base est inutilisable (lecture seule, corrompue…)."""
+    try:
+        return CacheAnalyse(chemin_db)
+    except sqlite3.Error:
+        return None
+
+# === ARCHIVES (.zip, .whl, .egg, .pyz) ===
+# .py lu dans une archive, passé à `rapporter` comme une EntreeFS : chemin virtuel archive/nom
+MembreArchive = namedtuple("MembreArchive", "nom chemin taille")
+
+def lire_archive(chemin, max_membres=ARCHIVE_MAX_MEMBRES, max_octets=ARCHIVE_MAX_OCTETS):
+    """Répertoire central d’une archive zip, puis ses .py décompressés en mémoire, sans extraction
+    sur disque → (contenu, [SourcePy | None] des .py retenus, octets décompressés).
+    contenu : {"membres", "py": [[nom, taille]], "autres", "octets_autres", "ignores", "tronque", "erreur"} ;
+    ignores : .py non lus, max_octets décompressés étant atteints ; tronque : plus de max_membres entrées.
+    erreur : "lecture" (OSError, à retenter) | "zip" (archive invalide) | None."""
+    contenu = {"membres": 0, "py": [], "autres": 0, "octets_autres": 0, "ignores": 0, "tronque": False,
+               "erreur": None}
+    sources, reste = [], max_octets
+    try:
+        with zipfile.ZipFile(chemin) as zf:
+            infos = zf.infolist()
+            contenu["membres"] = len(infos)
+            if len(infos) > max_membres:
+                contenu["tronque"] = True
+                infos = infos[:max_membres]
+            for info in sorted(infos, key=lambda i: i.filename):
+                if info.is_dir():
+                    continue
+                if not info.filename.endswith(".py"):
+                    contenu["autres"] += 1
+                    contenu["octets_autres"] += info.file_size
+                    continue
+                if info.file_size > reste:
+                    contenu["ignores"] += 1
+                    continue
+                try:
+                    with zf.open(info) as f:
+                        donnees = f.read(reste + 1)  # borné même si la taille annoncée ment
+                except (RuntimeError, NotImplementedError, zipfile.BadZipFile, zlib.error, EOFError):
+                    compter_erreur("lecture_archive")  # membre chiffré, compression inconnue, corrompu
+                    source = None
+                else:
+                    if len(donnees) > reste:
+                        contenu["ignores"] += 1
+                        continue
+                    reste -= len(donnees)
+                    source = source_py(donnees)
+                contenu["py"].append([info.filename, info.file_size])
+                sources.append(source)
+    except OSError:
+        compter_erreur("archive")
+        contenu["erreur"] = "lecture"
+    except (zipfile.BadZipFile, zlib.error, EOFError, ValueError, NotImplementedError):
+        compter_erreur("archive")
+        contenu["erreur"] = "zip"
+    return contenu, sources, max_octets - reste
+
+def analyser_archive(entree, ordonnanceur, cache=None, mesures=None):
+    """Contenu d’une archive (cf. lire_archive), chaque .py complété de son résultat d’analyse :
+    "py": [[nom, taille, (statut, imports, risques)]]. Lecture de l’archive sous le quota du disque,
+    analyse hors quota. cache : contenu retrouvé par l’empreinte SHA-256 de l’archive — une archive
+    inchangée n’est pas rouverte, une copie identique ailleurs (autre venv, cache pip) non plus."""
+    if mesures:
+        mesures.compter("archives")
+    empreinte = connue = None
+    if cache:
+        empreinte = connue = cache.empreinte_archive(entree)
+        if empreinte is None:
+            if mesures:
+                depart = mesures.top_depart()
+            try:
+                empreinte, lus, _, _ = ordonnanceur.lire(entree, hacher_fichier, "sha256")
+            except (OSError, ValueError):
+                compter_erreur("empreinte")
+            else:
+                empreinte = f"{empreinte}/{ARCHIVE_MAX_MEMBRES}/{ARCHIVE_MAX_OCTETS}"  # limites comprises
+                if mesures:
+                    mesures.fin("empreinte_archive", depart)
+                    mesures.compter("octets_lus", lus)
+        contenu = cache.lire_archive(empreinte) if empreinte else None
+        if contenu is not None:
+            if connue is None:
+                cache.ecrire_archive(entree, empreinte)
+            if mesures:
+                mesures.compter("archives_cache")
+            return contenu
+    if mesures:
+        depart = mesures.top_depart()
+    contenu, sources, octets = ordonnanceur.lire(entree, lire_archive)
+    if mesures:
+        lecture = mesures.fin("lecture_archive", depart)
+        mesures.compter("octets_lus", octets)
+        depart = mesures.top_depart()
+    for membre, source in zip(contenu["py"], sources):
+        membre.append(analyser_lu(os.path.join(entree.chemin, membre[0]), source))
+    if mesures:
+        mesures.lent("fichiers", lecture + mesures.fin("analyse_py", depart), entree.chemin)
+    if cache and empreinte and contenu["erreur"] != "lecture":
+        cache.ecrire_archive(entree, empreinte, contenu)
+    return contenu
+
+def lignes_archive(debut, entree, contenu, suite, limite=MAX_ITEMS_PER_DIR, tailles=True):
+    """Archive vue comme un dossier virtuel : sa ligne (`debut` + résumé), puis ses .py (`limite` au plus).
+    Rend des str, et pour chaque .py affiché (début de ligne, MembreArchive, résultat)."""
+    if contenu["erreur"]:
+        yield f"{debut}  [❓ Archive illisible]"
+        return
+    py = contenu["py"]
+    risques = sum(1 for m in py if m[2][2])
+    yield (f"{debut}  [{contenu['membres']} membre(s), {len(py)} .py"
+           + (f", ⚠️ {risques} à risque" if risques else "") + "]")
+    affiches = py[:limite]
+    fin = []
+    autres = contenu["autres"] + len(py) - len(affiches)
+    if autres:
+        octets = contenu["octets_autres"] + sum(m[1] for m in py[limite:])
+        fin.append(f"📄 [{autres} autre(s) membre(s){f', {taille_lisible(octets)}' if tailles else ''}]")
+    if contenu["ignores"]:
+        fin.append(f"[...] ({contenu['ignores']} .py non lu(s) : limite de "
+                   f"{taille_lisible(ARCHIVE_MAX_OCTETS)} décompressés)")
+    if contenu["tronque"]:
+        fin.append(f"[...] (limite {ARCHIVE_MAX_MEMBRES} membres sur {contenu['membres']})")
+    for i, (nom, taille, res) in enumerate(affiches):
+        marque = "└── " if i == len(affiches) - 1 and not fin else "├── "
+        membre = MembreArchive(nom, os.path.join(entree.chemin, *nom.split("/")), taille)
+        yield f"{suite}{marque}🐍 {nom}{f'  ({taille_lisible(taille)})' if tailles else ''}", membre, res
+    for i, ligne in enumerate(fin):
+        yield f"{suite}{'└── ' if i == len(fin) - 1 else '├── '}{ligne}"
+
+# === ANALYSE .PY PARALLÈLE (ProcessPoolExecutor) ===
+def _analyser_lot(elements):
+    # Exécuté dans un processus fils : un aller-retour IPC par lot, pas par fichier.
+    # Élément = chemin (le fils lit) ou (chemin, source) déjà lu par l’ordonnanceur d’E/S.
+    # → (résultats, durées en s) ; les durées alimentent Mesures côté parent.
+    resultats, durees = [], []
+    for e in elements:
+        t0 = time.perf_counter()
+        resultats.append(analyser_lu(*e) if isinstance(e, tuple) else analyser_fichier(e))
+        durees.append(time.perf_counter() - t0)
+    return resultats, durees
+
+def analyser_py_dossier(entrees, ordonnanceur, cache=None, mesures=None, budget=None):
+    """{chemin: résultat} des .py d’un dossier : cache d’abord, puis lecture dans l’ordre des inodes.
+    La lecture se fait sous le quota du disque, l’analyse hors quota.
+    budget : Budget décompté des octets lus ; une fois épuisé, les .py restants sont absents du résultat."""
+    resultats, a_lire = {}, []
+    for e in entrees:
+        res = cache.lire(e) if cache else None
+        if res is None:
+            a_lire.append(e)
+        else:
+            resultats[e.chemin] = res
+    for e in ordonnanceur.ordonner(a_lire):
+        if budget is not None and budget.epuise():
+            break
+        if mesures:
+            depart = mesures.top_depart()
+        source = ordonnanceur.lire(e, lire_source_py)
+        if budget is not None:
+            budget.octets_lus += source.octets if source else 0
+        if mesures:
+            lecture = mesures.fin("lecture_py", depart)
+            mesures.compter("octets_lus", source.octets if source else 0)
+            depart = mesures.top_depart()
+        res = analyser_lu(e.chemin, source)
+        if mesures:
+            mesures.lent("fichiers", lecture + mesures.fin("analyse_py", depart), e.chemin)
+        if cache:
+            cache.ecrire(e, res)
+        resultats[e.chemin] = res
+    return resultats
+
+class _AnalyseSerie:
+    """Analyse .py dans le thread de scan : les .py d’un dossier sont lus d’avance
+    dans l’ordre des inodes (ordonnanceur d’E/S), puis émis dans l’ordre du parcours."""
+    def __init__(self, sortie, ordonnanceur, max_risques=1, cache=None, rapporter=None, mesures=None):
+        self.sortie = sortie
+        self.ordonnanceur = ordonnanceur
+        self.max_risques = max_risques
+        self.cache = cache
+        self.rapporter = rapporter
+        self.mesures = mesures
+        self.prets = {}
+
+    def preparer(self, entrees):
+        self.prets.update(analyser_py_dossier(entrees, self.ordonnanceur, self.cache, self.mesures))
+
+    def py(self, debut, entree):
+        res = self.prets.pop(entree.chemin, None)
+        if res is None:
+            res = self.ordonnanceur.lire(entree, analyser_fichier)
+        self._emettre_py(debut, entree, res)
+
+    def archive(self, debut, entree, suite, limite=MAX_ITEMS_PER_DIR, tailles=True):
+        contenu = analyser_archive(entree, self.ordonnanceur, self.cache, self.mesures)
+        for ligne in lignes_archive(debut, entree, contenu, suite, limite, tailles):
+            if isinstance(ligne, str):
+                self.sortie(ligne)
+            else:
+                self._emettre_py(*ligne)
+
+    def _emettre_py(self, debut, entree, res):
+        if self.rapporter:
+            self.rapporter(entree, res)
+        self.sortie(f"{debut}  [{formater_analyse(res, self.max_risques)}]")
+
+class SortieOrdonnee:
+    """Émetteur de lignes dont les .py sont analysés par lots dans un pool de processus.
+    Les lignes ressortent dans l’ordre exact du parcours, dès que leur analyse est prête.
+    Chaque lot est trié par inode ; sur un périphérique dont le quota de lectures est inférieur
+    au nombre de processus (HDD), les sources sont lues ici, en série, et seul le parsing est parallèle."""
+    def __init__(self, emettre, pool, workers, taille_lot=PY_TAILLE_LOT, max_risques=1, cache=None,
+                 ordonnanceur=None, rapporter=None, mesures=None):
+        self.emettre = emettre
+        self.rapporter = rapporter
+        self.mesures = mesures
+        self.pool = pool
+        self.workers = workers
+        self.max_risques = max_risques
+        self.cache = cache
+        self.ordonnanceur = ordonnanceur or OrdonnanceurES()
+        self.taille_lot = taille_lot
+        self.max_en_vol = 2 * workers
+        self.attente = deque()  # str | _Marque | (debut, entree, résultat) | [debut, future, index, entree]
+        self.lot = []
+        self.en_vol = deque()
+
+    def __call__(self, ligne):
+        if self.attente:
+            self.attente.append(ligne)
+        else:
+            self.emettre(ligne)
+
+    def preparer(self, entrees):
+        pass  # l’ordre de lecture est fixé lot par lot dans _soumettre
+
+    def py(self, debut, entree):
+        res = self.cache.lire(entree) if self.cache else None
+        if res is not None:
+            self._pret(debut, entree, res)
+            return
+        slot = [debut, None, None, entree]
+        self.attente.append(slot)
+        self.lot.append(slot)
+        if len(self.lot) >= self.taille_lot:
+            self._soumettre()
+        self._drainer(bloquer=False)
+
+    def archive(self, debut, entree, suite, limite=MAX_ITEMS_PER_DIR, tailles=True):
+        # Archive lue et analysée ici, en série : ses lignes prennent rang derrière les .py en vol
+        contenu = analyser_archive(entree, self.ordonnanceur, self.cache, self.mesures)
+        for ligne in lignes_archive(debut, entree, contenu, suite, limite, tailles):
+            if isinstance(ligne, str):
+                self(ligne)
+            else:
+                self._pret(*ligne)
+
+    def _pret(self, debut, entree, res):
+        # Résultat déjà connu (cache, archive) : émis tout de suite, ou à son rang dans la file
+        if self.attente:
+            self.attente.append((debut, entree, res))
+        else:
+            self._emettre_py(debut, entree, res)
+
+    def _soumettre(self):
+        if not self.lot:
+            return
+        ordo = self.ordonnanceur
+        slots = {id(slot[3]): slot for slot in self.lot}
+        elements = []
+        for i, entree in enumerate(ordo.ordonner([slot[3] for slot in self.lot])):
+            slots[id(entree)][2] = i
+            dev = ordo.peripherique(entree)
+            if ordo.limite(dev) < self.workers:
+                source = ordo.lire(entree, lire_source_py)
+                if self.mesures:
+                    self.mesures.compter("octets_lus", source.octets if source else 0)
+                elements.append((entree.chemin, source))
+            else:
+                elements.append(entree.chemin)
+        fut = self.pool.submit(_analyser_lot, elements)
+        for slot in self.lot:
+            slot[1] = fut
+        self.lot = []
+        self.en_vol.append(fut)
+        # Contre-pression : le parcours ne prend pas plus de 2 lots/processus d’avance
+        while len(self.en_vol) > self.max_en_vol:
+            self.en_vol.popleft().result()
+        while self.en_vol and self.en_vol[0].done():
+            self.en_vol.popleft()
+
+    def _drainer(self, bloquer):
+        while self.attente:
+            tete = self.attente[0]
+            if isinstance(tete, (str, _Marque)):
+                self.emettre(self.attente.popleft())
+                continue
+            if isinstance(tete, tuple):
+                self._emettre_py(*self.attente.popleft())
+                continue
+            debut, fut, i, entree = tete
+            if fut is None:
+                if not bloquer:
+                    return
+                self._soumettre()
+                fut, i = tete[1], tete[2]
+            elif not bloquer and not fut.done():
+                return
+            self.attente.popleft()
+            if self.mesures and not fut.done():
+                depart = self.mesures.top_depart()
+                fut.result()
+                self.mesures.fin("attente_processus", depart)
+            resultats, durees = fut.result()
+            res = resultats[i]
+            if self.mesures:
+                self.mesures.ajouter("analyse_py (processus)", durees[i], durees[i])
+                self.mesures.lent("fichiers", durees[i], entree.chemin)
+            if self.cache:
+                self.cache.ecrire(entree, res)
+            self._emettre_py(debut, entree, res)
+
+    def _emettre_py(self, debut, entree, res):
+        if self.rapporter:
+            self.rapporter(entree, res)
+        self.emettre(f"{debut}  [{formater_analyse(res, self.max_risques)}]")
+
+    def fermer(self):
+        self._soumettre()
+        self._drainer(bloquer=True)
+
+# === ARBRE SÉCURISÉ ===
+class _Marque:
+    """Repère de dossier glissé parmi les lignes émises (consommé par _SortieTailles)."""
+    __slots__ = ()
+
+class _Ouverture(_Marque):
+    __slots__ = ("ligne",)
+
+    def __init__(self, ligne):
+        self.ligne = ligne
+
+class _Fermeture(_Marque):
+    __slots__ = ("nom", "suite", "octets", "fichiers", "complet")
+
+    def __init__(self, nom, suite, octets, fichiers, complet):
+        self.nom = nom
+        self.suite = suite
+        self.octets = octets
+        self.fichiers = fichiers
+        self.complet = complet
+
+def _total_lisible(octets, fichiers, complet):
+    # « ≥ » : une partie du sous-arbre n’a pas été vue (profondeur, limite, accès refusé)
+    return f"{'' if complet else '≥ '}{taille_lisible(octets)}, {fichiers} fichier(s)"
+
+class _SortieTailles:
+    """Ajoute à chaque ligne 📁 la taille cumulée de son dossier, connue seulement à sa fermeture.
+    Les lignes qui suivent un dossier ouvert attendent dans un tampon borné (max_tampon) ;
+    s’il déborde, la ligne du dossier ouvert le plus externe part sans taille et son total
+    est émis après son contenu (« Σ nom : … »). Mémoire bornée, ordre des lignes inchangé."""
+    def __init__(self, emettre, max_tampon=ARBRE_TAMPON_TAILLES):
+        self.emettre = emettre
+        self.max_tampon = max_tampon
+        self.tampon = deque()  # str | [ligne, fermé] (dossier en attente de sa taille)
+        self.ouverts = []  # [ligne, fermé] | None (ligne déjà émise sans taille)
+
+    def __call__(self, ligne):
+        if isinstance(ligne, _Ouverture):
+            dossier = [ligne.ligne, False]
+            self.tampon.append(dossier)
+            self.ouverts.append(dossier)
+        elif isinstance(ligne, _Fermeture):
+            dossier = self.ouverts.pop()
+            total = _total_lisible(ligne.octets, ligne.fichiers, ligne.complet)
+            if dossier is None:
+                self._ligne(f"{ligne.suite}Σ {ligne.nom} : {total}")
+            else:
+                dossier[0] = f"{dossier[0]}  ({total})"
+                dossier[1] = True
+                self._vider()
+        else:
+            self._ligne(ligne)
+
+    def _ligne(self, ligne):
+        if not self.tampon:
+            self.emettre(ligne)
+            return
+        self.tampon.append(ligne)
+        while len(self.tampon) > self.max_tampon:
+            # La tête est forcément le dossier ouvert le plus externe encore retenu
+            dossier = self.tampon.popleft()
+            self.ouverts[next(i for i, d in enumerate(self.ouverts) if d is dossier)] = None
+            self.emettre(dossier[0])
+            self._vider()
+
+    def _vider(self):
+        tampon = self.tampon
+        while tampon:
+            tete = tampon[0]
+            if isinstance(tete, str):
+                self.emettre(tampon.popleft())
+            elif tete[1]:
+                self.emettre(tampon.popleft()[0])
+            else:
+                return
+
+    def vers_dict(self):
+        """Lignes en attente (str, ou [ligne, fermé] pour un dossier) et dossiers ouverts (rang dans le tampon)."""
+        rangs = {id(d): i for i, d in enumerate(self.tampon) if not isinstance(d, str)}
+        return {"tampon": list(self.tampon), "ouverts": [None if d is None else rangs[id(d)] for d in self.ouverts]}
+
+    def restaurer(self, d):
+        self.tampon = deque(d["tampon"])
+        self.ouverts = [None if i is None else self.tampon[i] for i in d["ouverts"]]
+
+    def fermer(self):
+        # Parcours interrompu : les dossiers encore ouverts partent sans taille
+        while self.tampon:
+            tete = self.tampon.popleft()
+            self.emettre(tete if isinstance(tete, str) else tete[0])
+        self.ouverts = [None] * len(self.ouverts)
+
+class Consommateurs:
+    """Plus gros dossiers et fichiers d’une cible, relevés pendant le parcours de l’arbre
+    (tas bornés à n éléments : pas de seconde passe ni de liste complète en mémoire)."""
+    def __init__(self, n=TOP_CONSOMMATEURS):
+        self.n = n
+        self.dossiers = []  # tas min de (octets, chemin, fichiers, complet)
+        self.fichiers = []  # tas min de (octets, chemin)
+
+    def _pousser(self, tas, element):
+        if len(tas) < self.n:
+            heapq.heappush(tas, element)
+        elif element > tas[0]:
+            heapq.heapreplace(tas, element)
+
+    def fichier(self, octets, chemin):
+        self._pousser(self.fichiers, (octets, chemin))
+
+    def dossier(self, octets, fichiers, complet, chemin):
+        self._pousser(self.dossiers, (octets, chemin, fichiers, complet))
+
+    def vers_dict(self):
+        return {"dossiers": self.dossiers, "fichiers": self.fichiers}
+
+    def restaurer(self, d):
+        # Listes déjà en ordre de tas : reprises telles quelles
+        self.dossiers = [tuple(x) for x in d["dossiers"]]
+        self.fichiers = [tuple(x) for x in d["fichiers"]]
+
+    def section(self, total=None):
+        """Lignes de la section « TOP CONSOMMATEURS » ; total : (octets, fichiers, complet) de la cible."""
+        lignes = ["-" * 60, f"🏆 TOP CONSOMMATEURS (n = {self.n})"]
+        if total:
+            lignes.append(f"Total cible : {_total_lisible(*total)}")
+        lignes.append("📁 Dossiers (taille cumulée) :")
+        for octets, chemin, fichiers, complet in sorted(self.dossiers, reverse=True):
+            lignes.append(f"  {_total_lisible(octets, fichiers, complet):>28}  {chemin}")
+        if not self.dossiers:
+            lignes.append("  —")
+        lignes.append("📄 Fichiers :")
+        for octets, chemin in sorted(self.fichiers, reverse=True):
+            lignes.append(f"  {taille_lisible(octets):>10}  {chemin}")
+        if not self.fichiers:
+            lignes.append("  —")
+        if total and not total[2]:
+            lignes.append("ℹ️ ≥ : totaux partiels (profondeur / éléments par dossier limités, budget épuisé, "
+                          "accès refusés)")
+        return lignes
+
+def arbre_securise(racine, prefix="", prof=0, max_prof=4, ignore_recycle=True, limit_per_dir=MAX_ITEMS_PER_DIR, analyze_py=True,
+                   sortie=None, etat=None, workers=1, max_risques=1, cache=None, ordonnanceur=None, rapporter=None,
+                   tailles=True, consommateurs=None, total=None, exclusions=None, index=None, reprise=None,
+                   depuis=None):
+    """Arborescence lisible. Sans `sortie` : retourne la liste des lignes.
+    Avec `sortie` (callable) : chaque ligne lui est émise dans l’ordre, au fil du parcours
+    (cf. lignes_arbre : mémoire bornée, aucune récursion).
+    workers > 1 : le parcours ne fait que collecter les .py, analysés par un pool de processus
+    (sortie identique au mode série). max_risques=None : tous les risques de chaque .py.
+    cache : CacheAnalyse — les .py inchangés (taille + mtime) ne sont ni relus ni reparsés.
+    ordonnanceur : OrdonnanceurES par lequel passent toutes les lectures de .py.
+    Avec analyze_py, les archives (EXT_ARCHIVES) sont parcourues comme des dossiers virtuels :
+    leurs .py sont analysés sur place (cf. analyser_archive), toujours dans le thread de scan.
+    rapporter(entree, (statut, imports, risques)) : résultat brut de chaque .py, appelé juste
+    avant l’émission de sa ligne (sortie structurée du mode ligne de commande) ; MembreArchive
+    pour un .py d’archive.
+    tailles : taille cumulée et nombre de fichiers de chaque dossier, calculés dans la même passe
+    (tous les fichiers comptent, y compris au-delà de limit_per_dir) ; consommateurs : Consommateurs
+    alimenté au passage ; total : liste recevant (octets, fichiers, complet) de la racine.
+    exclusions : Exclusions — les sous-dossiers visés ne sont pas listés (ligne « exclu », taille
+    non comptée), comme $RECYCLE.BIN avec ignore_recycle.
+    index : IndexScan alimenté au passage (listage de chaque dossier, tailles cumulées, analyses .py).
+    reprise : PointsReprise — état du parcours enregistré périodiquement (cf. lignes_arbre) ;
+    depuis : état « arbre » d’un point de reprise, à partir duquel le parcours continue."""
+    lignes = None
+    if sortie is None:
+        lignes = []
+        sortie = lignes.append
+    for ligne in lignes_arbre(racine, prefix, prof, max_prof, ignore_recycle, limit_per_dir, analyze_py, etat=etat,
+                              workers=workers, max_risques=max_risques, cache=cache, ordonnanceur=ordonnanceur,
+                              rapporter=rapporter, tailles=tailles, consommateurs=consommateurs, total=total,
+                              exclusions=exclusions, index=index, reprise=reprise, depuis=depuis):
+        sortie(ligne)
+    return lignes
+
+def lignes_arbre(racine, prefix="", prof=0, max_prof=4, ignore_recycle=True, limit_per_dir=MAX_ITEMS_PER_DIR,
+                 analyze_py=True, etat=None, workers=1, max_risques=1, cache=None, ordonnanceur=None, rapporter=None,
+                 tailles=True, consommateurs=None, total=None, exclusions=None, index=None, reprise=None,
+                 depuis=None):
+    """Générateur des lignes de l’arborescence (mêmes options qu’arbre_securise), rendues au fil
+    du parcours. La mémoire ne dépend pas de la taille de l’arbre : un cadre par niveau ouvert,
+    tampons des tailles et des .py en vol bornés. total n’est renseigné qu’en fin d’itération ;
+    close() arrête le parcours et libère le pool de processus.
+    Point de reprise (reprise.due()) : pris entre deux étapes, une fois les lignes prêtes consommées
+    et les .py en vol rendus — l’état tient alors dans la pile, les tampons et les consommateurs."""
+    tampon = deque()
+    sortie = tampon.append
+    sortie_tailles = None
+    if tailles:
+        sortie_tailles = sortie = _SortieTailles(sortie)
+    ordonnanceur = ordonnanceur or OrdonnanceurES()
+    mesures = etat.mesures if etat else None
+    if index is not None:
+        rapporter = index.rapporteur(rapporter)
+    if mesures:
+        rapporter = mesures.rapporteur_py(rapporter)
+    pool = ordre = None
+    if workers > 1 and analyze_py:
+        pool = futures.ProcessPoolExecutor(max_workers=workers)
+        ordre = SortieOrdonnee(sortie, pool, workers, max_risques=max_risques, cache=cache,
+                               ordonnanceur=ordonnanceur, rapporter=rapporter, mesures=mesures)
+        emettre = analyseur = ordre
+    else:
+        emettre = sortie
+        analyseur = _AnalyseSerie(sortie, ordonnanceur, max_risques=max_risques, cache=cache, rapporter=rapporter,
+                                  mesures=mesures)
+    pile = []
+    etapes = _arbre_etapes(emettre, analyseur, racine, prefix, prof, max_prof, ignore_recycle, limit_per_dir,
+                           analyze_py, etat, tailles, consommateurs, exclusions, index, pile,
+                           depuis["pile"] if depuis else None)
+    if depuis and sortie_tailles:
+        sortie_tailles.restaurer(depuis["tailles"])
+    try:
+        while True:
+            try:
+                next(etapes)
+            except StopIteration as fin:
+                cumul = fin.value
+                break
+            while tampon:
+                yield tampon.popleft()
+            if reprise is not None and reprise.due():
+                if ordre:
+                    ordre.fermer()  # plus aucun .py en vol
+                    while tampon:
+                        yield tampon.popleft()
+                reprise.enregistrer({"pile": [c.vers_dict() for c in pile],
+                                     "tailles": sortie_tailles.vers_dict() if sortie_tailles else None},
+                                    etat, consommateurs)
+        if ordre:
+            ordre.fermer()
+        if sortie_tailles:
+            sortie_tailles.fermer()
+    except Exception:
+        # Parcours interrompu (annulation…) : les lignes déjà prêtes sortent quand même
+        if sortie_tailles:
+            sortie_tailles.fermer()
+        while tampon:
+            yield tampon.popleft()
+        raise
+    finally:
+        if pool:
+            pool.shutdown(wait=True, cancel_futures=True)
+    while tampon:
+        yield tampon.popleft()
+    if total is not None:
+        total[:] = cumul
+
+def _avec_dernier(elements):
+    """(élément, est_dernier) avec un élément d’avance : └── / ├── sans compter les enfants."""
+    it = iter(elements)
+    for precedent in it:
+        break
+    else:
+        return
+    for element in it:
+        yield precedent, False
+        precedent = element
+    yield precedent, True
+
+class _Cadre:
+    """Dossier ouvert dans la pile de _arbre_etapes."""
+    __slots__ = ("chemin", "rel", "prefix", "prof", "enfants", "pos", "py", "prepare", "taille_de",
+                 "octets_autres", "octets", "fichiers", "complet", "duree", "enfant")
+
+    def __init__(self, chemin, rel, prefix, prof):
+        self.chemin = chemin
+        self.rel = rel  # relatif à la racine du parcours, séparateur « / » (règles d’exclusion)
+        self.prefix = prefix
+        self.prof = prof
+        self.enfants = []  # EntreeFS à rendre, puis le nombre d’« autres » fichiers (int)
+        self.pos = 0  # prochain élément de enfants
+        self.prepare = False
+        self.taille_de = {}
+        self.octets_autres = 0
+        self.octets, self.fichiers, self.complet = 0, 0, True
+        self.duree = 0.0
+        self.enfant = None  # (nom, chemin, préfixe de ses lignes) du sous-dossier en cours
+
+    def vers_dict(self):
+        """État pour un point de reprise : seuls les éléments restant à rendre sont gardés (par nom)."""
+        restants = self.enfants[self.pos:]
+        return {"chemin": self.chemin, "rel": self.rel, "prefix": self.prefix, "prof": self.prof,
+                "restants": [e if isinstance(e, int) else e.nom for e in restants],
+                "tailles": {e.nom: self.taille_de[e.chemin] for e in restants
+                            if not isinstance(e, int) and e.chemin in self.taille_de},
+                "octets_autres": self.octets_autres, "octets": self.octets, "fichiers": self.fichiers,
+                "complet": self.complet, "enfant": self.enfant}
+
+    @classmethod
+    def depuis_dict(cls, d, mesures=None):
+        """Cadre repris d’un point de reprise : le dossier est relu pour retrouver ses EntreeFS
+        (une entrée disparue entre-temps est sautée) ; ses .py restants seront préparés à nouveau."""
+        cadre = cls(d["chemin"], d["rel"], d["prefix"], d["prof"])
+        try:
+            presents = {e.nom: e for e in scanner_dossier(cadre.chemin, mesures)}
+        except OSError:
+            compter_erreur("reprise")
+            presents = {}
+        cadre.enfants = [x if isinstance(x, int) else presents[x] for x in d["restants"]
+                         if isinstance(x, int) or x in presents]
+        cadre.taille_de = {presents[nom].chemin: t for nom, t in d["tailles"].items() if nom in presents}
+        cadre.octets_autres = d["octets_autres"]
+        cadre.octets, cadre.fichiers, cadre.complet = d["octets"], d["fichiers"], d["complet"]
+        cadre.enfant = tuple(d["enfant"]) if d["enfant"] else None
+        cadre.py = [e for e in cadre.enfants if not isinstance(e, int) and e.est_fichier and e.nom.endswith(".py")]
+        return cadre
+
+def _arbre_etapes(emettre, analyseur, racine, prefix, prof, max_prof, ignore_recycle, limit_per_dir, analyze_py, etat,
+                  tailles=False, consommateurs=None, exclusions=None, index=None, pile=None, depuis=None):
+    """Parcours en pré-ordre sur une pile explicite (profondeur sans limite de récursion).
+    Générateur : rend la main après chaque entrée, ses lignes ayant été passées à `emettre` ;
+    retourne (octets, fichiers, complet) de la racine (sans tailles : (0, 0, True)).
+    complet=False : une partie du sous-arbre n’a pas été vue (profondeur, limite, accès refusé, stat).
+    pile : liste fournie par l’appelant, qui voit ainsi les _Cadre ouverts (points de reprise) ;
+    depuis : cadres d’un point de reprise (_Cadre.vers_dict) — le parcours continue à partir d’eux."""
+    def ouvrir(chemin, rel, prefix, prof):
+        # → _Cadre à empiler, ou totaux si le dossier s’arrête là (limite, refus, corbeille)
+        if prof >= max_prof:
+            emettre(f"{prefix}└── [...] (limite profondeur {prof}/{max_prof})")
+            return 0, 0, False
+        if etat:
+            etat.verifier()
+            depart = etat.mesures.top_depart()
+        try:
+            elements = scanner_dossier(chemin, etat and etat.mesures)
+        except OSError as e:
+            if etat:
+                _noter_refus(etat.mesures, e)
+            emettre(f"{prefix}📁 [accès refusé]")
+            return 0, 0, False
+        cadre = _Cadre(chemin, rel, prefix, prof)
+        if etat:
+            etat.mesures.compter("scandir")
+            cadre.duree = etat.mesures.fin("listage", depart)
+
+        if ignore_recycle and os.path.basename(chemin).startswith("$RECYCLE.BIN"):
+            emettre(f"{prefix}📁 $RECYCLE.BIN (exclu)")
+            return 0, 0, True
+        if index is not None:
+            index.dossier(chemin, elements)
+
+        if tailles:
+            # Tous les fichiers du dossier comptent, y compris au-delà de limit_per_dir
+            for i, e in enumerate(elements):
+                if e.est_fichier:
+                    try:
+                        t = e.taille
+                    except OSError:
+                        compter_erreur("stat")
+                        cadre.complet = False
+                        continue
+                    cadre.taille_de[e.chemin] = t
+                    cadre.octets += t
+                    cadre.fichiers += 1
+                    if consommateurs is not None:
+                        consommateurs.fichier(t, e.chemin)
+                elif e.est_dossier and i >= limit_per_dir:
+                    cadre.complet = False  # sous-dossier non parcouru
+
+        dossiers = []
+        fichiers_imp = []
+        autres = 0
+        for e in elements[:limit_per_dir]:
+            if e.est_dossier:
+                dossiers.append(e)
+            elif e.est_fichier:
+                if e.ext in EXT_IMPORTANTES or (analyze_py and e.ext in EXT_ARCHIVES):
+                    fichiers_imp.append(e)
+                else:
+                    autres += 1
+                    cadre.octets_autres += cadre.taille_de.get(e.chemin, 0)
+        if etat:
+            etat.dossiers += 1
+            etat.fichiers += len(fichiers_imp) + autres
+        cadre.py = [f for f in fichiers_imp if f.nom.endswith('.py')]
+        cadre.enfants = dossiers + fichiers_imp + ([autres] if autres else [])
+        return cadre
+
+    def preparer(cadre):
+        # .py du dossier lus d’avance, une fois ses sous-dossiers parcourus (premier fichier ou fin)
+        if cadre.prepare:
+            return
+        cadre.prepare = True
+        if analyze_py:
+            if etat:
+                depart = etat.mesures.top_depart()
+            analyseur.preparer(cadre.py)
+            if etat:
+                cadre.duree += time.perf_counter() - depart[0]
+        if etat:
+            # Coût propre du dossier : listage + .py lus/analysés ici (sous-dossiers exclus)
+            etat.mesures.lent("dossiers", cadre.duree, cadre.chemin)
+
+    def fermer_enfant(cadre, cumul):
+        if not tailles:
+            return
+        nom, chemin, suite = cadre.enfant
+        o, n, c = cumul
+        emettre(_Fermeture(nom, suite, o, n, c))
+        if consommateurs is not None:
+            consommateurs.dossier(o, n, c, chemin)
+        if index is not None:
+            index.cumul(chemin, o, n)
+        cadre.octets += o
+        cadre.fichiers += n
+        cadre.complet = cadre.complet and c
+
+    if pile is None:
+        pile = []
+    if depuis:
+        pile.extend(_Cadre.depuis_dict(d, etat and etat.mesures) for d in depuis)
+    else:
+        cadre = ouvrir(racine, "", prefix, prof)
+        if not isinstance(cadre, _Cadre):
+            return cadre if tailles else (0, 0, True)
+        pile.append(cadre)
+    while pile:
+        cadre = pile[-1]
+        element = cadre.enfants[cadre.pos] if cadre.pos < len(cadre.enfants) else None
+        cadre.pos += 1
+        dernier = cadre.pos >= len(cadre.enfants)
+        if element is None:
+            preparer(cadre)
+            pile.pop()
+            cumul = (cadre.octets, cadre.fichiers, cadre.complet)
+            if not pile:
+                return cumul
+            fermer_enfant(pile[-1], cumul)
+            yield
+            continue
+        prefix = cadre.prefix
+        marque = "└── " if dernier else "├── "
+        if isinstance(element, int):
+            taille = f", {taille_lisible(cadre.octets_autres)}" if tailles else ""
+            emettre(f"{prefix}{marque}📄 [{element} autre(s) fichier(s){taille}]")
+        elif element.est_dossier:
+            rel = f"{cadre.rel}/{element.nom}" if cadre.rel else element.nom
+            regle = exclusions.regle(element.nom, rel) if exclusions else None
+            if ignore_recycle and element.nom.upper() == "$RECYCLE.BIN":
+                emettre(f"{prefix}{marque}📁 $RECYCLE.BIN (exclu)")
+            elif regle:
+                # Élagué avant tout listage : ni scandir ni stat dans ce sous-arbre
+                if etat:
+                    etat.mesures.elaguer(regle)
+                emettre(f"{prefix}{marque}📁 {element.nom} (exclu : {regle})")
+            else:
+                suite = prefix + ("    " if dernier else "│   ")
+                if tailles:
+                    emettre(_Ouverture(f"{prefix}{marque}📁 {element.nom}"))
+                else:
+                    emettre(f"{prefix}{marque}📁 {element.nom}")
+                cadre.enfant = (element.nom, element.chemin, suite)
+                sous = ouvrir(element.chemin, rel, suite, cadre.prof + 1)
+                if isinstance(sous, _Cadre):
+                    pile.append(sous)
+                else:
+                    fermer_enfant(cadre, sous)
+        else:
+            preparer(cadre)
+            taille = ""
+            if tailles:
+                t = cadre.taille_de.get(element.chemin)
+                taille = f"  ({'?' if t is None else taille_lisible(t)})"
+            if element.nom.endswith('.py') and analyze_py:
+                analyseur.py(f"{prefix}{marque}🐍 {element.nom}{taille}", element)
+            elif analyze_py and element.ext in EXT_ARCHIVES:
+                # Dossier virtuel : ses .py sont analysés sur place, ses tailles déjà comptées dans l’archive
+                if etat:
+                    etat.verifier()
+                analyseur.archive(f"{prefix}{marque}📦 {element.nom}{taille}", element,
+                                  prefix + ("    " if dernier else "│   "), limit_per_dir, tailles)
+                if index is not None:
+                    index.archive(element.chemin)
+            else:
+                emettre(f"{prefix}{marque}📄 {element.nom}{taille}")
+        yield
+
+def lister_noeud(chemin, limite=EXPLORATEUR_MAX_ENFANTS, analyze_py=True, cache=None, ordonnanceur=None):
+    """Un seul niveau, pour l’explorateur (chargé à l’ouverture du dossier) → (dossiers, fichiers, reste).
+    dossiers : [EntreeFS] ; fichiers : [(EntreeFS, taille ou None, résultat .py ou None)] ;
+    reste : nombre d’entrées au-delà de `limite`. Lève OSError si le dossier est illisible."""
+    elements = scanner_dossier(chemin)
+    reste = max(0, len(elements) - limite)
+    elements = elements[:limite]
+    dossiers = [e for e in elements if e.est_dossier]
+    fichiers = [e for e in elements if e.est_fichier]
+    resultats = {}
+    if analyze_py:
+        resultats = analyser_py_dossier([f for f in fichiers if f.nom.endswith(".py")],
+                                        ordonnanceur or OrdonnanceurES(), cache)
+    lignes = []
+    for f in fichiers:
+        try:
+            taille = f.taille
+        except OSError:
+            compter_erreur("stat")
+            taille = None
+        lignes.append((f, taille, resultats.get(f.chemin)))
+    return dossiers, lignes, reste
+
+# === PARCOURS BUDGÉTÉ (temps / entrées / octets lus) ===
+class Budget:
+    """Limites d’un parcours budgété, chacune facultative (None) : secondes d’horloge,
+    entrées listées (scandir), octets de .py lus (hors cache). Le décompte démarre à la création :
+    copie() donne un budget neuf aux mêmes limites (un par cible)."""
+    def __init__(self, secondes=None, entrees=None, octets=None):
+        self.secondes = secondes
+        self.entrees = entrees
+        self.octets = octets
+        self.debut = time.perf_counter()
+        self.entrees_vues = 0
+        self.octets_lus = 0
+        self.raison = None  # critère épuisé en premier : "temps" | "entrées" | "octets"
+
+    def copie(self):
+        return Budget(self.secondes, self.entrees, self.octets)
+
+    def epuise(self):
+        if self.raison is None:
+            if self.secondes is not None and time.perf_counter() - self.debut >= self.secondes:
+                self.raison = "temps"
+            elif self.entrees is not None and self.entrees_vues >= self.entrees:
+                self.raison = "entrées"
+            elif self.octets is not None and self.octets_lus >= self.octets:
+                self.raison = "octets"
+        return self.raison
+
+    def limites(self):
+        morceaux = []
+        if self.secondes is not None:
+            morceaux.append(f"{self.secondes:g} s")
+        if self.entrees is not None:
+            morceaux.append(f"{self.entrees} entrées")
+        if self.octets is not None:
+            morceaux.append(f"{taille_lisible(self.octets)} de .py lus")
+        return " / ".join(morceaux) or "illimité"
+
+    def resume(self):
+        etat = f"épuisé ({self.raison})" if self.raison else "non atteint, parcours complet"
+        return (f"⏱️ Budget {self.limites()} : {etat} — {time.perf_counter() - self.debut:.1f} s, "
+                f"{self.entrees_vues} entrée(s) listée(s), {taille_lisible(self.octets_lus)} de .py lus")
+
+class _NoeudBudget:
+    """Dossier du parcours budgété. statut : None tant qu’il attend son tour (non exploré si le budget
+    s’épuise d’abord), "ok", "refus", "corbeille", ou la règle d’exclusion qui l’élague."""
+    __slots__ = ("nom", "chemin", "rel", "prof", "bonus", "elan", "statut", "dossiers", "fichiers", "autres",
+                 "octets_autres", "octets", "nb", "complet")
+
+    def __init__(self, nom, chemin, rel, prof):
+        self.nom = nom
+        self.chemin = chemin
+        self.rel = rel
+        self.prof = prof
+        self.bonus = 0.0
+        self.elan = 0.0  # part du bonus transmissible aux sous-dossiers (densité .py)
+        self.statut = None
+        self.dossiers = []  # _NoeudBudget, dans l’ordre des noms
+        self.fichiers = []  # (EntreeFS, taille) des fichiers importants affichés
+        self.autres, self.octets_autres = 0, 0
+        self.octets, self.nb, self.complet = 0, 0, True
+
+def _bonus_dossier(parent, densite_py, mtime_ns, maintenant):
+    # → (bonus, élan) d’un sous-dossier (plus haut = plus tôt). Chaque niveau de profondeur coûte 1.
+    # Élan : 2 × part de .py parmi les fichiers du parent, + la moitié de l’élan du parent plafonnée
+    # à BUDGET_HERITAGE_MAX (un sous-arbre riche en .py le reste, sans jamais racheter un niveau).
+    # Bonus : élan, + 2 s’il vient d’être modifié (décroissance linéaire sur BUDGET_RECENT_JOURS) —
+    # la récence n’est pas transmise : dans un arbre tout récent, elle s’annulerait sinon à chaque niveau.
+    # À bonus propres égaux, un dossier de profondeur p passe donc toujours avant ceux de p + 1.
+    age = (maintenant - mtime_ns / 1e9) / 86400 if mtime_ns else BUDGET_RECENT_JOURS
+    elan = 2.0 * densite_py + min(BUDGET_HERITAGE_MAX, 0.5 * parent.elan)
+    return elan + 2.0 * max(0.0, 1.0 - age / BUDGET_RECENT_JOURS), elan
+
+def parcours_budgete(racine, budget, ignore_recycle=True, limit_per_dir=MAX_ITEMS_PER_DIR, analyze_py=True,
+                     etat=None, cache=None, ordonnanceur=None, rapporter=None, exclusions=None, index=None,
+                     consommateurs=None):
+    """Parcours par priorités sous `budget`, au lieu d’une profondeur et d’un nombre d’éléments fixes
+    → (_NoeudBudget racine, {chemin .py: résultat}, [_NoeudBudget restés en file]).
+    Le dossier le plus prometteur est listé d’abord (cf. _bonus_dossier) : tous les sous-dossiers d’un
+    dossier listé entrent dans la file, aucun n’est écarté pour son rang alphabétique. Un dossier entamé
+    termine son listage ; ses .py sont lus tant que le budget le permet (série, décompte fichier par
+    fichier). limit_per_dir ne borne plus que l’affichage des fichiers importants autres que .py."""
+    ordonnanceur = ordonnanceur or OrdonnanceurES()
+    mesures = etat.mesures if etat else None
+    maintenant = time.time()
+    resultats = {}
+    tete = _NoeudBudget(os.path.basename(racine.rstrip("\\/")) or racine, racine, "", 0)
+    if ignore_recycle and os.path.basename(racine).startswith("$RECYCLE.BIN"):
+        tete.statut = "corbeille"
+        return tete, resultats, []
+    file = [(0.0, 0, tete)]
+    sequence = 1
+    while file and not budget.epuise():
+        noeud = heapq.heappop(file)[2]
+        if etat:
+            etat.verifier()
+            depart = mesures.top_depart()
+        try:
+            elements = scanner_dossier(noeud.chemin, mesures)
+        except OSError as e:
+            if etat:
+                _noter_refus(mesures, e)
+            noeud.statut = "refus"
+            continue
+        if etat:
+            mesures.compter("scandir")
+            duree = mesures.fin("listage", depart)
+        budget.entrees_vues += len(elements)
+        noeud.statut = "ok"
+        if index is not None:
+            index.dossier(noeud.chemin, elements)
+
+        py, importants, a_suivre = [], [], []
+        for e in elements:
+            if e.est_dossier:
+                rel = f"{noeud.rel}/{e.nom}" if noeud.rel else e.nom
+                enfant = _NoeudBudget(e.nom, e.chemin, rel, noeud.prof + 1)
+                noeud.dossiers.append(enfant)
+                regle = exclusions.regle(e.nom, rel) if exclusions else None
+                if ignore_recycle and e.nom.upper() == "$RECYCLE.BIN":
+                    enfant.statut = "corbeille"
+                elif regle:
+                    if etat:
+                        mesures.elaguer(regle)
+                    enfant.statut = regle
+                else:
+                    a_suivre.append((enfant, e))
+            elif e.est_fichier:
+                try:
+                    t = e.taille
+                except OSError:
+                    compter_erreur("stat")
+                    noeud.complet = False
+                    continue
+                noeud.octets += t
+                noeud.nb += 1
+                if consommateurs is not None:
+                    consommateurs.fichier(t, e.chemin)
+                if e.nom.endswith(".py"):
+                    py.append((e, t))
+                elif e.ext in EXT_IMPORTANTES and len(importants) < limit_per_dir:
+                    importants.append((e, t))
+                else:
+                    noeud.autres += 1
+                    noeud.octets_autres += t
+        noeud.fichiers = sorted(py + importants, key=lambda f: f[0].nom)
+        if etat:
+            etat.dossiers += 1
+            etat.fichiers += noeud.nb
+
+        densite_py = len(py) / noeud.nb if noeud.nb else 0.0
+        for enfant, e in a_suivre:
+            try:
+                mtime_ns = e.mtime_ns
+            except OSError:
+                compter_erreur("stat")
+                mtime_ns = None
+            enfant.bonus, enfant.elan = _bonus_dossier(noeud, densite_py, mtime_ns, maintenant)
+            heapq.heappush(file, (enfant.prof - enfant.bonus, sequence, enfant))
+            sequence += 1
+
+        if analyze_py and py:
+            if etat:
+                depart = mesures.top_depart()
+            lus = analyser_py_dossier([e for e, _ in py], ordonnanceur, cache, mesures, budget=budget)
+            resultats.update(lus)
+            if rapporter:
+                for e, _ in py:
+                    if e.chemin in lus:
+                        rapporter(e, lus[e.chemin])
+            if etat:
+                duree += time.perf_counter() - depart[0]
+        if etat:
+            mesures.lent("dossiers", duree, noeud.chemin)
+    return tete, resultats, [f[2] for f in sorted(file)]
+
+def _cumuler_budget(tete, consommateurs=None, index=None):
+    # Tailles cumulées, des feuilles vers la racine (pile explicite) ; un sous-dossier non exploré
+    # ou refusé rend son parent incomplet (« ≥ »), un dossier exclu ne compte pas
+    pile = [(tete, False)]
+    while pile:
+        noeud, vu = pile.pop()
+        if not vu:
+            pile.append((noeud, True))
+            pile.extend((d, False) for d in noeud.dossiers if d.statut == "ok")
+            continue
+        for d in noeud.dossiers:
+            if d.statut == "ok":
+                noeud.octets += d.octets
+                noeud.nb += d.nb
+                noeud.complet = noeud.complet and d.complet
+                if consommateurs is not None:
+                    consommateurs.dossier(d.octets, d.nb, d.complet, d.chemin)
+                if index is not None:
+                    index.cumul(d.chemin, d.octets, d.nb)
+            elif d.statut in (None, "refus"):
+                noeud.complet = False
+
+def lignes_budget(tete, resultats, restants, budget, analyze_py=True, max_risques=1, max_restants=10):
+    """Lignes de l’arborescence d’un parcours budgété (pré-ordre, pile explicite), puis le bilan :
+    ⏳ marque les dossiers restés en file et les .py que le budget n’a pas laissé lire."""
+    non_analyses = 0
+    if tete.statut == "corbeille":
+        yield "📁 $RECYCLE.BIN (exclu)"
+    elif tete.statut == "refus":
+        yield "📁 [accès refusé]"
+    elif tete.statut is None:
+        yield f"📁 {tete.nom}  ⏳ [non exploré : budget {budget.raison or 'épuisé'}]"
+    pile = [(_avec_dernier(tete.dossiers + tete.fichiers + ([tete.autres] if tete.autres else [])), "", tete)]
+    if tete.statut != "ok":
+        pile = []
+    while pile:
+        enfants, prefix, parent = pile[-1]
+        element, dernier = next(enfants, (None, True))
+        if element is None:
+            pile.pop()
+            continue
+        marque = "└── " if dernier else "├── "
+        if isinstance(element, int):
+            yield f"{prefix}{marque}📄 [{element} autre(s) fichier(s), {taille_lisible(parent.octets_autres)}]"
+        elif isinstance(element, _NoeudBudget):
+            d = element
+            suite = prefix + ("    " if dernier else "│   ")
+            if d.statut == "ok":
+                yield f"{prefix}{marque}📁 {d.nom}  ({_total_lisible(d.octets, d.nb, d.complet)})"
+                pile.append((_avec_dernier(d.dossiers + d.fichiers + ([d.autres] if d.autres else [])), suite, d))
+            elif d.statut is None:
+                yield f"{prefix}{marque}📁 {d.nom}  ⏳ [non exploré : budget {budget.raison or 'épuisé'}]"
+            elif d.statut == "refus":
+                yield f"{prefix}{marque}📁 {d.nom}  ({_total_lisible(0, 0, False)})"
+                yield f"{suite}📁 [accès refusé]"
+            elif d.statut == "corbeille":
+                yield f"{prefix}{marque}📁 $RECYCLE.BIN (exclu)"
+            else:
+                yield f"{prefix}{marque}📁 {d.nom} (exclu : {d.statut})"
+        else:
+            e, t = element
+            if e.nom.endswith(".py") and analyze_py:
+                res = resultats.get(e.chemin)
+                if res is None:
+                    non_analyses += 1
+                    analyse = "⏳ non analysé : budget"
+                else:
+                    analyse = formater_analyse(res, max_risques)
+                yield f"{prefix}{marque}🐍 {e.nom}  ({taille_lisible(t)})  [{analyse}]"
+            else:
+                yield f"{prefix}{marque}📄 {e.nom}  ({taille_lisible(t)})"
+    yield ""
+    yield budget.resume()
+    if restants or non_analyses:
+        yield f"⏳ Non exploré : {len(restants)} dossier(s) en file, {non_analyses} .py non analysé(s)"
+        for d in restants[:max_restants]:
+            yield f"   → {d.chemin}  (priorité {d.bonus - d.prof:+.1f})"
+        if len(restants) > max_restants:
+            yield f"   [...] {len(restants) - max_restants} autre(s)"
+
+def arbre_budgete(racine, budget, sortie, etat=None, ignore_recycle=True, limit_per_dir=MAX_ITEMS_PER_DIR,
+                  analyze_py=True, max_risques=1, cache=None, ordonnanceur=None, rapporter=None, exclusions=None,
+                  index=None, consommateurs=None, total=None):
+    """Équivalent budgété d’arbre_securise : parcours_budgete puis lignes émises vers sortie.
+    total : liste recevant (octets, fichiers, complet) de la racine."""
+    mesures = etat.mesures if etat else None
+    if index is not None:
+        rapporter = index.rapporteur(rapporter)
+    if mesures:
+        rapporter = mesures.rapporteur_py(rapporter)
+    tete, resultats, restants = parcours_budgete(
+        racine, budget, ignore_recycle=ignore_recycle, limit_per_dir=limit_per_dir, analyze_py=analyze_py,
+        etat=etat, cache=cache, ordonnanceur=ordonnanceur, rapporter=rapporter, exclusions=exclusions,
+        index=index, consommateurs=consommateurs)
+    _cumuler_budget(tete, consommateurs, index)
+    for ligne in lignes_budget(tete, resultats, restants, budget, analyze_py, max_risques):
+        sortie(ligne)
+    if total is not None:
+        total[:] = (tete.octets, tete.nb, tete.complet and tete.statut in ("ok", "corbeille"))
+
+# === EMPREINTES DE CONTENU ===
+# Mode → étiquette des lignes F des images v1. "sha1-4k" : historique (4 premiers Ko, 8 hex).
+EMPREINTES = {"sha1-4k": "SHA1", "sha256": "SHA256", "blake2b": "BLAKE2B"}
+_ETIQUETTES = {v: k for k, v in EMPREINTES.items()}
+_tampons = threading.local()
+
+def hacher_fichier(chemin, mode="sha256"):
+    """Empreinte d’un fichier → (hex, octets lus, s de lecture, s de calcul).
+    Contenu complet : readinto dans un bytearray réutilisé par thread, mmap au-delà de
+    HASH_SEUIL_MMAP. hashlib relâche le GIL : plusieurs threads hachent en parallèle."""
+    if mode == "sha1-4k":
+        t0 = time.perf_counter()
+        with open(chemin, 'rb') as f:
+            sample = f.read(4096)
+        t1 = time.perf_counter()
+        return hashlib.sha1(sample).hexdigest()[:8], len(sample), t1 - t0, time.perf_counter() - t1
+    h = hashlib.new(mode)
+    lus_total, t_lecture, t_calcul = 0, 0.0, 0.0
+    with open(chemin, "rb", buffering=0) as f:
+        taille = os.fstat(f.fileno()).st_size
+        if taille >= HASH_SEUIL_MMAP:
+            t0 = time.perf_counter()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                h.update(mm)  # lecture (défauts de page) et calcul confondus
+            return h.hexdigest(), taille, 0.0, time.perf_counter() - t0
+        vue = getattr(_tampons, "vue", None)
+        if vue is None:
+            vue = _tampons.vue = memoryview(bytearray(HASH_BLOC))
+        while True:
+            t0 = time.perf_counter()
+            lus = f.readinto(vue)
+            t1 = time.perf_counter()
+            t_lecture += t1 - t0
+            if not lus:
+                break
+            h.update(vue[:lus])
+            t_calcul += time.perf_counter() - t1
+            lus_total += lus
+    return h.hexdigest(), lus_total, t_lecture, t_calcul
+
+def _hacher_ou_err(chemin, mode):
+    try:
+        return hacher_fichier(chemin, mode)
+    except (OSError, ValueError):
+        compter_erreur("empreinte")
+        return "err", 0, 0.0, 0.0
+
+def resume_debit(stats):
+    """Ligne de débit d’un ecrire_image_kbi() : Mo/s + part lecture/calcul (I/O- ou CPU-bound)."""
+    mo = stats.get("octets", 0) / (1024 * 1024)
+    duree = max(stats.get("duree", 0.0), 1e-6)
+    t_lecture, t_calcul = stats.get("t_lecture", 0.0), stats.get("t_calcul", 0.0)
+    borne = "disque (I/O)" if t_lecture > t_calcul else "CPU (calcul)"
+    return (f"⚡ {mo:.1f} Mo hachés en {duree:.1f} s → {mo / duree:.1f} Mo/s "
+            f"(lecture {t_lecture:.1f} s / calcul {t_calcul:.1f} s cumulés → limité par : {borne})")
+
+# === IMAGE .KBI ===
+def _analyser_ligne_kbi(ligne):
+    """Ligne d’image v1 → (genre, rel, taille, mtime_ns, empreinte), ou None si ce n’est pas une entrée."""
+    if ligne.startswith("D ") and ligne.endswith("/"):
+        return ("D", ligne[2:-1], None, None, None)
+    if not ligne.startswith("F "):
+        return None
+    champs = ligne[2:].split(" | ")
+    mtime_ns = None
+    if champs[-1].startswith("mtime:"):
+        mtime_ns = int(champs.pop()[6:])
+    if len(champs) < 3 or champs[-1].split(":", 1)[0] not in _ETIQUETTES:
+        return None
+    try:
+        taille = int(champs[-2].split()[0])
+    except ValueError:
+        return None
+    return ("F", " | ".join(champs[:-2]), taille, mtime_ns, champs[-1].split(":", 1)[1])
+
+def lire_image_kbi(chemin):
+    """Relit une image .kbi (v1 texte ou v2 binaire) → (cible, {rel: (genre, taille, mtime_ns, empreinte)}, mode).
+    Les images antérieures sans champ mtime donnent mtime_ns = None (jamais réutilisables)."""
+    if est_kbi2(chemin):
+        with LecteurKbi2(chemin) as lecteur:
+            return lecteur.meta.get("cible"), {
+                e.rel.replace("/", os.sep): (e.genre, e.taille, e.mtime_ns, e.empreinte) for e in lecteur
+            }, lecteur.meta.get("empreinte", "sha1-4k")
+    cible = None
+    mode = "sha1-4k"
+    entrees = {}
+    with open(chemin, "r", encoding="utf-8") as f:
+        for ligne in f:
+            ligne = ligne.rstrip("\n")
+            e = _analyser_ligne_kbi(ligne)
+            if e:
+                entrees[e[1]] = (e[0],) + e[2:]
+            elif cible is None and ligne.startswith("Cible : "):
+                cible = ligne[8:]
+            elif ligne.startswith("Empreinte : "):
+                mode = ligne[12:]
+    return cible, entrees, mode
+
+def _charger_precedente(chemin, racine, mode):
+    # Image précédente réutilisable seulement si même cible et même mode d’empreinte
+    try:
+        cible, entrees, mode_avant = lire_image_kbi(chemin)
+    except (OSError, ValueError, UnicodeDecodeError):
+        return None
+    return entrees if cible == os.path.abspath(racine) and mode_avant == mode else None
+
+class _SortieKbiTexte:
+    """Image v1 : texte lisible par tout éditeur, une ligne par entrée.
+    Écrite en flux (tampon disque + SHA-256 incrémental) dans un .tmp renommé à la fin :
+    mémoire constante quelle que soit la taille de l’arbre, image précédente intacte si échec."""
+    def __init__(self, chemin, cible, date, empreinte="sha1-4k"):
+        self.chemin = chemin
+        self.tmp = chemin + ".tmp"
+        self.etiquette = EMPREINTES[empreinte]
+        self.sha = hashlib.sha256()
+        self.f = open(self.tmp, "wb", buffering=KBI_TAMPON)
+        self.sep = b""
+        entete = [f"KERBEROS IMAGE — {date}", f"Cible : {cible}"]
+        if empreinte != "sha1-4k":
+            entete.append(f"Empreinte : {empreinte}")
+        for ligne in entete + ["-" * 60]:
+            self.note(ligne)
+
+    def dossier(self, rel):
+        self.note(f"D {rel}/")
+
+    def fichier(self, rel, taille, mtime_ns, empreinte):
+        self.note(f"F {rel} | {taille} octets | {self.etiquette}:{empreinte} | mtime:{mtime_ns}")
+
+    def note(self, texte):
+        donnees = self.sep + texte.encode("utf-8")
+        self.sep = b"\n"
+        self.sha.update(donnees)
+        self.f.write(donnees)
+
+    def fermer(self):
+        """Termine l’image ; retourne le SHA-256 complet (hex) du contenu écrit."""
+        self.f.close()
+        os.replace(self.tmp, self.chemin)
+        return self.sha.hexdigest()
+
+    def abandonner(self):
+        self.f.close()
+        try:
+            os.remove(self.tmp)
+        except OSError:
+            pass
+
+def ecrire_image_kbi(racine, sortie, etat=None, incremental=False, format_kbi=1, empreinte="sha1-4k",
+                     workers=HASH_WORKERS, ordonnanceur=None, exclusions=None, index=None):
+    """Écrit l’image .kbi de `racine` (format_kbi=1 texte, 2 binaire indexé) + son .sha256.
+    incremental=True : relit le .kbi existant à `sortie`, réutilise l’empreinte des fichiers
+    dont taille et mtime sont inchangés (aucune lecture de contenu) et ajoute une section DIFF.
+    empreinte : "sha1-4k" (4 premiers Ko) ou contenu complet "sha256" / "blake2b", haché
+    sur `workers` threads ; l’ordre de l’image reste celui du parcours.
+    Les lectures passent par l’OrdonnanceurES : fenêtres triées par inode, quota par disque.
+    exclusions : Exclusions — sous-arbres élagués, notés « # EXCLU » (absents du DIFF).
+    index : IndexScan qui reçoit chaque fichier et son empreinte (« mode:hex »).
+    Retourne (sortie, stats) — stats inclut octets hachés et temps de lecture/calcul."""
+    debut = time.perf_counter()
+    anciennes = _charger_precedente(sortie, racine, empreinte) if incremental and os.path.exists(sortie) else None
+    stats = {"recalcules": 0, "reutilises": 0, "octets": 0, "t_lecture": 0.0, "t_calcul": 0.0}
+    ajoutes, modifies = [], []
+    cible = os.path.abspath(racine)
+    date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    if format_kbi == 2:
+        image = EcrivainKbi2(sortie, cible, date, empreinte=empreinte)
+    else:
+        image = _SortieKbiTexte(sortie, cible, date, empreinte=empreinte)
+    ordonnanceur = ordonnanceur or OrdonnanceurES()
+    mesures = etat.mesures if etat else None
+    pool = futures.ThreadPoolExecutor(max_workers=workers) if empreinte != "sha1-4k" and workers > 1 else None
+    attente = deque()  # ("D", rel) | ("N", texte) | ("F", rel, taille, mtime_ns, [empreinte], avant)
+    a_hacher = []  # (entree, [None]) en attente de lancement
+    exclus = []  # préfixes des sous-arbres élagués : leurs anciennes entrées ne sont pas « supprimées »
+    if index is not None:
+        index.commencer([cible], "image")
+
+    def lancer():
+        # Fenêtre triée (périphérique, inode) : lectures quasi séquentielles sur le plateau
+        par_entree = dict((id(e), case) for e, case in a_hacher)
+        for e in ordonnanceur.ordonner([e for e, _ in a_hacher]):
+            if pool:
+                par_entree[id(e)][0] = pool.submit(ordonnanceur.lire, e, _hacher_ou_err, empreinte)
+            else:
+                par_entree[id(e)][0] = ordonnanceur.lire(e, _hacher_ou_err, empreinte)
+        a_hacher.clear()
+
+    def publier(item):
+        if item[0] == "D":
+            image.dossier(item[1])
+            return
+        if item[0] == "N":
+            image.note(item[1])
+            return
+        _, rel, size, mtime_ns, (h,), avant = item
+        if isinstance(h, futures.Future):
+            h = h.result()
+        if isinstance(h, tuple):
+            h, octets, t_lecture, t_calcul = h
+            stats["octets"] += octets
+            stats["t_lecture"] += t_lecture
+            stats["t_calcul"] += t_calcul
+            if mesures:
+                # Temps cumulés sur les threads de hachage (≠ temps mur si workers > 1)
+                mesures.ajouter("empreinte : lecture", t_lecture)
+                mesures.ajouter("empreinte : calcul", t_calcul, t_calcul)
+                mesures.compter("octets_lus", octets)
+                mesures.lent("fichiers", t_lecture + t_calcul, os.path.join(cible, rel))
+        if anciennes is not None:
+            if avant is None:
+                ajoutes.append(rel)
+            elif avant[0] != "F" or avant[1] != size or avant[3] != h:
+                modifies.append(rel)
+        image.fichier(rel, size, mtime_ns, h)
+        if index is not None:
+            index.fichier(os.path.join(cible, rel), size, mtime_ns, None if h == "err" else f"{empreinte}:{h}")
+
+    def vider(limite):
+        # Publie dans l’ordre tout ce qui est prêt ; bloque tant que plus de `limite` éléments attendent
+        while attente:
+            if attente[0][0] == "F":
+                case = attente[0][4]
+                if case[0] is None:
+                    if len(attente) <= limite:
+                        return
+                    lancer()
+                if isinstance(case[0], futures.Future) and not case[0].done() and len(attente) <= limite:
+                    return
+            if mesures:
+                depart = mesures.top_depart()
+                publier(attente.popleft())
+                mesures.fin("ecriture_image", depart)
+            else:
+                publier(attente.popleft())
+
+    try:
+        for genre, prof, rel, entree in parcourir(racine, max_prof=5, limit_per_dir=100, etat=etat,
+                                                  exclusions=exclusions):
+            if genre == "D":
+                attente.append(("D", rel))
+                if anciennes is not None and anciennes.pop(rel, None) is None:
+                    ajoutes.append(f"{rel}/")
+            elif genre == "F":
+                if mesures:
+                    depart = mesures.top_depart()
+                try:
+                    size = entree.taille
+                    mtime_ns = entree.mtime_ns
+                except OSError:
+                    compter_erreur("stat")
+                    continue
+                if mesures:
+                    mesures.fin("stat", depart)
+                avant = anciennes.pop(rel, None) if anciennes is not None else None
+                if avant and avant[0] == "F" and avant[1] == size and avant[2] == mtime_ns and avant[3] != "err":
+                    case = [avant[3]]
+                    stats["reutilises"] += 1
+                else:
+                    case = [None]
+                    a_hacher.append((entree, case))
+                    stats["recalcules"] += 1
+                    if len(a_hacher) >= ES_FENETRE:
+                        lancer()
+                attente.append(("F", rel, size, mtime_ns, case, avant))
+            elif genre == "LIMITE":
+                attente.append(("N", f"[...] (limite atteinte — profondeur {prof}/5)"))
+            elif genre == "EXCLU":
+                attente.append(("N", f"# EXCLU : {rel} ({entree})"))
+                if anciennes is not None:
+                    anciennes.pop(rel, None)
+                    exclus.append(rel + os.sep)
+            else:
+                attente.append(("N", f"# ACCÈS REFUSÉ : {rel}"))
+            vider(2 * ES_FENETRE)
+        lancer()
+        vider(0)
+
+        if anciennes is not None:
+            exclus = tuple(exclus)
+            supprimes = sorted(r + "/" if v[0] == "D" else r for r, v in anciennes.items()
+                               if not (exclus and r.startswith(exclus)))
+            stats["diff"] = (len(ajoutes), len(supprimes), len(modifies))
+            image.note("-" * 60)
+            image.note(f"# DIFF depuis l’image précédente : +{len(ajoutes)} ajouté(s) / "
+                       f"-{len(supprimes)} supprimé(s) / ~{len(modifies)} modifié(s)")
+            for r in ajoutes:
+                image.note(f"+ {r}")
+            for r in supprimes:
+                image.note(f"- {r}")
+            for r in modifies:
+                image.note(f"~ {r}")
+    except BaseException:
+        image.abandonner()
+        raise
+    finally:
+        if pool:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    sha256 = image.fermer()
+    with open(sortie + ".sha256", "w") as f:
+        f.write(f"{sha256} *{sortie}\n")
+    if index is not None:
+        index.terminer()
+    stats["duree"] = time.perf_counter() - debut
+    if mesures:
+        mesures.terminer(etat)
+    return sortie, stats
+
+# === IMAGE .KBI v2 (binaire indexé, blocs compressés) ===
+# Fichier : en-tête | blocs zlib | index des blocs | méta JSON | pied (offset index, offset méta, magic).
+# Entrées triées par composantes de chemin ("/" ↔ "\0") : un sous-arbre est une plage contiguë.
+# Bloc (colonnes) : nb | genres | chemins (préfixe commun + suffixe) | tailles | mtimes (delta zigzag) | empreintes.
+KBI2_MAGIC = b"KBI2\x00"
+KBI2_VERSION = 2
+KBI2_TAILLE_BLOC = 1024
+_KBI2_PIED = struct.Struct("<QQ5s")
+_KBI2_SANS_MTIME = 0x80
+
+EntreeKbi = namedtuple("EntreeKbi", "genre rel taille mtime_ns empreinte")
+
+def est_kbi2(chemin):
+    try:
+        with open(chemin, "rb") as f:
+            return f.read(len(KBI2_MAGIC)) == KBI2_MAGIC
+    except OSError:
+        return False
+
+def _cle_kbi(rel):
+    return rel.replace("/", "\0")
+
+def _varint(n, out):
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+def _lire_varint(buf, pos):
+    n = decalage = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7F) << decalage
+        if b < 0x80:
+            return n, pos
+        decalage += 7
+
+def _zigzag(n):
+    return (n << 1) if n >= 0 else ((-n << 1) - 1)
+
+def _dezigzag(n):
+    return (n >> 1) if not n & 1 else -((n + 1) >> 1)
+
+def _encoder_bloc(entrees):
+    out = bytearray()
+    _varint(len(entrees), out)
+    for e in entrees:
+        out.append((0 if e.genre == "D" else 1) | (_KBI2_SANS_MTIME if e.mtime_ns is None else 0))
+    precedent = b""
+    for e in entrees:
+        brut = e.rel.encode("utf-8")
+        commun = 0
+        limite = min(len(brut), len(precedent))
+        while commun < limite and brut[commun] == precedent[commun]:
+            commun += 1
+        _varint(commun, out)
+        _varint(len(brut) - commun, out)
+        out += brut[commun:]
+        precedent = brut
+    for e in entrees:
+        _varint(e.taille or 0, out)
+    precedent = 0
+    for e in entrees:
+        if e.mtime_ns is not None:
+            _varint(_zigzag(e.mtime_ns - precedent), out)
+            precedent = e.mtime_ns
+    for e in entrees:
+        h = e.empreinte
+        if not h:
+            out.append(0)
+            continue
+        try:
+            brut, genre_h = bytes.fromhex(h), 1
+        except ValueError:
+            brut, genre_h = h.encode("ascii", "replace"), 2
+        out.append(genre_h)
+        _varint(len(brut), out)
+        out += brut
+    return zlib.compress(bytes(out), 6)
+
+def _decoder_bloc(donnees):
+    buf = zlib.decompress(donnees)
+    n, pos = _lire_varint(buf, 0)
+    genres = buf[pos:pos + n]
+    pos += n
+    chemins = []
+    precedent = b""
+    for _ in range(n):
+        commun, pos = _lire_varint(buf, pos)
+        longueur, pos = _lire_varint(buf, pos)
+        precedent = precedent[:commun] + buf[pos:pos + longueur]
+        pos += longueur
+        chemins.append(precedent.decode("utf-8"))
+    tailles = []
+    for _ in range(n):
+        t, pos = _lire_varint(buf, pos)
+        tailles.append(t)
+    mtimes = []
+    precedent = 0
+    for g in genres:
+        if g & _KBI2_SANS_MTIME:
+            mtimes.append(None)
+            continue
+        d, pos = _lire_varint(buf, pos)
+        precedent += _dezigzag(d)
+        mtimes.append(precedent)
+    entrees = []
+    for i in range(n):
+        genre_h = buf[pos]
+        pos += 1
+        h = None
+        if genre_h:
+            longueur, pos = _lire_varint(buf, pos)
+            brut = bytes(buf[pos:pos + longueur])
+            pos += longueur
+            h = brut.hex() if genre_h == 1 else brut.decode("ascii")
+        d = genres[i] & 0x7F == 0
+        entrees.append(EntreeKbi("D" if d else "F", chemins[i], None if d else tailles[i], mtimes[i], h))
+    return entrees
+
+class EcrivainKbi2:
+    """Écriture en flux d’une image v2 : un bloc compressé est vidé sur disque toutes les
+    taille_bloc entrées ; les entrées doivent arriver dans l’ordre du parcours (trié)."""
+    def __init__(self, chemin, cible, date, taille_bloc=KBI2_TAILLE_BLOC, empreinte="sha1-4k"):
+        self.chemin = chemin
+        self.meta = {"format": KBI2_VERSION, "cible": cible, "date": date, "empreinte": empreinte,
+                     "notes": [], "entrees": 0}
+        self.taille_bloc = taille_bloc
+        self.bloc = []
+        self.index = []  # (premier chemin, offset, longueur, nb)
+        self.derniere_cle = None
+        self.sha = hashlib.sha256()
+        self.tmp = chemin + ".tmp"
+        self.f = open(self.tmp, "wb", buffering=KBI_TAMPON)
+        self._ecrire(KBI2_MAGIC + struct.pack("<H", KBI2_VERSION))
+
+    def _ecrire(self, donnees):
+        self.f.write(donnees)
+        self.sha.update(donnees)
+
+    def ajouter(self, genre, rel, taille=None, mtime_ns=None, empreinte=None):
+        rel = rel.replace(os.sep, "/")
+        cle = _cle_kbi(rel)
+        if self.derniere_cle is not None and cle <= self.derniere_cle:
+            raise ValueError(f"Entrée .kbi v2 hors ordre : {rel}")
+        self.derniere_cle = cle
+        self.bloc.append(EntreeKbi(genre, rel, taille, mtime_ns, empreinte))
+        self.meta["entrees"] += 1
+        if len(self.bloc) >= self.taille_bloc:
+            self._vider_bloc()
+
+    def dossier(self, rel):
+        self.ajouter("D", rel)
+
+    def fichier(self, rel, taille, mtime_ns, empreinte):
+        self.ajouter("F", rel, taille, mtime_ns, empreinte)
+
+    def note(self, texte):
+        self.meta["notes"].append(texte)
+
+    def _vider_bloc(self):
+        if not self.bloc:
+            return
+        donnees = _encoder_bloc(self.bloc)
+        self.index.append((self.bloc[0].rel, self.f.tell(), len(donnees), len(self.bloc)))
+        self._ecrire(donnees)
+        self.bloc = []
+
+    def fermer(self):
+        """Termine le fichier ; retourne le SHA-256 (hex) de tous les octets écrits."""
+        self._vider_bloc()
+        off_index = self.f.tell()
+        idx = bytearray()
+        _varint(len(self.index), idx)
+        for rel, off, longueur, n in self.index:
+            brut = rel.encode("utf-8")
+            _varint(len(brut), idx)
+            idx += brut
+            _varint(off, idx)
+            _varint(longueur, idx)
+            _varint(n, idx)
+        self._ecrire(bytes(idx))
+        off_meta = self.f.tell()
+        self._ecrire(json.dumps(self.meta, ensure_ascii=False).encode("utf-8"))
+        self._ecrire(_KBI2_PIED.pack(off_index, off_meta, KBI2_MAGIC))
+        self.f.close()
+        os.replace(self.tmp, self.chemin)
+        return self.sha.hexdigest()
+
+    def abandonner(self):
+        self.f.close()
+        try:
+            os.remove(self.tmp)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type:
+            self.abandonner()
+        else:
+            self.fermer()
+
+class LecteurKbi2:
+    """Lecture d’une image v2 : seuls l’index et la méta sont chargés à l’ouverture ;
+    chercher()/sous_arbre() ne décompressent que les blocs concernés (recherche O(log n))."""
+    def __init__(self, chemin):
+        self.f = open(chemin, "rb")
+        try:
+            if self.f.read(len(KBI2_MAGIC)) != KBI2_MAGIC:
+                raise ValueError(f"{chemin} n’est pas une image .kbi v2")
+            self.f.seek(-_KBI2_PIED.size, os.SEEK_END)
+            fin = self.f.tell()
+            off_index, off_meta, magic = _KBI2_PIED.unpack(self.f.read(_KBI2_PIED.size))
+            if magic != KBI2_MAGIC:
+                raise ValueError(f"{chemin} : image .kbi v2 tronquée")
+            self.f.seek(off_meta)
+            self.meta = json.loads(self.f.read(fin - off_meta).decode("utf-8"))
+            self.f.seek(off_index)
+            idx = self.f.read(off_meta - off_index)
+        except BaseException:
+            self.f.close()
+            raise
+        nb, pos = _lire_varint(idx, 0)
+        self.blocs = []
+        self._cles = []  # premier chemin de chaque bloc, en clé de tri
+        for _ in range(nb):
+            longueur, pos = _lire_varint(idx, pos)
+            rel = idx[pos:pos + longueur].decode("utf-8")
+            pos += longueur
+            off, pos = _lire_varint(idx, pos)
+            taille, pos = _lire_varint(idx, pos)
+            n, pos = _lire_varint(idx, pos)
+            self.blocs.append((off, taille, n))
+            self._cles.append(_cle_kbi(rel))
+        self._memo = (None, None, None)
+
+    def __len__(self):
+        return self.meta.get("entrees", 0)
+
+    def _bloc(self, i):
+        if self._memo[0] != i:
+            off, taille, _ = self.blocs[i]
+            self.f.seek(off)
+            entrees = _decoder_bloc(self.f.read(taille))
+            self._memo = (i, entrees, [_cle_kbi(e.rel) for e in entrees])
+        return self._memo[1], self._memo[2]
+
+    def __iter__(self):
+        for i in range(len(self.blocs)):
+            yield from self._bloc(i)[0]
+
+    def chercher(self, rel):
+        cle = _cle_kbi(rel.replace(os.sep, "/").strip("/"))
+        i = bisect.bisect_right(self._cles, cle) - 1
+        if i < 0:
+            return None
+        entrees, cles = self._bloc(i)
+        j = bisect.bisect_left(cles, cle)
+        return entrees[j] if j < len(cles) and cles[j] == cle else None
+
+    def sous_arbre(self, rel=""):
+        """Entrées de `rel` et de tout ce qu’il contient, dans l’ordre, bloc par bloc."""
+        rel = rel.replace(os.sep, "/").strip("/")
+        cle = _cle_kbi(rel)
+        prefixe = cle + "\0" if rel else ""
+        i = max(bisect.bisect_right(self._cles, cle) - 1, 0)
+        while i < len(self.blocs):
+            entrees, cles = self._bloc(i)
+            for j in range(bisect.bisect_left(cles, cle), len(cles)):
+                if cles[j] != cle and not cles[j].startswith(prefixe):
+                    return
+                yield entrees[j]
+            i += 1
+
+    def fermer(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+def convertir_kbi_v1_vers_v2(source, dest=None):
+    """Convertit une image texte v1 en v2 (+ .sha256). Retourne le chemin de l’image v2."""
+    if dest is None:
+        dest = os.path.splitext(source)[0] + ".v2.kbi"
+    cible, date, mode, notes, entrees = None, "", "sha1-4k", [], []
+    with open(source, "r", encoding="utf-8") as f:
+        for ligne in f:
+            ligne = ligne.rstrip("\n")
+            e = _analyser_ligne_kbi(ligne)
+            if e:
+                entrees.append(e)
+            elif cible is None and ligne.startswith("Cible : "):
+                cible = ligne[8:]
+            elif ligne.startswith("Empreinte : "):
+                mode = ligne[12:]
+            elif not date and ligne.startswith("KERBEROS IMAGE — "):
+                date = ligne[len("KERBEROS IMAGE — "):]
+            elif ligne and ligne != "-" * 60:
+                notes.append(ligne)
+    # Images v1 produites sous Windows : séparateur "\" → "/" avant tri par composantes
+    entrees.sort(key=lambda e: _cle_kbi(e[1].replace("\\", "/")))
+    image = EcrivainKbi2(dest, cible, date, empreinte=mode)
+    try:
+        for genre, rel, taille, mtime_ns, empreinte in entrees:
+            image.ajouter(genre, rel.replace("\\", "/"), taille, mtime_ns, empreinte)
+        for n in notes:
+            image.note(n)
+    except BaseException:
+        image.abandonner()
+        raise
+    sha256 = image.fermer()
+    with open(dest + ".sha256", "w") as f:
+        f.write(f"{sha256} *{dest}\n")
+    return dest
+
+def verifier_image_kbi(chemin):
+    """Contrôle une image .kbi (v1 ou v2) contre son .sha256 → (ok, attendu, calculé).
+    OSError si l’image ou le .sha256 est absent."""
+    with open(chemin + ".sha256", "r", encoding="utf-8") as f:
+        attendu = f.read().split(maxsplit=1)[0].lstrip("\\").lower()
+    calcule = hacher_fichier(chemin, "sha256")[0]
+    return calcule == attendu, attendu, calcule
+
+# === DOUBLONS (taille → SHA1 4 Ko → empreinte complète) ===
+# Chaque étape ne retient que les fichiers encore en collision : seuls les fichiers de même
+# taille ET de même début sont lus en entier. Une image .kbi de la cible fournit gratuitement
+# les empreintes des fichiers inchangés (taille + mtime), comme pour l’image incrémentale.
+def _empreintes_image(chemin, racine):
+    """{rel: (taille, mtime_ns, empreinte)} et mode d’une image .kbi de `racine` ; ({}, None) sinon."""
+    try:
+        cible, entrees, mode = lire_image_kbi(chemin)
+    except (OSError, ValueError, UnicodeDecodeError):
+        compter_erreur("image_doublons")
+        return {}, None
+    if cible != os.path.abspath(racine):
+        return {}, None
+    return {rel: v[1:] for rel, v in entrees.items() if v[0] == "F" and v[3] != "err"}, mode
+
+def _hacher_candidats(candidats, ordonnanceur, pool, etat, stats):
+    """[(entree, mode)] → {chemin: empreinte} ; lectures triées par (périphérique, inode)."""
+    modes = {e.chemin: mode for e, mode in candidats}
+    resultats = {}
+    for e in ordonnanceur.ordonner([e for e, _ in candidats]):
+        if pool:
+            resultats[e.chemin] = pool.submit(ordonnanceur.lire, e, _hacher_ou_err, modes[e.chemin])
+        else:
+            if etat:
+                etat.verifier()
+            resultats[e.chemin] = ordonnanceur.lire(e, _hacher_ou_err, modes[e.chemin])
+    for chemin, h in resultats.items():
+        if pool:
+            if etat:
+                etat.verifier()
+            h = h.result()
+        resultats[chemin], octets = h[0], h[1]
+        stats["octets_lus"] += octets
+        if etat:
+            etat.mesures.compter("octets_lus", octets)
+    return resultats
+
+def trouver_doublons(racine, etat=None, image=None, mode="sha256", taille_min=1, max_prof=MAX_DEPTH_FULL,
+                     limit_per_dir=MAX_ITEMS_PER_DIR, workers=HASH_WORKERS, ordonnanceur=None, exclusions=None):
+    """Fichiers identiques sous `racine` → (groupes, stats), en trois étapes :
+    1. regroupement par taille (parcours seul, aucune lecture de contenu) ;
+    2. SHA1 des 4 premiers Ko des seuls fichiers de même taille (≤ 4 Ko : empreinte `mode` directe) ;
+    3. empreinte complète `mode` (sha256 / blake2b, lecture par blocs) des collisions restantes.
+    image : .kbi de la même cible dont les empreintes des fichiers inchangés sont reprises.
+    exclusions : Exclusions — sous-arbres élagués, jamais listés.
+    groupes : [(taille, empreinte, [chemins])], du plus grand volume récupérable au plus petit."""
+    debut = time.perf_counter()
+    ordonnanceur = ordonnanceur or OrdonnanceurES()
+    mesures = etat.mesures if etat else None
+    connues, mode_image = _empreintes_image(image, racine) if image else ({}, None)
+    stats = {"fichiers": 0, "octets": 0, "meme_taille": 0, "meme_debut": 0, "hachages_complets": 0,
+             "reutilises": 0, "octets_lus": 0}
+
+    if mesures:
+        depart = mesures.top_depart()
+    par_taille = {}
+    for genre, prof, rel, entree in parcourir(racine, max_prof=max_prof, limit_per_dir=limit_per_dir, etat=etat,
+                                              exclusions=exclusions):
+        if genre != "F":
+            continue
+        try:
+            taille = entree.taille
+        except OSError:
+            compter_erreur("stat")
+            continue
+        stats["fichiers"] += 1
+        stats["octets"] += taille
+        if taille >= taille_min:
+            par_taille.setdefault(taille, []).append((rel, entree))
+    candidats = [f for groupe in par_taille.values() if len(groupe) > 1 for f in groupe]
+    del par_taille
+    stats["meme_taille"] = len(candidats)
+    if mesures:
+        mesures.fin("doublons : tailles", depart)
+
+    def repris(rel, entree, mode_voulu):
+        # Empreinte de l’image si le fichier n’a pas changé depuis, et dans le mode voulu
+        avant = connues.get(rel)
+        if avant is None or mode_image != mode_voulu:
+            return None
+        try:
+            inchange = avant[0] == entree.taille and avant[1] == entree.mtime_ns
+        except OSError:
+            compter_erreur("stat")
+            return None
+        if inchange:
+            stats["reutilises"] += 1
+            return avant[2]
+        return None
+
+    pool = None
+    if workers > 1:
+        _charger_differes()
+        pool = futures.ThreadPoolExecutor(max_workers=workers)
+    try:
+        # Étape 2 : clé (taille, empreinte, complète ?) — sha1-4k n’est qu’un début de fichier
+        if mesures:
+            depart = mesures.top_depart()
+        # Une taille dont un fichier a déjà son empreinte complète est hachée en entier :
+        # toutes les clés d’une même taille restent ainsi comparables
+        complets = {e.chemin: repris(rel, e, mode) for rel, e in candidats}
+        tailles_completes = {e.taille for rel, e in candidats if complets[e.chemin]}
+        cles, a_lire = {}, []
+        for rel, e in candidats:
+            h = complets[e.chemin]
+            complet = e.taille <= 4096 or e.taille in tailles_completes
+            if h is None and not complet:
+                h = repris(rel, e, "sha1-4k")
+            if h is None:
+                a_lire.append((e, mode if complet else "sha1-4k"))
+            cles[e.chemin] = (e, complet, h)
+        del complets
+        lus = _hacher_candidats(a_lire, ordonnanceur, pool, etat, stats)
+        par_debut = {}
+        for chemin, (e, complet, h) in cles.items():
+            h = h or lus[chemin]
+            if h != "err":
+                par_debut.setdefault((e.taille, h, complet), []).append(e)
+        del cles, lus
+        if mesures:
+            mesures.fin("doublons : débuts (4 Ko)", depart)
+
+        # Étape 3 : contenu complet des seuls fichiers dont taille et début coïncident
+        if mesures:
+            depart = mesures.top_depart()
+        identiques = {}
+        a_lire = []
+        for (taille, h, complet), groupe in par_debut.items():
+            if len(groupe) < 2:
+                continue
+            if complet:
+                identiques[(taille, h)] = [e.chemin for e in groupe]
+                continue
+            stats["meme_debut"] += len(groupe)
+            a_lire.extend((e, mode) for e in groupe)
+        stats["hachages_complets"] = len(a_lire)
+        tailles = {e.chemin: e.taille for e, _ in a_lire}
+        for chemin, h in _hacher_candidats(a_lire, ordonnanceur, pool, etat, stats).items():
+            if h != "err":
+                identiques.setdefault((tailles[chemin], h), []).append(chemin)
+        if mesures:
+            mesures.fin("doublons : contenu complet", depart)
+    finally:
+        if pool:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    groupes = sorted(((t, h, sorted(chemins)) for (t, h), chemins in identiques.items() if len(chemins) > 1),
+                     key=lambda g: (-g[0] * (len(g[2]) - 1), g[2][0]))
+    stats["groupes"] = len(groupes)
+    stats["copies"] = sum(len(g[2]) - 1 for g in groupes)
+    stats["recuperables"] = sum(g[0] * (len(g[2]) - 1) for g in groupes)
+    stats["mode"] = mode
+    stats["duree"] = time.perf_counter() - debut
+    if mesures:
+        mesures.terminer(etat)
+    return groupes, stats
+
+def resume_doublons(groupes, stats, max_groupes=50):
+    """Lignes de rapport d’un trouver_doublons() : entonnoir des étapes puis groupes."""
+    part = stats["octets_lus"] / stats["octets"] if stats["octets"] else 0.0
+    lignes = ["-" * 60,
+              f"👯 DOUBLONS — {stats['groupes']} groupe(s), {stats['copies']} copie(s) en trop "
+              f"→ {taille_lisible(stats['recuperables'])} récupérable(s)",
+              f"   {stats['fichiers']} fichier(s) ({taille_lisible(stats['octets'])}) → {stats['meme_taille']} de même "
+              f"taille → {stats['meme_debut']} de même début (4 Ko) → {stats['hachages_complets']} haché(s) en entier",
+              f"   Lu : {taille_lisible(stats['octets_lus'])} ({part:.2%} du total) en {stats['duree']:.1f} s ; "
+              f"{stats['reutilises']} empreinte(s) reprise(s) de l’image"]
+    for i, (taille, h, chemins) in enumerate(groupes[:max_groupes], 1):
+        lignes.append(f"  [{i}] {len(chemins)} × {taille_lisible(taille)} ({stats['mode']}:{h[:12]}) "
+                      f"→ {taille_lisible(taille * (len(chemins) - 1))} récupérable(s)")
+        lignes.extend(f"      {c}" for c in chemins)
+    if len(groupes) > max_groupes:
+        lignes.append(f"  … {len(groupes) - max_groupes} autre(s) groupe(s)")
+    return lignes
+
+# === POINTS DE REPRISE (rapports longs) ===
+def signature_rapport(cibles, prof, analyze_py=True, ignore_recycle=True, max_risques=1, exclusions=None):
+    """Ce qui doit être identique pour reprendre un rapport : un point pris avec d’autres options
+    donnerait un rapport mêlé. Le nombre de processus d’analyse n’en fait pas partie (sortie identique)."""
+    return {"cibles": [os.path.abspath(c) for c in cibles], "prof": prof, "analyze_py": analyze_py,
+            "ignore_recycle": ignore_recycle, "max_risques": max_risques,
+            "exclusions": exclusions.texte if exclusions else None, "analyseur": ANALYSEUR_VERSION}
+
+class PointsReprise:
+    """Points de reprise d’un rapport écrit dans `fichier` au fil du scan. Toutes les `intervalle` s,
+    le rapport est vidé sur disque (fsync) et sa longueur notée, avec l’état du parcours : cadres
+    ouverts et leurs éléments restants, lignes en attente de leur taille, top consommateurs,
+    compteurs ; cache d’analyse et index sont vidés au même moment. Écriture atomique (.tmp, fsync,
+    os.replace) : un point est complet ou absent. Pour reprendre : charger(), tronquer le rapport à
+    donnees["rapport_octets"], puis produire_rapport(reprise=…) continue là où le point a été pris."""
+    def __init__(self, chemin, signature, intervalle=REPRISE_INTERVALLE):
+        self.chemin = chemin
+        self.signature = signature
+        self.intervalle = intervalle
+        self.fichier = None  # rapport en cours d’écriture (sans lui, aucun point n’est pris)
+        self.cache = self.index = None
+        self.cible = 0  # rang de la cible en cours dans la signature
+        self.donnees = None  # point chargé, pas encore repris
+        self.ecrits = 0
+        self._dernier = time.perf_counter()
+
+    def charger(self):
+        """Point enregistré pour cette même signature → dict, sinon None (absent, illisible, autres options)."""
+        try:
+            with open(self.chemin, "r", encoding="utf-8") as f:
+                donnees = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if donnees.get("signature") != self.signature:
+            return None
+        self.donnees = donnees
+        return donnees
+
+    def due(self):
+        return self.fichier is not None and time.perf_counter() - self._dernier >= self.intervalle
+
+    def reprendre(self, rang):
+        """État à restaurer pour la cible `rang` (une seule fois), ou None."""
+        if self.donnees is None or self.donnees["cible"] != rang:
+            return None
+        donnees, self.donnees = self.donnees, None
+        return donnees
+
+    def enregistrer(self, arbre, etat=None, consommateurs=None):
+        depart = time.perf_counter()
+        for base in (self.cache, self.index):
+            if base is not None:
+                base.vider()
+        self.fichier.flush()
+        os.fsync(self.fichier.fileno())
+        donnees = {"signature": self.signature, "date": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                   "cible": self.cible, "rapport_octets": self.fichier.tell(), "arbre": arbre,
+                   "consommateurs": consommateurs.vers_dict() if consommateurs is not None else None,
+                   "etat": {"dossiers": etat.dossiers, "fichiers": etat.fichiers,
+                            "compteurs": etat.mesures.compteurs_courants(), "elagues": etat.mesures.elagues}
+                   if etat else None}
+        tmp = self.chemin + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(donnees, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.chemin)
+        self.ecrits += 1
+        if etat:
+            etat.mesures.ajouter("point_reprise", time.perf_counter() - depart)
+        self._dernier = time.perf_counter()
+
+    def restaurer_etat(self, etat):
+        """Compteurs de progression et de mesures du point chargé, reportés dans `etat`."""
+        sauve = self.donnees and self.donnees.get("etat")
+        if etat and sauve:
+            etat.dossiers, etat.fichiers = sauve["dossiers"], sauve["fichiers"]
+            etat.mesures.reprendre(sauve["compteurs"], sauve["elagues"])
+
+    def effacer(self):
+        for chemin in (self.chemin, self.chemin + ".tmp"):
+            try:
+                os.remove(chemin)
+            except OSError:
+                pass
+
+def tronquer_rapport(chemin, octets):
+    """Rapport partiel ramené à la longueur notée dans le point de reprise (lignes écrites après perdues)."""
+    with open(chemin, "r+b") as f:
+        f.truncate(octets)
+
+# === RAPPORT ===
+class _SectionParallele:
+    """Lignes d’une cible scannée par un worker. Tant que la section n’est pas en tête du rapport,
+    elles sont mises de côté (fichier temporaire au-delà de RAPPORT_TAMPON_SECTION) ;
+    ensuite, transmettre() les relit puis relaie les suivantes au fil du parcours."""
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.direct = deque()
+        self.en_tete = False
+        self.reserve = None
+        self.fini = False
+        self.erreur = None
+
+    def __call__(self, ligne):
+        with self.cond:
+            if self.en_tete:
+                self.direct.append(ligne)
+                self.cond.notify()
+                return
+            if self.reserve is None:
+                import tempfile
+                self.reserve = tempfile.SpooledTemporaryFile(max_size=RAPPORT_TAMPON_SECTION, mode="w+",
+                                                             encoding="utf-8", newline="")
+            self.reserve.write(ligne + "\0")  # une ligne peut contenir « \n », jamais NUL
+
+    def terminer(self, erreur=None):
+        with self.cond:
+            self.fini = True
+            self.erreur = erreur
+            self.cond.notify()
+
+    def transmettre(self, sortie):
+        """Émet la section entière vers sortie, dans l’ordre ; relance l’erreur du worker."""
+        with self.cond:
+            self.en_tete = True
+            reserve, self.reserve = self.reserve, None
+        if reserve:
+            reserve.seek(0)
+            reste = ""
+            for bloc in iter(lambda: reserve.read(1 << 16), ""):
+                *lignes, reste = (reste + bloc).split("\0")
+                for ligne in lignes:
+                    sortie(ligne)
+            reserve.close()
+        while True:
+            with self.cond:
+                while not self.direct and not self.fini:
+                    self.cond.wait()
+                lignes, fini = list(self.direct), self.fini
+                self.direct.clear()
+            for ligne in lignes:
+                sortie(ligne)
+            if fini:
+                break
+        if self.erreur is not None:
+            raise self.erreur
+
+def _section_cible(cible, sortie, etat, prof, options, reprise=None, rang=0):
+    point = reprise.reprendre(rang) if reprise else None
+    consommateurs = Consommateurs()
+    if point is None:
+        sortie(f"\n{'='*60}\nCIBLE : {cible}\n{'='*60}")
+        if os.path.exists(cible) and len(cible) == 3 and cible[1:] == ":\\":
+            sortie(f"📊 Espace : {espace_disque_win(cible)}")
+        else:
+            sortie("📊 Espace : N/A")
+        sortie("\nArborescence :")
+    elif point["consommateurs"]:
+        consommateurs.restaurer(point["consommateurs"])  # en-tête et début d’arbre déjà dans le rapport
+    total = []
+    options = dict(options)
+    budget = options.pop("budget", None)
+    if budget:
+        # Un budget neuf par cible : il se décompte dans le worker du disque de la cible
+        options.pop("workers", None)
+        arbre_budgete(cible, budget.copie(), sortie, etat=etat, consommateurs=consommateurs, total=total, **options)
+    else:
+        if reprise:
+            reprise.cible = rang
+        arbre_securise(cible, max_prof=prof, limit_per_dir=MAX_ITEMS_PER_DIR, sortie=sortie, etat=etat,
+                       consommateurs=consommateurs, total=total, reprise=reprise,
+                       depuis=point["arbre"] if point else None, **options)
+    sortie("")
+    for ligne in consommateurs.section(total):
+        sortie(ligne)
+    sortie("")
+
+def _sections_paralleles(cibles, groupes, sortie, etat, prof, options):
+    """Un worker (thread) par disque physique, qui scanne ses cibles en série ;
+    les sections sont réémises dans l’ordre de `cibles` (celle en tête en direct)."""
+    parent = etat or EtatScan()
+    verrou = threading.Lock()  # sortie et rapporter ne sont jamais appelés en même temps
+
+    def emettre(ligne):
+        with verrou:
+            sortie(ligne)
+
+    if options.get("rapporter"):
+        rapporter = options["rapporter"]
+
+        def rapporter_exclusif(entree, resultat):
+            with verrou:
+                rapporter(entree, resultat)
+
+        options = dict(options, rapporter=rapporter_exclusif)
+    sections = {cible: _SectionParallele() for cible in cibles}
+
+    def worker(groupe, sous_etat):
+        erreur = None
+        for cible in groupe:
+            if erreur is None:
+                try:
+                    _section_cible(cible, sections[cible], sous_etat, prof, options)
+                except BaseException as e:
+                    erreur = e
+            sections[cible].terminer(erreur)
+
+    _charger_differes()
+    threads = [threading.Thread(target=worker, args=(groupe, parent.sous_etat()), daemon=True,
+                                name=f"kerberos-disque-{i}") for i, groupe in enumerate(groupes)]
+    for t in threads:
+        t.start()
+    try:
+        for cible in cibles:
+            sections[cible].transmettre(emettre)
+    except BaseException:
+        parent.annulation.set()  # les autres disques s’arrêtent au prochain dossier
+        raise
+    finally:
+        for t in threads:
+            t.join()
+        parent.fusionner()
+
+def produire_rapport(cibles, sortie, etat=None, prof=MAX_DEPTH, ignore_recycle=True, analyze_py=True,
+                     workers=1, max_risques=1, cache=None, ordonnanceur=None, rapporter=None, par_disque=True,
+                     exclusions=None, index=None, budget=None, reprise=None):
+    """Rapport complet (en-tête, une section par cible, pied) émis ligne par ligne vers sortie.
+    Partagé par l’interface (generer_rapport) et la ligne de commande (scan).
+    par_disque : les cibles de disques physiques différents sont scannées en parallèle
+    (un worker par disque, jamais deux sur le même) ; le rapport reste dans l’ordre de `cibles`.
+    exclusions : Exclusions appliquées à chaque cible (sous-arbres élagués avant listage).
+    index : IndexScan où le scan est enregistré (entrées, tailles, constats .py).
+    budget : Budget (par cible) → parcours par priorités (arbre_budgete) au lieu de `prof`
+    et MAX_ITEMS_PER_DIR ; analyse .py en série.
+    reprise : PointsReprise — points de reprise pendant le parcours (cibles alors scannées en série ;
+    un parcours budgété n’en prend pas). Avec un point chargé (charger()), le rapport — déjà tronqué
+    par l’appelant — continue à partir de ce point : en-tête et cibles terminées ne sont pas réémis."""
+    ordonnanceur = ordonnanceur or OrdonnanceurES()
+    if index:
+        index.commencer(cibles, "rapport" if analyze_py else "full")
+    point = None
+    if reprise:
+        reprise.cache, reprise.index = cache, index
+        point = reprise.donnees
+        reprise.restaurer_etat(etat)
+    if point is None:
+        sortie("=" * 60)
+        sortie("RAPPORT KERBEROS – ANALYSE DE DISQUES v2.4+deep")
+        sortie("=" * 60)
+        sortie(f"Date : {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        sortie(f"Système : {platform.system()} {platform.release()}")
+        if budget:
+            sortie(f"Parcours : budgété ({budget.limites()} par cible), sans limite de profondeur")
+        else:
+            sortie(f"Profondeur : {prof} (max)")
+        sortie("Corbeille exclue : " + ("Oui" if ignore_recycle else "Non"))
+        sortie("Exclusions : " + (exclusions.resume() if exclusions else "aucune"))
+        sortie("Licence : GNU GPLv3 – https://www.gnu.org/licenses/gpl-3.0.html")
+        sortie("Code : https://github.com/victorpozen/kerberos")
+        sortie("=" * 60)
+        sortie("")
+
+    options = dict(ignore_recycle=ignore_recycle, analyze_py=analyze_py, workers=workers, max_risques=max_risques,
+                   cache=cache, ordonnanceur=ordonnanceur, rapporter=rapporter, exclusions=exclusions, index=index,
+                   budget=budget)
+    groupes = {}
+    if par_disque and not reprise:
+        for cible in cibles:
+            groupes.setdefault(disque_physique(cible), []).append(cible)
+    if len(groupes) > 1:
+        _sections_paralleles(cibles, list(groupes.values()), sortie, etat, prof, options)
+    else:
+        for rang, cible in enumerate(cibles):
+            if point and rang < point["cible"]:
+                continue  # section déjà complète dans le rapport repris
+            _section_cible(cible, sortie, etat, prof, options, reprise, rang)
+
+    if cache:
+        sortie(cache.resume())
+    if index:
+        index.terminer()
+        sortie(index.resume())
+    if point:
+        sortie(f"♻️ Rapport repris au point du {point['date']}")
+    if etat:
+        if cache:
+            etat.mesures.compteurs.update(cache_hits=cache.hits, cache_miss=cache.miss)
+        etat.mesures.terminer(etat)
+        for ligne in etat.mesures.resume():
+            sortie(ligne)
+    sortie("✅ Rapport généré – Projet Kerberos (GPLv3)")
+
+# === INDEX DES SCANS (SQLite) ===
+# Chemins absolus comparés en binaire : « tout ce qui est sous P » = plage [P/, P/\U0010ffff[
+# sur une clé d’index, sans LIKE ni parcours de table.
+_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (id INTEGER PRIMARY KEY, date TEXT NOT NULL, cibles TEXT NOT NULL,
+                                  mode TEXT NOT NULL, fin TEXT);
+CREATE TABLE IF NOT EXISTS entrees (chemin TEXT PRIMARY KEY, parent TEXT NOT NULL, nom TEXT NOT NULL,
+                                    ext TEXT NOT NULL, genre TEXT NOT NULL, taille INTEGER, fichiers INTEGER,
+                                    mtime_ns INTEGER, empreinte TEXT, statut TEXT, scan INTEGER NOT NULL) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entrees_parent ON entrees(parent);
+CREATE INDEX IF NOT EXISTS entrees_ext ON entrees(ext, chemin);
+CREATE INDEX IF NOT EXISTS entrees_taille ON entrees(taille);
+CREATE TABLE IF NOT EXISTS regles (id INTEGER PRIMARY KEY, message TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS constats (regle INTEGER NOT NULL, chemin TEXT NOT NULL, ligne INTEGER NOT NULL,
+                                     PRIMARY KEY (regle, chemin, ligne)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS constats_chemin ON constats(chemin);
+CREATE TABLE IF NOT EXISTS imports (module TEXT NOT NULL, chemin TEXT NOT NULL,
+                                    PRIMARY KEY (module, chemin)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS imports_chemin ON imports(chemin);
+-- Fichier modifié ou disparu : ses constats ne valent plus
+CREATE TRIGGER IF NOT EXISTS entrees_modifiee AFTER UPDATE OF taille, mtime_ns ON entrees
+WHEN old.genre = 'F' AND (old.taille IS NOT new.taille OR old.mtime_ns IS NOT new.mtime_ns) BEGIN
+    DELETE FROM constats WHERE chemin = old.chemin;
+    DELETE FROM imports WHERE chemin = old.chemin;
+END;
+CREATE TRIGGER IF NOT EXISTS entrees_supprimee AFTER DELETE ON entrees WHEN old.genre = 'F' BEGIN
+    DELETE FROM constats WHERE chemin = old.chemin;
+    DELETE FROM imports WHERE chemin = old.chemin;
+END;
+"""
+
+_INDEX_UPSERT = """
+INSERT INTO entrees (chemin, parent, nom, ext, genre, taille, mtime_ns, empreinte, scan) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(chemin) DO UPDATE SET
+    parent = excluded.parent, genre = excluded.genre, scan = excluded.scan,
+    empreinte = CASE WHEN excluded.empreinte IS NOT NULL THEN excluded.empreinte
+                     WHEN entrees.taille IS excluded.taille AND entrees.mtime_ns IS excluded.mtime_ns
+                     THEN entrees.empreinte END,
+    statut = CASE WHEN entrees.taille IS excluded.taille AND entrees.mtime_ns IS excluded.mtime_ns
+                  THEN entrees.statut END,
+    taille = CASE WHEN excluded.genre = 'D' THEN entrees.taille ELSE excluded.taille END,
+    fichiers = CASE WHEN excluded.genre = 'D' THEN entrees.fichiers END,
+    mtime_ns = excluded.mtime_ns
+"""
+
+def _plage(prefixe):
+    """Bornes [début, fin[ des chemins situés sous `prefixe` (dossier)."""
+    debut = os.path.join(os.path.abspath(prefixe), "")
+    return debut, debut + "\U0010ffff"
+
+class IndexScan:
+    """Index persistant des scans : entrées (chemin, parent, taille, mtime, extension, empreinte)
+    et constats des .py (règle + ligne, imports), interrogeable par chercher().
+    Écritures mises en attente puis appliquées par lots de INDEX_LOT dans une transaction ;
+    un dossier relu remplace ses anciennes entrées (fichiers supprimés retirés, sous-arbres compris).
+    Partagé par les workers d’un rapport multi-disques : chaque accès à la base passe par un verrou."""
+    def __init__(self, chemin_db=INDEX_FICHIER, lot=INDEX_LOT):
+        self.chemin_db = chemin_db
+        self.lot = lot
+        self.scan = None
+        self._entrees, self._purges, self._analyses, self._cumuls = [], [], [], []
+        self._archives = []
+        self._regles = {}
+        self._verrou = threading.RLock()
+        self.db = sqlite3.connect(chemin_db, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        with self.db:
+            self.db.executescript(_INDEX_SCHEMA)
+        self._regles = dict(self.db.execute("SELECT message, id FROM regles"))
+
+    # --- Écriture ---
+    def commencer(self, cibles, mode):
+        with self._verrou, self.db:
+            cibles = json.dumps([os.path.abspath(c) for c in cibles])
+            self.scan = self.db.execute("INSERT INTO scans (date, cibles, mode) VALUES (?, ?, ?)",
+                                        (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), cibles, mode)).lastrowid
+
+    def _attendre(self, liste, element):
+        with self._verrou:
+            liste.append(element)
+            if len(self._entrees) + len(self._analyses) >= self.lot:
+                self.vider()
+
+    def dossier(self, chemin, elements):
+        """Listage complet d’un dossier (toutes ses EntreeFS) : remplace ce que l’index en savait."""
+        parent = os.path.abspath(chemin)
+        lignes = []
+        for e in elements:
+            if e.est_dossier:
+                lignes.append((os.path.join(parent, e.nom), parent, e.nom, "", "D", None, None, None, self.scan))
+            elif e.est_fichier:
+                try:
+                    taille, mtime_ns = e.taille, e.mtime_ns
+                except OSError:
+                    continue  # déjà compté par le parcours
+                lignes.append((os.path.join(parent, e.nom), parent, e.nom, e.ext, "F", taille, mtime_ns, None, self.scan))
+        with self._verrou:
+            self._entrees.extend(lignes)
+            self._purges.append(parent)
+            if len(self._entrees) + len(self._analyses) >= self.lot:
+                self.vider()
+
+    def fichier(self, chemin, taille, mtime_ns, empreinte=None):
+        chemin = os.path.abspath(chemin)
+        parent, nom = os.path.split(chemin)
+        self._attendre(self._entrees, (chemin, parent, nom, os.path.splitext(nom)[1].lower(), "F", taille, mtime_ns,
+                                       empreinte, self.scan))
+
+    def cumul(self, chemin, octets, fichiers):
+        """Taille cumulée d’un dossier, connue à sa fermeture dans l’arbre."""
+        self._attendre(self._cumuls, (octets, fichiers, os.path.abspath(chemin)))
+
+    def analyse(self, chemin, resultat):
+        self._attendre(self._analyses, (os.path.abspath(chemin), resultat))
+
+    def archive(self, chemin):
+        """Archive relue : ses membres que ce scan n’a pas indexés sont retirés."""
+        with self._verrou:
+            self._archives.append(os.path.abspath(chemin))
 
-# === UTILITAIRES DISQUE ===
-def lister_lecteurs_windows():
-    if platform.system() != "Windows":
-        return ["C:\\"]
-    try:
-        import string
-        return [f"{c}:\\" for c in string.ascii_uppercase if os.path.exists(f"{c}:\\")] or ["C:\\"]
-    except:
-        return ["C:\\"]
+    def rapporteur(self, suivant=None):
+        """Enveloppe un rappel `rapporter` d’arbre_securise : chaque analyse .py est indexée
+        (un .py d’archive devient une entrée archive/nom, sans date)."""
+        def rapporter(entree, resultat):
+            if isinstance(entree, MembreArchive):
+                self.fichier(entree.chemin, entree.taille, None)
+            self.analyse(entree.chemin, resultat)
+            if suivant:
+                suivant(entree, resultat)
+        return rapporter
 
-def espace_disque_win(lecteur):
-    if platform.system() != "Windows":
-        return "N/A"
+    def _regle(self, message):
+        id_ = self._regles.get(message)
+        if id_ is None:
+            self.db.execute("INSERT OR IGNORE INTO regles (message) VALUES (?)", (message,))
+            id_ = self._regles[message] = self.db.execute("SELECT id FROM regles WHERE message = ?",
+                                                          (message,)).fetchone()[0]
+        return id_
+
+    def vider(self):
+        # Ordre : entrées, puis purge des dossiers relus (les entrées à jour portent ce scan), puis analyses
+        with self._verrou, self.db:
+            if self._entrees:
+                self.db.executemany(_INDEX_UPSERT, self._entrees)
+            for parent in self._purges:
+                perimes = self.db.execute("SELECT chemin, genre FROM entrees WHERE parent = ? AND scan IS NOT ?",
+                                          (parent, self.scan)).fetchall()
+                for chemin, genre in perimes:
+                    if genre == "D" or os.path.splitext(chemin)[1].lower() in EXT_ARCHIVES:
+                        self.db.execute("DELETE FROM entrees WHERE chemin >= ? AND chemin < ?", _plage(chemin))
+                self.db.executemany("DELETE FROM entrees WHERE chemin = ?", [(c,) for c, _ in perimes])
+            for archive in self._archives:
+                self.db.execute("DELETE FROM entrees WHERE chemin >= ? AND chemin < ? AND scan IS NOT ?",
+                                (*_plage(archive), self.scan))
+            if self._cumuls:
+                self.db.executemany("UPDATE entrees SET taille = ?, fichiers = ? WHERE chemin = ?", self._cumuls)
+            if self._analyses:
+                chemins = [(c,) for c, _ in self._analyses]
+                self.db.executemany("DELETE FROM constats WHERE chemin = ?", chemins)
+                self.db.executemany("DELETE FROM imports WHERE chemin = ?", chemins)
+                self.db.executemany("UPDATE entrees SET statut = ? WHERE chemin = ?",
+                                    [(res[0], c) for c, res in self._analyses])
+                self.db.executemany("INSERT OR IGNORE INTO constats VALUES (?, ?, ?)",
+                                    [(self._regle(msg), c, ligne) for c, res in self._analyses for ligne, msg in res[2]])
+                self.db.executemany("INSERT OR IGNORE INTO imports VALUES (?, ?)",
+                                    [(m, c) for c, res in self._analyses for m in res[1]])
+            self._entrees, self._purges, self._analyses, self._cumuls = [], [], [], []
+            self._archives = []
+
+    def terminer(self):
+        self.vider()
+        if self.scan is not None:
+            with self._verrou, self.db:
+                self.db.execute("UPDATE scans SET fin = ? WHERE id = ?",
+                                (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), self.scan))
+
+    def fermer(self):
+        self.terminer()
+        with self._verrou:
+            self.db.execute("PRAGMA optimize")
+            self.db.close()
+
+    # --- Lecture ---
+    def chercher(self, sous=None, ext=None, regle=None, module=None, genre=None, taille_min=None, tri="chemin",
+                 limite=100):
+        """Entrées indexées → [dict(chemin, genre, taille, fichiers, mtime_ns, empreinte, statut, constats)].
+        sous : préfixe de chemin ; ext : ".py" ; regle : texte contenu dans le message d’une règle ;
+        module : import exact ou sous-module (« subprocess » couvre « subprocess.run ») ;
+        tri : "chemin" ou "taille" (décroissante). constats : [(ligne, message)] des .py."""
+        conditions, params = [], []
+        plage = _plage(sous) if sous else None
+        if plage:
+            conditions.append("e.chemin >= ? AND e.chemin < ?")
+            params += plage
+        if ext:
+            conditions.append("e.ext = ?")
+            params.append(("" if ext.startswith(".") else ".") + ext.lower())
+        if genre:
+            conditions.append("e.genre = ?")
+            params.append(genre)
+        if taille_min:
+            conditions.append("e.taille >= ?")
+            params.append(taille_min)
+        with self._verrou:
+            if regle:
+                ids = [i for m, i in self._regles.items() if regle.lower() in m.lower()]
+                if not ids:
+                    return []
+                sous_requete = f"SELECT chemin FROM constats WHERE regle IN ({', '.join('?' * len(ids))})"
+                if plage:
+                    sous_requete += " AND chemin >= ? AND chemin < ?"
+                conditions.append(f"e.chemin IN ({sous_requete})")
+                params += ids + (list(plage) if plage else [])
+            if module:
+                sous_requete = "SELECT chemin FROM imports WHERE (module = ? OR (module >= ? AND module < ?))"
+                if plage:
+                    sous_requete += " AND chemin >= ? AND chemin < ?"
+                conditions.append(f"e.chemin IN ({sous_requete})")
+                params += [module, module + ".", module + "/"] + (list(plage) if plage else [])
+            ordre = "e.taille DESC" if tri == "taille" else "e.chemin"
+            requete = ("SELECT e.chemin, e.genre, e.taille, e.fichiers, e.mtime_ns, e.empreinte, e.statut FROM entrees e"
+                       + (" WHERE " + " AND ".join(conditions) if conditions else "")
+                       + f" ORDER BY {ordre} LIMIT ?")
+            lignes = self.db.execute(requete, params + [limite]).fetchall()
+            resultats = []
+            for chemin, g, taille, fichiers, mtime_ns, empreinte, statut in lignes:
+                constats = self.db.execute("SELECT c.ligne, r.message FROM constats c JOIN regles r ON r.id = c.regle "
+                                           "WHERE c.chemin = ? ORDER BY c.ligne", (chemin,)).fetchall() if statut else []
+                resultats.append(dict(chemin=chemin, genre=g, taille=taille, fichiers=fichiers, mtime_ns=mtime_ns,
+                                      empreinte=empreinte, statut=statut, constats=constats))
+        return resultats
+
+    def resume(self):
+        with self._verrou:
+            n = self.db.execute("SELECT COUNT(*) FROM regles").fetchone()[0]
+            dernier = self.db.execute("SELECT date, cibles FROM scans ORDER BY id DESC LIMIT 1").fetchone()
+        derniers = f"dernier scan {dernier[0]} ({', '.join(json.loads(dernier[1]))})" if dernier else "aucun scan"
+        return f"🗂️ Index {self.chemin_db} : {derniers}, {n or 0} règle(s) relevée(s)"
+
+def ouvrir_index(chemin_db=INDEX_FICHIER):
+    """IndexScan, ou None si la base est inutilisable (lecture seule, corrompue…)."""
     try:
+        return IndexScan(chemin_db)
+    except sqlite3.Error:
+        return None
+
+def ligne_index(entree, max_risques=1):
+    """Une entrée de chercher() en une ligne de texte (commande « index », panneau Tk)."""
+    if entree["genre"] == "D":
+        taille = "?" if entree["taille"] is None else taille_lisible(entree["taille"])
+        texte = f"📁 {entree['chemin']}  ({taille}, {entree['fichiers'] or 0} fichier(s))"
+    else:
+        texte = f"📄 {entree['chemin']}  ({taille_lisible(entree['taille'] or 0)})"
+        if entree["empreinte"]:
+            texte += f"  {entree['empreinte']}"
+    if entree["constats"]:
+        affiches = entree["constats"] if max_risques is None else entree["constats"][:max_risques]
+        texte += "  ⚠️ " + " | ".join(f"{msg} (l.{ligne})" for ligne, msg in affiches)
+        if len(affiches) < len(entree["constats"]):
+            texte += f" (+{len(entree['constats']) - len(affiches)})"
+    return texte
+
+# === VEILLE (suivi des changements après un scan) ===
+# Événement du mode veille : genre "nouveau" | "modifie" (.py à risque), résultat d’analyse_source()
+Changement = namedtuple("Changement", "genre chemin resultat")
+
+class _DossierSuivi:
+    __slots__ = ("prof", "fichiers", "sous", "octets", "cumul", "nb_cumul")
+
+    def __init__(self, prof):
+        self.prof = prof
+        self.fichiers = {}  # nom → (taille, mtime_ns)
+        self.sous = set()  # noms des sous-dossiers suivis
+        self.octets = 0  # fichiers du dossier
+        self.cumul, self.nb_cumul = 0, 0  # sous-arbre (octets, fichiers)
+
+class _Inotify:
+    """inotify (Linux) par ctypes, sans dépendance : un watch par dossier suivi.
+    lire(delai) → (dossiers touchés, débordement de la file noyau)."""
+    # IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    # | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+    MASQUE = 0x2 | 0x4 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200 | 0x400 | 0x800 | 0x01000000
+    _IN_Q_OVERFLOW = 0x4000
+    _IN_IGNORED = 0x8000
+    _EVENEMENT = struct.Struct("iIII")
+
+    def __init__(self):
         import ctypes
-        _, total, free = ctypes.c_ulonglong(), ctypes.c_ulonglong(), ctypes.c_ulonglong()
-        ctypes.windll.kernel32.GetDiskFreeSpaceExW(
-            ctypes.c_wchar_p(lecteur),
-            ctypes.pointer(_),
-            ctypes.pointer(total),
-            ctypes.pointer(free)
-        )
-        used = (total.value - free.value) / (1024**3)
-        total_gb = total.value / (1024**3)
-        return f"{used:.1f} / {total_gb:.1f} Go"
-    except:
-        return "⚠️ Indisponible"
+        import ctypes.util
+        self._ctypes = ctypes
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._ajouter = libc.inotify_add_watch
+        self._ajouter.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._retirer = libc.inotify_rm_watch
+        self._retirer.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            self._erreur()
+        self.chemins = {}  # wd → chemin
+        self.wds = {}  # chemin → wd
 
-# === ANALYSE .PY ===
-DANGEROUS_PATTERNS = [
-    (r"exec\s*\(", "exec détecté"),
-    (r"eval\s*\(", "eval détecté"),
-    (r"__import__\s*\(", "__import__ détecté"),
-    (r"subprocess\.(run|Popen|call|check_output)", "subprocess utilisé"),
-    (r"import\s+os\s*,\s*sys", "os + sys ensemble → système"),
-    (r"shutil\.rmtree", "shutil.rmtree → suppression récursive"),
-    (r"ctypes\.windll", "ctypes.windll → accès bas niveau"),
-]
+    def _erreur(self, chemin=None):
+        code = self._ctypes.get_errno()
+        raise OSError(code, os.strerror(code), chemin)
 
-def analyser_fichier_py(filepath):
-    try:
-        with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
-            source = f.read(1024 * 10)
-        try:
-            ast.parse(source, filename=filepath)
-            syntax_ok = True
-        except SyntaxError:
-            return "⚠️ SyntaxError"
-        except:
-            syntax_ok = False
-
-        imports = []
-        try:
-            for node in ast.walk(ast.parse(source)):
-                if isinstance(node, ast.Import):
-                    imports.extend(alias.name for alias in node.names)
-                elif isinstance(node, ast.ImportFrom):
-                    if node.module:
-                        imports.append(node.module)
-        except: pass
+    def ajouter(self, chemin):
+        wd = self._ajouter(self.fd, os.fsencode(chemin), self.MASQUE)
+        if wd < 0:
+            self._erreur(chemin)  # ENOSPC : fs.inotify.max_user_watches atteint
+        self.chemins[wd] = chemin
+        self.wds[chemin] = wd
 
-        risks = []
-        for pattern, msg in DANGEROUS_PATTERNS:
-            if re.search(pattern, source):
-                risks.append(msg)
-
-        parts = []
-        if not syntax_ok: parts.append("❌ Syntaxe")
-        if imports: parts.append("imports:" + ",".join(imports[:2]))
-        if risks: parts.append("⚠️ " + " | ".join(risks[:1]))
-        return " | ".join(parts) if parts else "✅ Clean"
-    except:
-        return "❓ Lecture impossible"
+    def retirer(self, chemin):
+        wd = self.wds.pop(chemin, None)
+        if wd is not None:
+            self.chemins.pop(wd, None)
+            self._retirer(self.fd, wd)
 
-# === ARBRE SÉCURISÉ ===
-def arbre_securise(racine, prefix="", prof=0, max_prof=4, ignore_recycle=True, limit_per_dir=MAX_ITEMS_PER_DIR, analyze_py=True):
-    if prof >= max_prof:
-        return [f"{prefix}└── [...] (limite profondeur {prof}/{max_prof})"]
-    lignes = []
-    try:
-        elements = sorted(os.listdir(racine))
-    except (OSError, PermissionError, FileNotFoundError):
-        return [f"{prefix}📁 [accès refusé]"]
+    def lire(self, delai):
+        import select
+        touches, deborde = set(), False
+        if not select.select([self.fd], [], [], delai)[0]:
+            return touches, deborde
+        try:
+            donnees = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return touches, deborde
+        pos = 0
+        while pos < len(donnees):
+            wd, masque, _, longueur = self._EVENEMENT.unpack_from(donnees, pos)
+            pos += self._EVENEMENT.size + longueur
+            if masque & self._IN_Q_OVERFLOW:
+                deborde = True
+            elif masque & self._IN_IGNORED:
+                chemin = self.chemins.pop(wd, None)
+                if chemin is not None and self.wds.get(chemin) == wd:
+                    del self.wds[chemin]
+            elif wd in self.chemins:
+                touches.add(self.chemins[wd])
+        return touches, deborde
 
-    if ignore_recycle and os.path.basename(racine).startswith("$RECYCLE.BIN"):
-        return [f"{prefix}📁 $RECYCLE.BIN (exclu)"]
+    def fermer(self):
+        os.close(self.fd)
 
-    elements = elements[:limit_per_dir]
-    dossiers = []
-    fichiers_imp = []
-    autres = 0
+class Veille:
+    """Mode veille : part d’un parcours complet de `racine` — analyses .py reprises du cache,
+    donc sans relecture juste après un scan — puis tient l’arbre, les tailles et les analyses
+    à jour au fil des changements : inotify sous Linux, sinon scrutation (taille + mtime)
+    de VEILLE_LOT dossiers par passe. Seuls les dossiers touchés sont relus et seuls les .py
+    nouveaux ou modifiés réanalysés. alertes : les derniers .py à risque (liste glissante)."""
+    def __init__(self, racine, max_prof=MAX_DEPTH_FULL, limit_per_dir=MAX_ITEMS_PER_DIR, ignore_recycle=True,
+                 exclusions=None, cache=None, ordonnanceur=None, inotify=True, intervalle=VEILLE_INTERVALLE,
+                 max_alertes=VEILLE_ALERTES):
+        self.racine = os.path.abspath(racine)
+        self.max_prof = max_prof
+        self.limit_per_dir = limit_per_dir
+        self.ignore_recycle = ignore_recycle
+        self.exclusions = exclusions
+        self.cache = cache
+        self.ordonnanceur = ordonnanceur or OrdonnanceurES()
+        self.intervalle = intervalle
+        self.dossiers = {}  # chemin → _DossierSuivi
+        self.resultats = {}  # chemin .py → résultat d’analyse
+        self.alertes = deque(maxlen=max_alertes)
+        self._inotify = None
+        self._a_scruter = deque()
+        if inotify and sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError):
+                compter_erreur("inotify")
+        self.source = "inotify" if self._inotify else "scrutation"
 
-    for e in elements:
-        chemin = os.path.join(racine, e)
+    # --- Modèle ---
+    def total(self, chemin=None):
+        """(octets, fichiers) du sous-arbre suivi sous `chemin` (défaut : racine)."""
+        d = self.dossiers.get(chemin or self.racine)
+        return (d.cumul, d.nb_cumul) if d else (0, 0)
+
+    def risques(self):
+        return sorted(c for c, res in self.resultats.items() if res[2])
+
+    def _ajuster(self, chemin, octets, fichiers):
+        # Tailles cumulées : le delta remonte jusqu’à la racine
+        while True:
+            d = self.dossiers.get(chemin)
+            if d is None:
+                return
+            d.cumul += octets
+            d.nb_cumul += fichiers
+            if chemin == self.racine:
+                return
+            chemin = os.path.dirname(chemin)
+
+    def _suivre(self, chemin, prof):
+        self.dossiers[chemin] = _DossierSuivi(prof)
+        if self._inotify:
+            try:
+                self._inotify.ajouter(chemin)
+            except OSError:
+                # Plus de watch disponible : toute la veille passe en scrutation
+                compter_erreur("inotify")
+                self._inotify.fermer()
+                self._inotify = None
+                self.source = "scrutation"
+
+    def _retirer(self, chemin):
+        d = self.dossiers.get(chemin)
+        if d is None:
+            return
+        self._ajuster(os.path.dirname(chemin), -d.cumul, -d.nb_cumul)
+        pile = [chemin]
+        while pile:
+            c = pile.pop()
+            d = self.dossiers.pop(c, None)
+            if d is None:
+                continue
+            for nom in d.fichiers:
+                self.resultats.pop(os.path.join(c, nom), None)
+            pile.extend(os.path.join(c, nom) for nom in d.sous)
+            if self._inotify:
+                self._inotify.retirer(c)
+
+    def _exclu(self, chemin, nom):
+        if self.ignore_recycle and nom.upper() == "$RECYCLE.BIN":
+            return True
+        if self.exclusions:
+            return bool(self.exclusions.regle(nom, os.path.relpath(chemin, self.racine)))
+        return False
+
+    def _relire(self, chemin, signaler, etat=None):
+        """Relit un dossier suivi et applique la différence → nouveaux sous-dossiers à parcourir,
+        et Changement des .py à risque nouveaux ou modifiés (si `signaler`)."""
+        d = self.dossiers[chemin]
+        if etat:
+            etat.verifier()
+            depart = etat.mesures.top_depart()
         try:
-            if os.path.isdir(chemin):
-                dossiers.append(e)
-            elif os.path.isfile(chemin):
-                _, ext = os.path.splitext(e)
-                if ext.lower() in EXT_IMPORTANTES:
-                    fichiers_imp.append(e)
-                else:
-                    autres += 1
-        except: pass
+            elements = scanner_dossier(chemin, etat and etat.mesures)[:self.limit_per_dir]
+        except OSError as e:
+            if etat:
+                _noter_refus(etat.mesures, e)
+            if chemin != self.racine and not os.path.isdir(chemin):
+                self._retirer(chemin)  # supprimé ou renommé
+                parent = self.dossiers.get(os.path.dirname(chemin))
+                if parent:
+                    parent.sous.discard(os.path.basename(chemin))
+            return [], []
+        if etat:
+            etat.dossiers += 1
+            etat.mesures.compter("scandir")
+            etat.mesures.fin("listage", depart)
+        fichiers, sous, a_analyser = {}, set(), []
+        for e in elements:
+            if e.est_dossier:
+                sous.add(e.nom)
+            elif e.est_fichier:
+                try:
+                    fichiers[e.nom] = (e.taille, e.mtime_ns)
+                except OSError:
+                    compter_erreur("stat")
+                    continue
+                if e.nom.endswith(".py") and d.fichiers.get(e.nom) != fichiers[e.nom]:
+                    a_analyser.append(e)
+        if etat:
+            etat.fichiers += len(fichiers)
+        for nom in d.fichiers.keys() - fichiers.keys():
+            self.resultats.pop(os.path.join(chemin, nom), None)
+        octets = sum(t for t, _ in fichiers.values())
+        self._ajuster(chemin, octets - d.octets, len(fichiers) - len(d.fichiers))
+        anciens, d.fichiers, d.octets = d.fichiers, fichiers, octets
 
-    total = len(dossiers) + len(fichiers_imp) + (1 if autres > 0 else 0)
-    idx = 0
+        changements = []
+        mesures = etat.mesures if etat else None
+        for c, res in analyser_py_dossier(a_analyser, self.ordonnanceur, self.cache, mesures).items():
+            self.resultats[c] = res
+            if signaler and res[2]:
+                changements.append(Changement("modifie" if os.path.basename(c) in anciens else "nouveau", c, res))
 
-    for d in dossiers:
-        if ignore_recycle and d.upper() == "$RECYCLE.BIN":
-            idx += 1
-            marque = "└── " if idx == total else "├── "
-            lignes.append(f"{prefix}{marque}📁 $RECYCLE.BIN (exclu)")
-            continue
-        idx += 1
-        marque = "└── " if idx == total else "├── "
-        lignes.append(f"{prefix}{marque}📁 {d}")
-        suite = prefix + ("    " if idx == total else "│   ")
-        sous = arbre_securise(os.path.join(racine, d), suite, prof+1, max_prof, ignore_recycle, limit_per_dir, analyze_py)
-        lignes.extend(sous)
-
-    for f in sorted(fichiers_imp):
-        idx += 1
-        marque = "└── " if idx == total else "├── "
-        if f.endswith('.py') and analyze_py:
-            analyse = analyser_fichier_py(os.path.join(racine, f))
-            lignes.append(f"{prefix}{marque}🐍 {f}  [{analyse}]")
+        for nom in d.sous - sous:
+            self._retirer(os.path.join(chemin, nom))
+        nouveaux = []
+        if d.prof < self.max_prof:
+            for nom in sorted(sous - d.sous):
+                enfant = os.path.join(chemin, nom)
+                if self._exclu(enfant, nom):
+                    continue
+                self._suivre(enfant, d.prof + 1)
+                nouveaux.append(enfant)
+            d.sous = {nom for nom in sous if os.path.join(chemin, nom) in self.dossiers}
+        self.alertes.extend(changements)
+        return nouveaux, changements
+
+    def _explorer(self, chemins, signaler, etat=None):
+        changements = []
+        pile = list(chemins)
+        while pile:
+            chemin = pile.pop()
+            if chemin not in self.dossiers:
+                continue  # retiré entre-temps (dossier parent relu d’abord)
+            nouveaux, trouves = self._relire(chemin, signaler, etat)
+            pile.extend(reversed(nouveaux))
+            changements.extend(trouves)
+        return changements
+
+    # --- Boucle ---
+    def demarrer(self, etat=None):
+        """État de référence : parcours complet, sans alerte (cache d’analyse réutilisé)."""
+        self._suivre(self.racine, 0)
+        self._explorer([self.racine], False, etat)
+
+    def etape(self, etat=None):
+        """Attend jusqu’à `intervalle` secondes, relit ce qui a changé → [Changement]."""
+        if self._inotify:
+            touches, deborde = self._inotify.lire(self.intervalle)
+            if touches:
+                # Rafale (écriture en cours, décompression…) : on laisse l’activité retomber
+                fin = time.perf_counter() + VEILLE_APAISEMENT
+                while time.perf_counter() < fin:
+                    encore, d = self._inotify.lire(0.05)
+                    if not encore and not d:
+                        break
+                    touches |= encore
+                    deborde = deborde or d
+            if deborde:
+                # File noyau saturée : des événements sont perdus, tout est relu (stat seulement)
+                touches = set(self.dossiers)
+            if etat:
+                etat.mesures.compter("veille_evenements", len(touches))
+            return self._explorer(sorted(touches, reverse=True), True, etat)
+        if etat:
+            etat.annulation.wait(self.intervalle)
+            etat.verifier()
         else:
-            lignes.append(f"{prefix}{marque}📄 {f}")
+            time.sleep(self.intervalle)
+        if not self._a_scruter:
+            self._a_scruter.extend(self.dossiers)
+        lot = []
+        while self._a_scruter and len(lot) < VEILLE_LOT:
+            c = self._a_scruter.popleft()
+            if c in self.dossiers:
+                lot.append(c)
+        return self._explorer(lot, True, etat)
 
-    if autres > 0:
-        idx += 1
-        marque = "└── " if idx == total else "├── "
-        lignes.append(f"{prefix}{marque}📄 [{autres} autre(s) fichier(s)]")
+    def fermer(self):
+        if self._inotify:
+            self._inotify.fermer()
+            self._inotify = None
 
-    return lignes
+    def resume(self):
+        octets, fichiers = self.total()
+        return (f"👁️ Veille ({self.source}) : {len(self.dossiers)} dossier(s), {fichiers} fichier(s), "
+                f"{taille_lisible(octets)} | {len(self.resultats)} .py dont {len(self.risques())} à risque")
+
+def ligne_changement(changement, max_risques=1):
+    etiquette = "🆕" if changement.genre == "nouveau" else "✏️"
+    return (f"[{datetime.now().strftime('%H:%M:%S')}] {etiquette} {changement.chemin}  "
+            f"[{formater_analyse(changement.resultat, max_risques)}]")
 
 # === INTERFACE KERBEROS v2.4+deep.kbi-enabled (avec Aide & Liens) ===
+class ExplorateurArbre:
+    """Fenêtre ttk.Treeview : un dossier n’est lu (et ses .py analysés) qu’à sa première ouverture.
+    Les lectures passent par un seul thread (une demande à la fois, HDD-friendly) ; les résultats
+    restent en cache dans chaque nœud — refermer puis rouvrir ne relit rien, [🔄] recharge.
+    exclusions : Exclusions — les sous-dossiers visés sont affichés « (exclu : règle) », jamais lus."""
+    def __init__(self, parent, racines, ignore_recycle=True, max_risques=1, avec_cache=True, ordonnanceur=None,
+                 exclusions=None):
+        self.ignore_recycle = ignore_recycle
+        self.exclusions = exclusions
+        self.max_risques = max_risques
+        self.avec_cache = avec_cache
+        self.ordonnanceur = ordonnanceur or OrdonnanceurES()
+        self.noeuds = {}  # iid dossier → {"chemin", "rel", "etat" (vide|attente|charge), "taille", "risques", "complet"}
+        self.demandes = queue.Queue()
+        self.resultats = queue.Queue()
+        self.en_cours = 0  # demandes envoyées au thread, pas encore affichées
+
+        self.win = tk.Toplevel(parent)
+        self.win.title("🌳 Kerberos – Explorateur")
+        self.win.geometry("900x640")
+        self.win.configure(bg="#0d0d0d")
+        style = ttk.Style(self.win)
+        style.configure("Kerberos.Treeview", background="#0a0a0a", fieldbackground="#0a0a0a",
+                        foreground=FG, font=("Consolas", 9), rowheight=18)
+        style.configure("Kerberos.Treeview.Heading", font=FONT_UI)
+
+        barre = tk.Frame(self.win, bg="#0d0d0d")
+        barre.pack(fill=tk.X, padx=8, pady=4)
+        tk.Button(barre, text="🔄 Recharger la sélection", command=self.recharger,
+                  bg="#2d2d2d", fg="white", font=FONT_UI).pack(side=tk.LEFT)
+        self.statut = tk.Label(barre, text="", fg="#88ccff", bg="#0d0d0d", font=("Consolas", 9))
+        self.statut.pack(side=tk.LEFT, padx=8)
+
+        cadre = tk.Frame(self.win, bg="#0d0d0d")
+        cadre.pack(fill=tk.BOTH, expand=True, padx=8, pady=(0, 8))
+        self.arbre = ttk.Treeview(cadre, columns=("taille", "risque"), style="Kerberos.Treeview")
+        self.arbre.heading("#0", text="Nom")
+        self.arbre.heading("taille", text="Taille")
+        self.arbre.heading("risque", text="Analyse .py")
+        self.arbre.column("#0", width=380)
+        self.arbre.column("taille", width=110, anchor="e", stretch=False)
+        self.arbre.column("risque", width=380)
+        self.arbre.tag_configure("risque", foreground="#ff5555")
+        self.arbre.tag_configure("note", foreground="#888888")
+        defil = ttk.Scrollbar(cadre, orient="vertical", command=self.arbre.yview)
+        self.arbre.configure(yscrollcommand=defil.set)
+        defil.pack(side=tk.RIGHT, fill=tk.Y)
+        self.arbre.pack(fill=tk.BOTH, expand=True)
+        self.arbre.bind("<<TreeviewOpen>>", self._ouverture)
+
+        for racine in racines:
+            self._dossier("", racine, racine)
+        self.win.protocol("WM_DELETE_WINDOW", self.fermer)
+        threading.Thread(target=self._travailleur, daemon=True).start()
+        self._tic = self.win.after(100, self._pomper)
+
+    # --- Thread de lecture (aucun appel Tk) ---
+    def _travailleur(self):
+        cache = ouvrir_cache() if self.avec_cache else None  # connexion SQLite propre à ce thread
+        try:
+            while True:
+                demande = self.demandes.get()
+                if demande is None:
+                    return
+                iid, chemin = demande
+                try:
+                    res = lister_noeud(chemin, cache=cache, ordonnanceur=self.ordonnanceur)
+                except OSError as e:
+                    res = e
+                self.resultats.put((iid, res))
+        finally:
+            if cache:
+                cache.fermer()
+
+    # --- Côté Tk ---
+    def _dossier(self, parent, nom, chemin, rel=""):
+        # rel : chemin relatif à la racine ouverte, « / » (règles d’exclusion) ; "" pour une racine
+        if self.ignore_recycle and nom.upper().startswith("$RECYCLE.BIN"):
+            self.arbre.insert(parent, "end", text=f"📁 {nom}", values=("", "(exclu)"), tags=("note",))
+            return
+        regle = self.exclusions.regle(nom, rel) if rel and self.exclusions else None
+        if regle:
+            self.arbre.insert(parent, "end", text=f"📁 {nom}", values=("", f"(exclu : {regle})"), tags=("note",))
+            return
+        iid = self.arbre.insert(parent, "end", text=f"📁 {nom}", values=("", ""))
+        self.arbre.insert(iid, "end", text="⏳ …", tags=("note",))  # rend le nœud dépliable
+        self.noeuds[iid] = {"chemin": chemin, "rel": rel, "etat": "vide", "taille": 0, "risques": 0,
+                            "complet": False}
+
+    def _ouverture(self, _evt=None):
+        iid = self.arbre.focus()
+        noeud = self.noeuds.get(iid)
+        if noeud and noeud["etat"] == "vide":
+            noeud["etat"] = "attente"
+            self._demander(iid)
+
+    def _demander(self, iid):
+        self.en_cours += 1
+        self.demandes.put((iid, self.noeuds[iid]["chemin"]))
+        self.statut.configure(text=f"⏳ Lecture : {self.noeuds[iid]['chemin']}")
+
+    def recharger(self):
+        for iid in self.arbre.selection():
+            noeud = self.noeuds.get(iid)
+            if not noeud or noeud["etat"] == "attente":
+                continue
+            for enfant in self.arbre.get_children(iid):
+                self._oublier(enfant)
+            self.arbre.delete(*self.arbre.get_children(iid))
+            noeud.update(etat="attente", taille=0, risques=0, complet=False)
+            self._propager(iid)
+            self._demander(iid)
+
+    def _oublier(self, iid):
+        for enfant in self.arbre.get_children(iid):
+            self._oublier(enfant)
+        self.noeuds.pop(iid, None)
+
+    def _pomper(self):
+        for _ in range(20):  # borne par tick : l’UI reste réactive
+            try:
+                iid, res = self.resultats.get_nowait()
+            except queue.Empty:
+                break
+            self.en_cours -= 1
+            if iid in self.noeuds and self.arbre.exists(iid):
+                self._remplir(iid, res)
+            if not self.en_cours:
+                lus = sum(n["etat"] == "charge" for n in self.noeuds.values())
+                self.statut.configure(text=f"✅ {lus} dossier(s) lu(s)")
+        self._tic = self.win.after(100, self._pomper)
+
+    def _remplir(self, iid, res):
+        noeud = self.noeuds[iid]
+        self.arbre.delete(*self.arbre.get_children(iid))
+        noeud["etat"] = "charge"
+        if isinstance(res, OSError):
+            self.arbre.insert(iid, "end", text="📁 [accès refusé]", values=("", str(res)), tags=("note",))
+            noeud.update(direct_taille=0, direct_risques=0, direct_complet=True)
+            self._propager(iid)
+            return
+        dossiers, fichiers, reste = res
+        for d in dossiers:
+            self._dossier(iid, d.nom, d.chemin, f"{noeud['rel']}/{d.nom}" if noeud["rel"] else d.nom)
+        taille, risques = 0, 0
+        for f, octets, analyse in fichiers:
+            taille += octets or 0
+            texte, tags = "", ()
+            if analyse is not None:
+                texte = formater_analyse(analyse, self.max_risques)
+                if analyse[2]:
+                    risques += 1
+                    tags = ("risque",)
+            icone = "🐍" if analyse is not None else "📄"
+            self.arbre.insert(iid, "end", text=f"{icone} {f.nom}",
+                              values=("" if octets is None else taille_lisible(octets), texte), tags=tags)
+        if reste:
+            self.arbre.insert(iid, "end", text=f"📄 [{reste} autre(s) élément(s) non affiché(s)]", tags=("note",))
+        noeud.update(direct_taille=taille, direct_risques=risques, direct_complet=not reste)
+        self._propager(iid)
+
+    def _propager(self, iid):
+        """Recalcule taille / nb de .py à risque de iid puis de ses ancêtres (dossiers déjà ouverts seulement)."""
+        while iid in self.noeuds:
+            noeud = self.noeuds[iid]
+            if noeud["etat"] == "charge":
+                enfants = [self.noeuds[e] for e in self.arbre.get_children(iid) if e in self.noeuds]
+                noeud["taille"] = noeud["direct_taille"] + sum(e["taille"] for e in enfants)
+                noeud["risques"] = noeud["direct_risques"] + sum(e["risques"] for e in enfants)
+                noeud["complet"] = noeud["direct_complet"] and all(e["complet"] for e in enfants)
+                # « ≥ » : des sous-dossiers n’ont pas encore été ouverts — taille minorée
+                taille = ("" if noeud["complet"] else "≥ ") + taille_lisible(noeud["taille"])
+                risque = f"⚠️ {noeud['risques']} .py à risque" if noeud["risques"] else ""
+                self.arbre.item(iid, values=(taille, risque), tags=("risque",) if noeud["risques"] else ())
+            else:
+                self.arbre.item(iid, values=("", ""), tags=())
+            iid = self.arbre.parent(iid)
+
+    def fermer(self):
+        self.win.after_cancel(self._tic)
+        self.demandes.put(None)
+        self.win.destroy()
+
 class KerberosDiskAnalyzer:
     def __init__(self, root):
         self.root = root
         self.selected_path = None
         self.last_kbi = None
+        self.tache = None
+        self.etat = None
         root.title("🔍 Kerberos – Analyseur de Disques v2.4+deep (GPLv3)")
         root.geometry("960x760")
         root.configure(bg=BG)
@@ -227,8 +4166,66 @@ class KerberosDiskAnalyzer:
         self.deep_scan = tk.BooleanVar(value=False)
         tk.Checkbutton(opt_frame, text="🗑️ Ignorer $RECYCLE.BIN", variable=self.ignore_recycle,
                        bg=BG, fg=FG, selectcolor="#333", font=FONT_UI).pack(anchor="w")
+        exc_frame = tk.Frame(opt_frame, bg=BG)
+        exc_frame.pack(anchor="w")
+        self.exclusions_actives = tk.BooleanVar(value=True)
+        tk.Checkbutton(exc_frame, text=f"✂️ Élaguer les dossiers exclus ({EXCLUSIONS_FICHIER})",
+                       variable=self.exclusions_actives, bg=BG, fg=FG, selectcolor="#333", font=FONT_UI).pack(side=tk.LEFT)
+        tk.Button(exc_frame, text="✏️ Règles", command=self.editer_exclusions,
+                  bg="#2d2d2d", fg="white", font=("Consolas", 9)).pack(side=tk.LEFT, padx=4)
         tk.Checkbutton(opt_frame, text="🔍 Profondeur étendue (max 5 niveaux)", variable=self.deep_scan,
                        bg=BG, fg="#88ccff", selectcolor="#333", font=FONT_UI).pack(anchor="w")
+        bud_frame = tk.Frame(opt_frame, bg=BG)
+        bud_frame.pack(anchor="w")
+        tk.Label(bud_frame, text="⏱️ Budget par cible :", fg=FG, bg=BG, font=FONT_UI).pack(side=tk.LEFT)
+        self.budget_secondes = tk.StringVar(value="")
+        tk.Entry(bud_frame, textvariable=self.budget_secondes, width=6, bg="#2d2d2d", fg=FG, insertbackground=FG,
+                 font=FONT_UI).pack(side=tk.LEFT, padx=4)
+        tk.Label(bud_frame, text="s (vide = profondeur fixe ; sinon .py, récents et peu profonds d’abord)",
+                 fg="#aaaaaa", bg=BG, font=("Consolas", 9)).pack(side=tk.LEFT)
+        self.tous_risques = tk.BooleanVar(value=False)
+        tk.Checkbutton(opt_frame, text="📋 Lister tous les risques .py (avec n° de ligne)", variable=self.tous_risques,
+                       bg=BG, fg=FG, selectcolor="#333", font=FONT_UI).pack(anchor="w")
+        self.image_incrementale = tk.BooleanVar(value=False)
+        tk.Checkbutton(opt_frame, text="♻️ Image incrémentale (réutilise le .kbi précédent)", variable=self.image_incrementale,
+                       bg=BG, fg=FG, selectcolor="#333", font=FONT_UI).pack(anchor="w")
+        self.kbi_v2 = tk.BooleanVar(value=False)
+        tk.Checkbutton(opt_frame, text="🗜️ Image .kbi v2 (binaire indexé, compressé)", variable=self.kbi_v2,
+                       bg=BG, fg=FG, selectcolor="#333", font=FONT_UI).pack(anchor="w")
+        emp_frame = tk.Frame(opt_frame, bg=BG)
+        emp_frame.pack(anchor="w")
+        tk.Label(emp_frame, text="🔐 Empreinte image :", fg=FG, bg=BG, font=FONT_UI).pack(side=tk.LEFT)
+        self.empreinte = tk.StringVar(value="sha1-4k")
+        ttk.Combobox(emp_frame, textvariable=self.empreinte, values=list(EMPREINTES), state="readonly",
+                     width=9, font=FONT_UI).pack(side=tk.LEFT, padx=4)
+        tk.Label(emp_frame, text="(sha1-4k = 4 premiers Ko ; sha256/blake2b = contenu complet)",
+                 fg="#aaaaaa", bg=BG, font=("Consolas", 9)).pack(side=tk.LEFT)
+        dsk_frame = tk.Frame(opt_frame, bg=BG)
+        dsk_frame.pack(anchor="w")
+        tk.Label(dsk_frame, text="💽 Type de disque :", fg=FG, bg=BG, font=FONT_UI).pack(side=tk.LEFT)
+        self.type_disque = tk.StringVar(value=TYPE_DISQUE)
+        ttk.Combobox(dsk_frame, textvariable=self.type_disque, values=["auto", "hdd", "ssd"], state="readonly",
+                     width=6, font=FONT_UI).pack(side=tk.LEFT, padx=4)
+        tk.Label(dsk_frame, text="(hdd = 1 lecture à la fois, ordre des inodes ; auto = détection Linux, sinon hdd)",
+                 fg="#aaaaaa", bg=BG, font=("Consolas", 9)).pack(side=tk.LEFT)
+        self.cache_actif = tk.BooleanVar(value=True)
+        tk.Checkbutton(opt_frame, text=f"🗄️ Cache d’analyse .py ({CACHE_FICHIER})", variable=self.cache_actif,
+                       bg=BG, fg=FG, selectcolor="#333", font=FONT_UI).pack(anchor="w")
+        self.index_actif = tk.BooleanVar(value=True)
+        tk.Checkbutton(opt_frame, text=f"🗂️ Enregistrer rapports et images dans l’index ({INDEX_FICHIER})",
+                       variable=self.index_actif, bg=BG, fg=FG, selectcolor="#333", font=FONT_UI).pack(anchor="w")
+        self.mesures_json = tk.BooleanVar(value=False)
+        tk.Checkbutton(opt_frame, text="📈 Mesures détaillées (.mesures.json à côté du rapport / de l’image)",
+                       variable=self.mesures_json, bg=BG, fg=FG, selectcolor="#333", font=FONT_UI).pack(anchor="w")
+        self.profiler = tk.BooleanVar(value=False)
+        tk.Checkbutton(opt_frame, text="🧪 Profilage cProfile (.prof, lecture : python -m pstats)",
+                       variable=self.profiler, bg=BG, fg=FG, selectcolor="#333", font=FONT_UI).pack(anchor="w")
+        self.py_workers = tk.IntVar(value=PY_WORKERS)
+        wrk_frame = tk.Frame(opt_frame, bg=BG)
+        wrk_frame.pack(anchor="w")
+        tk.Label(wrk_frame, text="🐍 Processus d’analyse .py :", fg=FG, bg=BG, font=FONT_UI).pack(side=tk.LEFT)
+        tk.Spinbox(wrk_frame, from_=1, to=max(1, os.cpu_count() or 1), width=3, textvariable=self.py_workers,
+                   bg="#2d2d2d", fg=FG, font=FONT_UI).pack(side=tk.LEFT, padx=4)
 
         # Boutons principaux
         btn_frame1 = tk.Frame(root, bg=BG)
@@ -241,6 +4238,12 @@ class KerberosDiskAnalyzer:
                   bg="#004d00", fg="white", font=FONT_UI).pack(side=tk.LEFT, padx=4)
         tk.Button(btn_frame1, text="📄 Ouvrir .kbi", command=self.ouvrir_kbi,
                   bg="#1e4d1e", fg="#aaffaa", font=FONT_UI).pack(side=tk.LEFT, padx=4)
+        tk.Button(btn_frame1, text="🗜️ .kbi → v2", command=self.convertir_kbi,
+                  bg="#1e4d1e", fg="#aaffaa", font=FONT_UI).pack(side=tk.LEFT, padx=4)
+        tk.Button(btn_frame1, text="👯 Doublons", command=self.doublons,
+                  bg="#1e4d1e", fg="#aaffaa", font=FONT_UI).pack(side=tk.LEFT, padx=4)
+        tk.Button(btn_frame1, text="🗂️ Index", command=self.interroger_index,
+                  bg="#1e4d1e", fg="#aaffaa", font=FONT_UI).pack(side=tk.LEFT, padx=4)
 
         btn_frame2 = tk.Frame(root, bg=BG)
         btn_frame2.pack(pady=4)
@@ -248,6 +4251,13 @@ class KerberosDiskAnalyzer:
                   bg="#8b0000", fg="white", font=("Consolas", 11, "bold")).pack(side=tk.LEFT, padx=4)
         tk.Button(btn_frame2, text="🔍 Full scan", command=self.full_scan,
                   bg="#0066aa", fg="white", font=("Consolas", 10)).pack(side=tk.LEFT, padx=4)
+        tk.Button(btn_frame2, text="🌳 Explorateur", command=self.explorer,
+                  bg="#1e3d4d", fg="#aaddff", font=("Consolas", 10)).pack(side=tk.LEFT, padx=4)
+        tk.Button(btn_frame2, text="👁️ Veille", command=self.veille,
+                  bg="#1e3d4d", fg="#aaddff", font=("Consolas", 10)).pack(side=tk.LEFT, padx=4)
+        self.btn_annuler = tk.Button(btn_frame2, text="⛔ Annuler", command=self.annuler, state=tk.DISABLED,
+                                     bg="#4d4d00", fg="white", font=("Consolas", 10))
+        self.btn_annuler.pack(side=tk.LEFT, padx=4)
 
         # === NOUVEAUX BOUTONS : AIDE + LIENS ===
         link_frame = tk.Frame(root, bg=BG)
@@ -262,6 +4272,10 @@ class KerberosDiskAnalyzer:
         tk.Button(link_frame, text="🐙 GitHub", command=lambda: webbrowser.open("https://github.com/victorpozen/kerberos"),
                   bg="#2a3a2a", fg="#88ff88", font=FONT_UI, relief="flat", padx=10).pack(side=tk.LEFT, padx=2)
 
+        # Progression (mise à jour par _pomper pendant un scan)
+        self.progression = tk.Label(root, text="", fg="#88ccff", bg=BG, font=("Consolas", 9))
+        self.progression.pack(anchor="w", padx=15)
+
         # Console
         self.console = scrolledtext.ScrolledText(
             root, wrap=tk.WORD, font=FONT_MONO,
@@ -290,26 +4304,152 @@ subprocess, shutil.rmtree) dans les fichiers Python.
 → Utilisé par [📸 Créer image] et [🔍 Prescan].
 
 [🔍 Prescan]
-→ Analyse rapide (profondeur 2, max 50 éléments).
+→ Analyse rapide (profondeur 2, max 50 éléments), ou parcours budgété
+  si [⏱️ Budget par cible] est rempli.
 → Idéal pour vérifier avant un scan complet.
 
 [📸 Créer image]
 → Génère un fichier texte .kbi (Kerberos Backup Image) :
-   • Arborescence limitée (500 éléments max)
-   • Taille + checksum SHA1 partiel (4 Ko)
-   • Fichier .sha256 pour vérification
+   • Arborescence complète (profondeur 5, 100 éléments/dossier),
+     écrite en flux sur disque — mémoire constante
+   • Taille + checksum SHA1 partiel (4 Ko), ou empreinte du contenu
+     complet (sha256 / blake2b, hachage multi-thread, débit en Mo/s)
+   • Fichier .sha256 (SHA-256 complet) pour vérification
+→ [♻️ Image incrémentale] : relit le .kbi précédent, ne rehache que les
+  fichiers nouveaux ou modifiés (taille/date) et ajoute une section DIFF.
 → Format ouvert, lisible par tout éditeur.
 
 [📄 Ouvrir .kbi]
 → Ouvre le dernier .kbi généré dans le Bloc-notes.
+→ Image v2 : visionneuse intégrée, recherche d’un chemin ou d’un
+  sous-arbre sans tout décompresser.
+
+[🗜️ .kbi → v2]
+→ Convertit une image texte v1 en v2 (binaire indexé, blocs zlib,
+  chemins compressés par préfixe) — option [🗜️ Image .kbi v2] pour
+  créer directement en v2.
 
 [🚀 Analyser TOUT]
 → Scan standard (profondeur 4), analyse .py complète.
+→ Chaque .py est lu en entier (mmap) : un balayage rapide des octets
+  cherche les motifs dangereux ; seuls les fichiers qui en contiennent
+  sont parsés (AST). Un gros fichier sain ne coûte qu’une lecture.
+  Les autres sont marqués « (non parsé) » : leur syntaxe n’est pas
+  vérifiée (le pied de rapport les compte à part des SyntaxError).
+→ [🐍 Processus d’analyse .py] > 1 : les .py sont analysés en parallèle
+  (un processus par cœur) — rapport identique au mode série.
+→ [🗄️ Cache d’analyse] : les .py inchangés (taille + date) ne sont pas
+  relus d’un scan à l’autre. Vidé automatiquement si les règles changent.
+→ Archives .zip / .whl / .egg / .pyz : parcourues comme des dossiers
+  (📦), leurs .py analysés sur place sans rien extraire sur disque
+  (10 000 membres et 64 Mo décompressés au plus par archive). Avec le
+  cache, une archive déjà vue (même contenu) n’est pas rouverte.
+→ Rapport écrit sur disque au fil du scan (mémoire constante, même sur
+  un arbre très profond) ; la console garde les 20 000 dernières lignes.
+→ Plusieurs lecteurs cochés : un scan par disque physique, en parallèle
+  (jamais deux sur le même disque) ; le rapport garde l’ordre des lecteurs.
+→ Chaque dossier affiche sa taille cumulée et son nombre de fichiers,
+  calculés pendant le même parcours (« ≥ » : sous-arbre tronqué par la
+  profondeur ou la limite d’éléments). Section 🏆 TOP CONSOMMATEURS :
+  les plus gros dossiers et fichiers de chaque cible.
+
+[👯 Doublons]
+→ Fichiers identiques du dossier choisi, en trois étapes : même taille,
+  puis même SHA1 des 4 premiers Ko, puis même empreinte du contenu
+  complet (sha256, ou l’empreinte choisie). Seuls les fichiers encore
+  en collision sont lus : une petite fraction du disque.
+→ Reprend les empreintes du dernier .kbi de ce dossier (fichiers
+  inchangés) ; affiche les groupes et l’espace récupérable.
+
+[✂️ Élaguer les dossiers exclus]
+→ Les dossiers visés par les règles (node_modules, .git, __pycache__,
+  WinSxS… par défaut) ne sont jamais listés : ni lecture de répertoire,
+  ni stat, ni analyse en dessous. Le rapport les marque « exclu : règle »
+  et compte les sous-arbres élagués par règle (📈 MESURES).
+→ [✏️ Règles] : éditeur de kerberos_exclusions.txt — un motif par ligne,
+  nom de dossier (node_modules/, *.egg-info/) ou chemin relatif à la
+  cible (build/cache/, **/tmp/) ; « re: » expression régulière ;
+  « ! » : jamais exclu. Appliqué au scan, prescan, image, doublons,
+  veille et à l’explorateur (dossier marqué « exclu : règle »).
+
+[🗂️ Index]
+→ Chaque rapport et chaque image est enregistré dans kerberos_index.sqlite
+  (chemin, dossier parent, taille, date, extension, empreinte ; pour
+  les .py : règles déclenchées avec n° de ligne, imports). Un dossier
+  rescanné remplace ses anciennes entrées.
+→ Panneau de recherche : sous un dossier, par extension, par règle
+  (ex. « subprocess ») ou par module importé, tri par chemin ou taille.
+  Requêtes sur index : quelques ms, même sur des millions d’entrées.
+
+[♻️ Reprise d’un scan interrompu]
+→ Pendant [🚀 Analyser TOUT] / [🔍 Full scan], un point de reprise est
+  écrit toutes les 30 s à côté du rapport (rapport_….txt.reprise.json) :
+  dossiers en cours et restant à parcourir, totaux partiels, compteurs.
+  Écriture atomique ; coût de l’ordre de la milliseconde.
+→ Après un crash, une fenêtre fermée, un redémarrage ou [⛔ Annuler],
+  relancer le même scan (mêmes options) propose de reprendre au dernier
+  point : le rapport final est le même qu’un scan sans interruption
+  (seules les mesures de temps diffèrent).
+→ En ligne de commande : scan … --rapport FICHIER --reprise.
+
+[⏱️ Budget par cible]
+→ Vide : profondeur et nombre d’éléments par dossier fixes (au-delà du
+  200e élément d’un dossier, rien n’est vu).
+→ N secondes : plus de limite de profondeur ni d’éléments ; les dossiers
+  sont explorés par priorité — peu profonds, dans un sous-arbre riche en
+  .py, modifiés depuis moins de 30 jours — jusqu’à épuisement du budget.
+  Appliqué à [🚀 Analyser TOUT], [🔍 Full scan] et [🔍 Prescan].
+→ Le rapport marque ⏳ les dossiers non explorés et les .py non lus,
+  et liste les prochains dossiers qui auraient été explorés.
+→ En ligne de commande : --budget-temps S, --budget-entrees N
+  (entrées listées) ou --budget-mo MO (Mo de .py lus).
+
+[💽 Type de disque]
+→ Toutes les lectures de contenu (.py, empreintes) passent par un
+  ordonnanceur : regroupées par disque, triées par inode (moins de
+  déplacements de tête), 1 lecture à la fois sur HDD, plusieurs sur SSD.
+  « auto » lit /sys/block/*/queue/rotational sous Linux ; ailleurs, HDD.
 
 [🔍 Full scan]
 → Scan étendu (profondeur 5), liste *tous* les fichiers, 
   mais n’analyse pas les .py (HDD-safe).
 
+[🌳 Explorateur]
+→ Arborescence dépliable (dossier choisi, sinon lecteurs cochés).
+  Un dossier n’est lu et ses .py analysés qu’à son ouverture :
+  explorer un disque ne coûte que ce que l’on ouvre.
+→ Colonnes Taille et Analyse .py ; un dossier cumule ce qui a été
+  ouvert en dessous (« ≥ » tant qu’il reste des sous-dossiers fermés).
+→ [🔄 Recharger la sélection] relit un dossier déjà ouvert.
+
+[👁️ Veille]
+→ Part d’un parcours complet du dossier choisi (analyses .py reprises
+  du cache), puis le tient à jour au fil des changements : inotify sous
+  Linux, sinon relecture taille + date par lots toutes les 2 s.
+→ Seuls les dossiers touchés sont relus, seuls les .py nouveaux ou
+  modifiés sont réanalysés ; la console liste ceux qui sont à risque
+  (🆕 / ✏️) et la taille totale à jour. [⛔ Annuler] arrête la veille.
+
+[⛔ Annuler]
+→ Les scans tournent en arrière-plan (fenêtre réactive, progression
+  dossiers/s + fichiers/s). Ce bouton interrompt proprement le scan en cours.
+
+📈 MESURES
+→ Chaque rapport / image se termine par les temps mur et CPU par phase
+  (listage, lecture .py, analyse, stat, empreintes, écriture), les
+  compteurs (dossiers, fichiers, accès refusés, octets lus, erreurs
+  tolérées) et les dossiers / fichiers les plus lents.
+→ [📈 Mesures détaillées] : même contenu en .mesures.json (+ rendu Tk).
+→ [🧪 Profilage cProfile] : fichier .prof (python -m pstats <fichier>).
+
+💻 LIGNE DE COMMANDE (sans fenêtre, tâches planifiées)
+→ python <script> scan C:\\ D:\\ [--format ndjson] [--rapport f.txt]
+→ python <script> prescan | image | doublons | veille | index | verify …   (--help pour les options)
+→ python <script> index --sous D:\\ --regle subprocess   (recherche dans l’index)
+→ python <script> scan D:\\ --rapport r.txt --reprise   (reprend un scan interrompu)
+→ --exclusions FICHIER / --sans-exclusions : règles d’élagage.
+→ N’importe jamais tkinter : fonctionne en SSH ou sans écran.
+
 [❓ Aide]         → cette fenêtre
 [📜 GPLv3]        → licence officielle (clic → navigateur)
 [💙 Soutien]      → Liberapay (clic → navigateur)
@@ -335,10 +4475,50 @@ Crédits : Victor Pozen • (-; — https://github.com/victorpozen/kerberos
         dossier = filedialog.askdirectory(title="🔍 Prescan — Sélectionner un dossier")
         if not dossier:
             return
+        if self._occupe():
+            return
+        budget = self._budget()
+        if budget is False:
+            return
         self.console.delete(1.0, tk.END)
         self.console.insert(tk.END, f"🔍 Prescan de : {dossier}\n")
-        self.console.insert(tk.END, "   (profondeur 2, max 50 éléments)\n\n")
-        self.console.insert(tk.END, "\n".join(arbre_securise(dossier, max_prof=2, limit_per_dir=50, ignore_recycle=self.ignore_recycle.get(), analyze_py=True)))
+        if budget:
+            self.console.insert(tk.END, f"   (parcours budgété : {budget.limites()})\n\n")
+        else:
+            self.console.insert(tk.END, "   (profondeur 2, max 50 éléments)\n\n")
+        ignore_recycle = self.ignore_recycle.get()
+        workers = self._py_workers()
+        max_risques = None if self.tous_risques.get() else 1
+        avec_cache = self.cache_actif.get()
+        ordonnanceur = OrdonnanceurES(forcer=self.type_disque.get())
+        exclusions = self._exclusions()
+        if exclusions is False:
+            return
+
+        def travail(emettre, etat):
+            cache = ouvrir_cache() if avec_cache else None
+            try:
+                if budget:
+                    # Décompte à partir du lancement effectif, pas de la saisie
+                    arbre_budgete(dossier, budget.copie(), emettre, etat=etat, ignore_recycle=ignore_recycle,
+                                  max_risques=max_risques, cache=cache, ordonnanceur=ordonnanceur,
+                                  exclusions=exclusions)
+                else:
+                    arbre_securise(dossier, max_prof=2, limit_per_dir=50, ignore_recycle=ignore_recycle,
+                                   analyze_py=True, sortie=emettre, etat=etat, workers=workers,
+                                   max_risques=max_risques, cache=cache, ordonnanceur=ordonnanceur,
+                                   exclusions=exclusions)
+            finally:
+                if cache:
+                    cache.fermer()
+            emettre("")
+            if cache:
+                emettre(cache.resume())
+            etat.mesures.terminer(etat)
+            for ligne in etat.mesures.resume():
+                emettre(ligne)
+
+        self._lancer(travail, **self._instrumentation("kerberos_prescan"))
 
     def creer_image(self):
         if not self.selected_path:
@@ -347,76 +4527,160 @@ Crédits : Victor Pozen • (-; — https://github.com/victorpozen/kerberos
         if not os.path.isdir(self.selected_path):
             messagebox.showerror("❌", "Dossier invalide.")
             return
+        if self._occupe():
+            return
 
         basename = os.path.basename(self.selected_path.strip(":\\/"))
-        sortie = f"kerb_image_{basename.lower().replace(' ', '_')}.kbi"
-        try:
-            lignes = [
-                f"KERBEROS IMAGE — {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-                f"Cible : {os.path.abspath(self.selected_path)}",
-                "-" * 60
-            ]
-
-            def walk_safe(racine, rel="", depth=0, count=[0]):
-                if depth > 5 or count[0] > 500:
-                    lignes.append(f"[...] (limite atteinte — profondeur {depth}/5, {count[0]} éléments)")
-                    return
-                try:
-                    for e in sorted(os.listdir(racine))[:100]:
-                        if count[0] > 500:
-                            break
-                        chemin = os.path.join(racine, e)
-                        rel_path = os.path.join(rel, e).lstrip("\\/")
-                        try:
-                            if os.path.isdir(chemin):
-                                lignes.append(f"D {rel_path}/")
-                                count[0] += 1
-                                walk_safe(chemin, rel_path, depth + 1, count)
-                            elif os.path.isfile(chemin):
-                                size = os.path.getsize(chemin)
-                                try:
-                                    with open(chemin, 'rb') as f:
-                                        sample = f.read(4096)
-                                    h = hashlib.sha1(sample).hexdigest()[:8]
-                                except:
-                                    h = "err"
-                                lignes.append(f"F {rel_path} | {size} octets | SHA1:{h}")
-                                count[0] += 1
-                        except OSError:
-                            continue
-                except (OSError, PermissionError):
-                    lignes.append(f"# ACCÈS REFUSÉ : {rel}")
-
-            walk_safe(self.selected_path)
-            contenu = "\n".join(lignes)
+        format_kbi = 2 if self.kbi_v2.get() else 1
+        suffixe = ".v2.kbi" if format_kbi == 2 else ".kbi"
+        sortie = f"kerb_image_{basename.lower().replace(' ', '_')}{suffixe}"
+        racine = self.selected_path
+        incremental = self.image_incrementale.get()
+        empreinte = self.empreinte.get()
+        ordonnanceur = OrdonnanceurES(forcer=self.type_disque.get())
+        exclusions = self._exclusions()
+        if exclusions is False:
+            return
+        avec_index = self.index_actif.get()
+        self.console.insert(tk.END, f"\n📸 Création de l’image : {racine} (empreinte {empreinte})\n")
 
-            with open(sortie, "w", encoding="utf-8") as f:
-                f.write(contenu)
-            sha256 = hashlib.sha256(contenu.encode("utf-8")).hexdigest()[:16]
-            with open(sortie + ".sha256", "w") as f:
-                f.write(f"{sha256} *{sortie}\n")
+        def travail(emettre, etat):
+            index = ouvrir_index() if avec_index else None
+            try:
+                return ecrire_image_kbi(racine, sortie, etat=etat, incremental=incremental, format_kbi=format_kbi,
+                                        empreinte=empreinte, ordonnanceur=ordonnanceur, exclusions=exclusions,
+                                        index=index)
+            finally:
+                if index:
+                    index.fermer()
 
+        def fin(resultat):
+            sortie, stats = resultat
             self.last_kbi = sortie
             self.console.insert(tk.END, f"\n📸 Image générée : {sortie}\n")
+            self.console.insert(tk.END, f"   ♻️ {stats['reutilises']} empreinte(s) réutilisée(s), "
+                                        f"{stats['recalcules']} recalculée(s)\n")
+            if "diff" in stats:
+                self.console.insert(tk.END, "   🔀 Diff : +{} / -{} / ~{}\n".format(*stats["diff"]))
+            self.console.insert(tk.END, f"   {resume_debit(stats)}\n")
+            self.console.insert(tk.END, "\n".join(self.etat.mesures.resume()) + "\n")
             messagebox.showinfo(
                 "✅ Image Kerberos",
                 f"✅ Image sauvegardée :\n   {sortie}\n   + {sortie}.sha256\n\n"
                 f"➡️ Utilisez [📄 Ouvrir .kbi] pour la consulter."
             )
-        except Exception as e:
+
+        def echec(e):
             self.console.insert(tk.END, f"\n❌ Échec image : {e}\n")
             messagebox.showerror("❌ Échec", f"Impossible de créer l’image :\n{e}")
 
+        self._lancer(travail, fin, echec, **self._instrumentation(sortie))
+
     def ouvrir_kbi(self):
         if not self.last_kbi or not os.path.exists(self.last_kbi):
             messagebox.showinfo("ℹ️", "Aucun fichier .kbi récent trouvé.\nGénérez-en un avec [📸 Créer image].")
             return
+        if est_kbi2(self.last_kbi):
+            self.explorer_kbi2(self.last_kbi)
+            return
         try:
             os.startfile(self.last_kbi)
             self.console.insert(tk.END, f"\n📄 Ouverture : {self.last_kbi}\n")
         except Exception as e:
             self.console.insert(tk.END, f"\n❌ Impossible d’ouvrir {self.last_kbi} : {e}\n")
 
+    def explorer_kbi2(self, chemin, max_lignes=2000):
+        """Visionneuse v2 : index + méta chargés, seuls les blocs du sous-arbre demandé sont décompressés."""
+        try:
+            lecteur = LecteurKbi2(chemin)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("❌", f"Image .kbi v2 illisible :\n{e}")
+            return
+        win = tk.Toplevel(self.root)
+        win.title(f"📄 {os.path.basename(chemin)} — .kbi v2")
+        win.geometry("880x580")
+        win.configure(bg="#0d0d0d")
+        win.protocol("WM_DELETE_WINDOW", lambda: (lecteur.fermer(), win.destroy()))
+        meta = lecteur.meta
+        etiquette = EMPREINTES.get(meta.get("empreinte", "sha1-4k"), "SHA1")
+        tk.Label(win, text=f"Cible : {meta.get('cible')}   |   {meta.get('date')}   |   "
+                           f"{len(lecteur)} entrées, {len(lecteur.blocs)} blocs",
+                 fg="#88ccff", bg="#0d0d0d", font=("Consolas", 9)).pack(anchor="w", padx=8, pady=(8, 0))
+        barre = tk.Frame(win, bg="#0d0d0d")
+        barre.pack(fill=tk.X, padx=8, pady=4)
+        tk.Label(barre, text="🔎 Chemin / sous-arbre :", fg=FG, bg="#0d0d0d", font=FONT_UI).pack(side=tk.LEFT)
+        champ = tk.Entry(barre, bg="#2d2d2d", fg=FG, insertbackground=FG, font=FONT_MONO)
+        champ.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=4)
+        txt = scrolledtext.ScrolledText(win, bg="#0a0a0a", fg=FG, font=("Consolas", 9))
+        txt.pack(fill="both", expand=True, padx=8, pady=(0, 8))
+
+        def afficher(_event=None):
+            txt.configure(state="normal")
+            txt.delete("1.0", tk.END)
+            n = 0
+            for e in lecteur.sous_arbre(champ.get()):
+                if n >= max_lignes:
+                    txt.insert(tk.END, f"[...] (affichage limité à {max_lignes} entrées)\n")
+                    break
+                if e.genre == "D":
+                    txt.insert(tk.END, f"D {e.rel}/\n")
+                else:
+                    txt.insert(tk.END, f"F {e.rel} | {e.taille} octets | {etiquette}:{e.empreinte}\n")
+                n += 1
+            if n == 0:
+                txt.insert(tk.END, "∅ Aucune entrée pour ce chemin.\n")
+            if not champ.get():
+                for note in meta.get("notes", []):
+                    txt.insert(tk.END, note + "\n")
+            txt.configure(state="disabled")
+
+        champ.bind("<Return>", afficher)
+        tk.Button(barre, text="Afficher", command=afficher, bg="#2d2d2d", fg="white", font=FONT_UI).pack(side=tk.LEFT)
+        afficher()
+
+    def convertir_kbi(self):
+        source = filedialog.askopenfilename(title="🗜️ Image .kbi v1 à convertir",
+                                            filetypes=[("Images Kerberos", "*.kbi"), ("Tous", "*.*")])
+        if not source:
+            return
+        if est_kbi2(source):
+            messagebox.showinfo("ℹ️", "Cette image est déjà au format v2.")
+            return
+        try:
+            dest = convertir_kbi_v1_vers_v2(source)
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            messagebox.showerror("❌ Échec", f"Conversion impossible :\n{e}")
+            return
+        self.last_kbi = dest
+        self.console.insert(tk.END, f"\n🗜️ Converti : {source} → {dest} "
+                                    f"({os.path.getsize(source)} → {os.path.getsize(dest)} octets)\n")
+
+    def doublons(self):
+        if not self.selected_path or not os.path.isdir(self.selected_path):
+            messagebox.showwarning("⚠️", "Sélectionnez d’abord un dossier avec [📂 Choisir dossier].")
+            return
+        if self._occupe():
+            return
+        racine = self.selected_path
+        # sha1-4k ne couvre que le début des fichiers : l’étape finale exige le contenu complet
+        mode = self.empreinte.get() if self.empreinte.get() != "sha1-4k" else "sha256"
+        image = self.last_kbi if self.last_kbi and os.path.exists(self.last_kbi) else None
+        ordonnanceur = OrdonnanceurES(forcer=self.type_disque.get())
+        exclusions = self._exclusions()
+        if exclusions is False:
+            return
+        self.console.insert(tk.END, f"\n👯 Recherche de doublons : {racine} (empreinte {mode})\n")
+        if image:
+            self.console.insert(tk.END, f"   ♻️ Empreintes reprises de {image} si même cible\n")
+
+        def travail(emettre, etat):
+            groupes, stats = trouver_doublons(racine, etat=etat, image=image, mode=mode, ordonnanceur=ordonnanceur,
+                                              exclusions=exclusions)
+            for ligne in resume_doublons(groupes, stats) + etat.mesures.resume():
+                emettre(ligne)
+
+        self._lancer(travail, **self._instrumentation("kerberos_doublons"))
+
     def analyser(self):
         cibles = [d for d, v in self.vars.items() if v.get()]
         if not cibles and self.lecteurs:
@@ -431,6 +4695,121 @@ Crédits : Victor Pozen • (-; — https://github.com/victorpozen/kerberos
             return
         self.generer_rapport(cibles if cibles else ["C:\\"], full=True, analyze_py=False)
 
+    def explorer(self):
+        if self.selected_path:
+            racines = [self.selected_path]
+        else:
+            racines = [d for d, v in self.vars.items() if v.get() and os.path.isdir(d)]
+        if not racines:
+            messagebox.showwarning("Sélection requise", "Choisissez un dossier ou cochez un lecteur.")
+            return
+        exclusions = self._exclusions()
+        if exclusions is False:
+            return
+        ExplorateurArbre(self.root, racines, ignore_recycle=self.ignore_recycle.get(),
+                         max_risques=None if self.tous_risques.get() else 1,
+                         avec_cache=self.cache_actif.get(),
+                         ordonnanceur=OrdonnanceurES(forcer=self.type_disque.get()),
+                         exclusions=exclusions)
+
+    def interroger_index(self, max_lignes=1000):
+        """Panneau de recherche dans l’index des scans (requêtes sur index : quelques ms)."""
+        if not os.path.exists(INDEX_FICHIER):
+            messagebox.showinfo("ℹ️", f"Aucun index ({INDEX_FICHIER}).\nLancez d’abord un scan ou une image.")
+            return
+        index = ouvrir_index()
+        if index is None:
+            messagebox.showerror("❌", f"Index illisible : {INDEX_FICHIER}")
+            return
+        win = tk.Toplevel(self.root)
+        win.title(f"🗂️ Index des scans — {INDEX_FICHIER}")
+        win.geometry("960x600")
+        win.configure(bg="#0d0d0d")
+        win.protocol("WM_DELETE_WINDOW", lambda: (index.fermer(), win.destroy()))
+        tk.Label(win, text=index.resume(), fg="#88ccff", bg="#0d0d0d",
+                 font=("Consolas", 9)).pack(anchor="w", padx=8, pady=(8, 0))
+        champs = {}
+        barre = tk.Frame(win, bg="#0d0d0d")
+        barre.pack(fill=tk.X, padx=8, pady=4)
+        for cle, etiquette, largeur in (("sous", "📂 Sous :", 30), ("ext", "Ext :", 6), ("regle", "⚠️ Règle :", 12),
+                                        ("module", "📦 Import :", 12)):
+            tk.Label(barre, text=etiquette, fg=FG, bg="#0d0d0d", font=FONT_UI).pack(side=tk.LEFT)
+            champs[cle] = tk.Entry(barre, width=largeur, bg="#2d2d2d", fg=FG, insertbackground=FG, font=FONT_MONO)
+            champs[cle].pack(side=tk.LEFT, padx=(2, 8))
+        if self.selected_path:
+            champs["sous"].insert(0, self.selected_path)
+        tri = tk.StringVar(value="chemin")
+        ttk.Combobox(barre, textvariable=tri, values=["chemin", "taille"], state="readonly", width=7,
+                     font=FONT_UI).pack(side=tk.LEFT, padx=4)
+        txt = scrolledtext.ScrolledText(win, bg="#0a0a0a", fg=FG, font=("Consolas", 9))
+        txt.pack(fill="both", expand=True, padx=8, pady=(0, 8))
+        max_risques = None if self.tous_risques.get() else 1
+
+        def chercher(_event=None):
+            criteres = {cle: champ.get().strip() or None for cle, champ in champs.items()}
+            t0 = time.perf_counter()
+            try:
+                resultats = index.chercher(tri=tri.get(), limite=max_lignes, **criteres)
+            except sqlite3.Error as e:
+                messagebox.showerror("❌", f"Requête impossible :\n{e}", parent=win)
+                return
+            duree = time.perf_counter() - t0
+            txt.configure(state="normal")
+            txt.delete("1.0", tk.END)
+            for e in resultats:
+                txt.insert(tk.END, ligne_index(e, max_risques) + "\n")
+            if not resultats:
+                txt.insert(tk.END, "∅ Aucune entrée pour ces critères.\n")
+            elif len(resultats) >= max_lignes:
+                txt.insert(tk.END, f"[...] (affichage limité à {max_lignes} entrées)\n")
+            txt.insert(tk.END, f"\n🗂️ {len(resultats)} résultat(s) en {duree * 1000:.1f} ms\n")
+            txt.configure(state="disabled")
+
+        for champ in champs.values():
+            champ.bind("<Return>", chercher)
+        tk.Button(barre, text="Chercher", command=chercher, bg="#2d2d2d", fg="white", font=FONT_UI).pack(side=tk.LEFT)
+        chercher()
+
+    def veille(self):
+        if not self.selected_path or not os.path.isdir(self.selected_path):
+            messagebox.showwarning("⚠️", "Sélectionnez d’abord un dossier avec [📂 Choisir dossier].")
+            return
+        if self._occupe():
+            return
+        exclusions = self._exclusions()
+        if exclusions is False:
+            return
+        racine = self.selected_path
+        ignore_recycle = self.ignore_recycle.get()
+        max_risques = None if self.tous_risques.get() else 1
+        avec_cache = self.cache_actif.get()
+        ordonnanceur = OrdonnanceurES(forcer=self.type_disque.get())
+        self.console.delete(1.0, tk.END)
+        self.console.insert(tk.END, f"👁️ Veille de : {racine}\n   ([⛔ Annuler] pour l’arrêter)\n\n")
+
+        def travail(emettre, etat):
+            cache = ouvrir_cache() if avec_cache else None
+            veille = Veille(racine, ignore_recycle=ignore_recycle, exclusions=exclusions, cache=cache,
+                            ordonnanceur=ordonnanceur)
+            try:
+                veille.demarrer(etat)
+                emettre(veille.resume())
+                emettre("   .py à risque nouveaux ou modifiés depuis le début de la veille :")
+                emettre.vider()
+                while True:
+                    total = veille.total()
+                    for c in veille.etape(etat):
+                        emettre(ligne_changement(c, max_risques))
+                    if veille.total() != total:
+                        emettre("   " + veille.resume())
+                    emettre.vider()
+            finally:
+                veille.fermer()
+                if cache:
+                    cache.fermer()
+
+        self._lancer(travail)
+
     def choisir_dossier(self):
         dossier = filedialog.askdirectory(title="📂 Choisir un dossier à analyser / imager")
         if dossier:
@@ -440,55 +4819,652 @@ Crédits : Victor Pozen • (-; — https://github.com/victorpozen/kerberos
             self.console.insert(tk.END, "   ➤ Utilisez [📸 Créer image] ou [🔍 Prescan] avec ce dossier.\n")
 
     def generer_rapport(self, cibles, full=False, analyze_py=True):
+        if self._occupe():
+            return
+        exclusions = self._exclusions()
+        if exclusions is False:
+            return
+        budget = self._budget()
+        if budget is False:
+            return
         self.console.delete(1.0, tk.END)
         mode = "FULL (sans analyse .py)" if full else "standard"
-        self.console.insert(tk.END, f"🚀 Génération du rapport {mode}… (patientez)\n\n")
+        self.console.insert(tk.END, f"🚀 Génération du rapport {mode}…\n\n")
 
-        lignes = []
-        lignes.append("=" * 60)
-        lignes.append("RAPPORT KERBEROS – ANALYSE DE DISQUES v2.4+deep")
-        lignes.append("=" * 60)
-        lignes.append(f"Date : {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        lignes.append(f"Système : {platform.system()} {platform.release()}")
+        # Variables Tk lues ici : le thread de scan ne touche jamais à Tk
         prof_reelle = MAX_DEPTH_FULL if full or self.deep_scan.get() else MAX_DEPTH
-        lignes.append(f"Profondeur : {prof_reelle} (max)")
-        lignes.append("Corbeille exclue : " + ("Oui" if self.ignore_recycle.get() else "Non"))
-        lignes.append("Licence : GNU GPLv3 – https://www.gnu.org/licenses/gpl-3.0.html")
-        lignes.append("Code : https://github.com/victorpozen/kerberos")
-        lignes.append("=" * 60)
-        lignes.append("")
+        ignore_recycle = self.ignore_recycle.get()
+        nom = "rapport_full_scan.txt" if full else "rapport_disques_profond.txt"
+        workers = self._py_workers()
+        max_risques = None if self.tous_risques.get() else 1
+        avec_cache = self.cache_actif.get() and analyze_py
+        avec_index = self.index_actif.get()
+        ordonnanceur = OrdonnanceurES(forcer=self.type_disque.get())
+        reprise = None
+        if not budget:
+            # Points de reprise à côté du rapport ; un scan interrompu (crash, fenêtre fermée,
+            # redémarrage, annulation) laisse son rapport partiel (.tmp) et son dernier point
+            reprise = PointsReprise(nom + ".reprise.json",
+                                    signature_rapport(cibles, prof_reelle, analyze_py, ignore_recycle, max_risques,
+                                                      exclusions))
+            point = reprise.charger() if os.path.exists(nom + ".tmp") else None
+            if point:
+                choix = messagebox.askyesnocancel(
+                    "♻️ Reprise", f"Un scan interrompu ({point['date']}) peut être repris.\n\n"
+                                 "Oui : reprendre au dernier point\nNon : recommencer depuis le début")
+                if choix is None:
+                    return
+                if not choix:
+                    reprise.donnees = None
+                else:
+                    self.console.insert(tk.END, f"♻️ Reprise au point du {point['date']} "
+                                                f"(la console n’affiche que la suite ; rapport complet : {nom})\n\n")
 
-        for cible in cibles:
-            lignes.append(f"\n{'='*60}\nCIBLE : {cible}\n{'='*60}")
-            if os.path.exists(cible) and len(cible) == 3 and cible[1:] == ":\\": 
-                lignes.append(f"📊 Espace : {espace_disque_win(cible)}")
-            else:
-                lignes.append("📊 Espace : N/A")
-            lignes.append("\nArborescence :")
-            lignes.extend(arbre_securise(
-                cible,
-                max_prof=prof_reelle,
-                ignore_recycle=self.ignore_recycle.get(),
-                limit_per_dir=MAX_ITEMS_PER_DIR,
-                analyze_py=analyze_py
-            ))
-            lignes.append("")
-
-        lignes.append("✅ Rapport généré – Projet Kerberos (GPLv3)")
-        rapport = "\n".join(lignes)
-        self.console.insert(tk.END, rapport)
-
-        try:
-            nom = "rapport_full_scan.txt" if full else "rapport_disques_profond.txt"
-            with open(nom, "w", encoding="utf-8") as f:
-                f.write(rapport)
+        def travail(emettre, etat):
+            cache = ouvrir_cache() if avec_cache else None
+            index = ouvrir_index() if avec_index else None
+            try:
+                return produire(emettre, etat, cache, index)
+            finally:
+                if cache:
+                    cache.fermer()
+                if index:
+                    index.fermer()
+
+        def produire(emettre, etat, cache, index):
+            # Rapport écrit sur disque au fil du scan (.tmp renommé à la fin : l’ancien reste intact
+            # si le scan échoue) ; aucune copie complète en mémoire
+            fichier, erreur, sep = None, None, ""
+            try:
+                if reprise and reprise.donnees:
+                    tronquer_rapport(nom + ".tmp", reprise.donnees["rapport_octets"])
+                    fichier = open(nom + ".tmp", "a", encoding="utf-8")
+                    sep = "\n" if reprise.donnees["rapport_octets"] else ""
+                else:
+                    fichier = open(nom + ".tmp", "w", encoding="utf-8")
+            except OSError as e:
+                erreur = e
+                if reprise:
+                    reprise.donnees = None
+            if reprise:
+                reprise.fichier = fichier
+
+            def sortie(ligne):
+                nonlocal sep, fichier, erreur
+                emettre(ligne)
+                if fichier:
+                    try:
+                        fichier.write(sep + ligne)
+                    except OSError as e:
+                        try:
+                            fichier.close()
+                        except OSError:
+                            pass
+                        fichier, erreur = None, e
+                        if reprise:
+                            reprise.fichier = None  # plus de rapport sur disque : plus de points
+                sep = "\n"
+
+            try:
+                produire_rapport(cibles, sortie, etat, prof=prof_reelle, ignore_recycle=ignore_recycle,
+                                 analyze_py=analyze_py, workers=workers, max_risques=max_risques, cache=cache,
+                                 ordonnanceur=ordonnanceur, exclusions=exclusions, index=index, budget=budget,
+                                 reprise=reprise)
+            except BaseException:
+                if fichier:
+                    fichier.close()
+                    if not (reprise and os.path.exists(reprise.chemin)):
+                        try:
+                            os.remove(nom + ".tmp")
+                        except OSError:
+                            pass
+                raise
+            if reprise:
+                reprise.effacer()
+            if fichier is None:
+                return erreur
+            try:
+                fichier.close()
+                os.replace(nom + ".tmp", nom)
+            except OSError as e:
+                return e
+            return None
+
+        def fin(erreur):
+            if erreur is not None:
+                self.console.insert(tk.END, f"\n\n⚠️ Erreur sauvegarde : {erreur}")
+                return
             self.console.insert(tk.END, f"\n\n💾 Sauvegardé : {nom}")
             messagebox.showinfo("✅ Succès", f"Analyse {mode} terminée !\nRapport : {nom}")
-        except Exception as e:
-            self.console.insert(tk.END, f"\n\n⚠️ Erreur sauvegarde : {e}")
 
-# === LANCEMENT ===
-if __name__ == "__main__":
+        self._lancer(travail, fin, **self._instrumentation(os.path.splitext(nom)[0]))
+
+    def _budget(self):
+        """Budget en secondes saisi → Budget, None (champ vide : limites fixes)
+        ou False si la saisie est invalide (message affiché, rien n’est lancé)."""
+        texte = self.budget_secondes.get().strip().replace(",", ".")
+        if not texte:
+            return None
+        try:
+            secondes = float(texte)
+        except ValueError:
+            secondes = -1
+        if secondes <= 0:
+            messagebox.showerror("❌ Budget", f"Budget invalide : « {texte} » (secondes > 0, ou vide)")
+            return False
+        return Budget(secondes)
+
+    def _exclusions(self):
+        """Règles d’élagage selon la case cochée → Exclusions, None (désactivées)
+        ou False si le fichier de règles est invalide (message affiché, rien n’est lancé)."""
+        if not self.exclusions_actives.get():
+            return None
+        try:
+            return charger_exclusions()
+        except (OSError, ValueError) as e:
+            messagebox.showerror("❌ Exclusions", f"{EXCLUSIONS_FICHIER} invalide :\n{e}")
+            return False
+
+    def editer_exclusions(self):
+        """Éditeur des règles : validées (compilation) avant d’être écrites dans EXCLUSIONS_FICHIER."""
+        try:
+            with open(EXCLUSIONS_FICHIER, "r", encoding="utf-8") as f:
+                texte = f.read()
+        except FileNotFoundError:
+            texte = EXCLUSIONS_DEFAUT
+        except OSError as e:
+            messagebox.showerror("❌", f"Lecture impossible :\n{e}")
+            return
+        win = tk.Toplevel(self.root)
+        win.title(f"✂️ Règles d’exclusion — {EXCLUSIONS_FICHIER}")
+        win.geometry("640x480")
+        win.configure(bg="#0d0d0d")
+        txt = scrolledtext.ScrolledText(win, bg="#0a0a0a", fg=FG, insertbackground=FG, font=FONT_MONO)
+        txt.pack(fill="both", expand=True, padx=8, pady=(8, 4))
+        txt.insert("1.0", texte)
+        barre = tk.Frame(win, bg="#0d0d0d")
+        barre.pack(fill=tk.X, padx=8, pady=(0, 8))
+
+        def enregistrer():
+            contenu = txt.get("1.0", "end-1c")
+            try:
+                regles = Exclusions(contenu)
+                with open(EXCLUSIONS_FICHIER, "w", encoding="utf-8") as f:
+                    f.write(contenu)
+            except (OSError, ValueError) as e:
+                messagebox.showerror("❌ Exclusions", f"Règles non enregistrées :\n{e}", parent=win)
+                return
+            self.console.insert(tk.END, f"\n✂️ {len(regles)} règle(s) d’exclusion enregistrée(s) : {EXCLUSIONS_FICHIER}\n")
+            win.destroy()
+
+        def defauts():
+            txt.delete("1.0", tk.END)
+            txt.insert("1.0", EXCLUSIONS_DEFAUT)
+
+        tk.Button(barre, text="💾 Enregistrer", command=enregistrer, bg="#004d00", fg="white",
+                  font=FONT_UI).pack(side=tk.LEFT, padx=4)
+        tk.Button(barre, text="↺ Défauts", command=defauts, bg="#2d2d2d", fg="white",
+                  font=FONT_UI).pack(side=tk.LEFT, padx=4)
+
+    def _instrumentation(self, base):
+        """Options de _lancer selon les cases cochées : chemins du profil cProfile et des mesures JSON."""
+        return {"profil": base + ".prof" if self.profiler.get() else None,
+                "mesures_json": base + ".mesures.json" if self.mesures_json.get() else None}
+
+    def _py_workers(self):
+        try:
+            return max(1, int(self.py_workers.get()))
+        except (tk.TclError, ValueError):
+            return PY_WORKERS
+
+    # --- Exécution en arrière-plan ---
+    def _occupe(self):
+        if self.tache and self.tache.is_alive():
+            messagebox.showwarning("⏳ Scan en cours", "Un scan est déjà en cours.\nAttendez la fin ou cliquez sur [⛔ Annuler].")
+            return True
+        return False
+
+    def _lancer(self, travail, fin=None, echec=None, profil=None, mesures_json=None):
+        """Exécute travail(emettre, etat) sur un thread ; fin/echec sont rappelés côté Tk.
+        profil : fichier .prof (cProfile du thread de scan) ; mesures_json : etat.mesures en fin de tâche."""
+        self.etat = EtatScan()
+        self.file = queue.Queue()
+        flux = FluxLignes(self.file)
+        etat, file = self.etat, self.file
+
+        def cible():
+            try:
+                if profil:
+                    resultat = executer_profile(profil, travail, flux, etat)
+                else:
+                    resultat = travail(flux, etat)
+                flux.vider()
+                file.put(("fin", resultat))
+            except ScanAnnule:
+                flux.vider()
+                file.put(("annule", None))
+            except Exception as e:
+                flux.vider()
+                file.put(("erreur", e))
+
+        self._fin, self._echec, self._mesures_json, self._profil = fin, echec, mesures_json, profil
+        self.btn_annuler.configure(state=tk.NORMAL)
+        self.tache = threading.Thread(target=cible, daemon=True)
+        self.tache.start()
+        self.root.after(100, self._pomper)
+
+    def _pomper(self):
+        termine = None
+        for _ in range(50):  # borne par tick : l’UI reste réactive même sous un flot de lignes
+            try:
+                genre, valeur = self.file.get_nowait()
+            except queue.Empty:
+                break
+            if genre == "lignes":
+                depart = Mesures.top_depart()
+                self.console.insert(tk.END, "\n".join(valeur) + "\n")
+                # Console bornée : les plus anciennes lignes partent (rapport complet sur disque)
+                exces = int(self.console.index("end-1c").split(".")[0]) - CONSOLE_MAX_LIGNES
+                if exces > 0:
+                    self.console.delete("1.0", f"{exces + 1}.0")
+                self.console.see(tk.END)
+                self.etat.mesures.fin("rendu_tk", depart)
+            else:
+                termine = (genre, valeur)
+                break
+        self.progression.configure(text=self.etat.progression())
+        if termine is None:
+            self.root.after(100, self._pomper)
+            return
+        self.btn_annuler.configure(state=tk.DISABLED)
+        genre, valeur = termine
+        if self._profil and genre != "erreur":
+            self.console.insert(tk.END, f"\n🧪 Profil cProfile : {self._profil}\n")
+        if genre == "fin":
+            if self._mesures_json:
+                try:
+                    self.etat.mesures.ecrire_json(self._mesures_json)
+                    self.console.insert(tk.END, f"\n📈 Mesures : {self._mesures_json}\n")
+                except OSError as e:
+                    self.console.insert(tk.END, f"\n⚠️ Mesures non enregistrées : {e}\n")
+            if self._fin:
+                self._fin(valeur)
+        elif genre == "annule":
+            self.console.insert(tk.END, "\n⛔ Scan annulé par l’utilisateur.\n")
+        elif self._echec:
+            self._echec(valeur)
+        else:
+            self.console.insert(tk.END, f"\n❌ Erreur pendant le scan : {valeur}\n")
+            messagebox.showerror("❌ Erreur", f"{type(valeur).__name__}: {valeur}")
+
+    def annuler(self):
+        if self.tache and self.tache.is_alive():
+            self.etat.annulation.set()
+            self.progression.configure(text="⛔ Annulation en cours…")
+
+# === LIGNE DE COMMANDE (sans interface) ===
+# python "analyseur_disques_profond…py.py" scan C:\ D:\ --format ndjson > rapport.ndjson
+# N’importe jamais tkinter : utilisable en tâche planifiée, en SSH, sur machine sans écran.
+def _parseur_cli():
+    import argparse
+    p = argparse.ArgumentParser(
+        prog="kerberos",
+        description="Kerberos – analyse de disques en ligne de commande (GPLv3). Sans argument : interface Tk.")
+    p.add_argument("--version", action="version", version=f"Kerberos v2.4+deep (analyseur {ANALYSEUR_VERSION})")
+    commun = argparse.ArgumentParser(add_help=False)
+    commun.add_argument("--format", choices=["texte", "ndjson"], default="texte",
+                        help="texte (comme le rapport) ou ndjson (un objet JSON par ligne)")
+    commun.add_argument("--disque", choices=["auto", "hdd", "ssd"], default=TYPE_DISQUE,
+                        help="type de disque pour l’ordonnanceur d’E/S")
+    analyse = argparse.ArgumentParser(add_help=False)
+    analyse.add_argument("--workers", type=int, default=PY_WORKERS, help="processus d’analyse .py")
+    analyse.add_argument("--tous-risques", action="store_true", help="lister tous les risques de chaque .py")
+    analyse.add_argument("--sans-cache", action="store_true", help=f"ne pas utiliser {CACHE_FICHIER}")
+    analyse.add_argument("--garder-corbeille", action="store_true", help="ne pas exclure $RECYCLE.BIN")
+    instrum = argparse.ArgumentParser(add_help=False)
+    instrum.add_argument("--mesures", metavar="FICHIER.json", help="écrit les mesures détaillées du scan")
+    instrum.add_argument("--cprofile", metavar="FICHIER.prof", help="exécute sous cProfile (python -m pstats)")
+    elagage = argparse.ArgumentParser(add_help=False)
+    elagage.add_argument("--exclusions", metavar="FICHIER", default=EXCLUSIONS_FICHIER,
+                         help=f"règles d’exclusion (défaut {EXCLUSIONS_FICHIER}, sinon règles intégrées)")
+    elagage.add_argument("--sans-exclusions", action="store_true", help="aucun sous-arbre élagué")
+    budget = argparse.ArgumentParser(add_help=False)
+    budget.add_argument("--budget-temps", type=float, metavar="S",
+                        help="parcours par priorités arrêté après S secondes par cible (remplace la profondeur)")
+    budget.add_argument("--budget-entrees", type=int, metavar="N", help="… ou après N entrées listées")
+    budget.add_argument("--budget-mo", type=float, metavar="MO", help="… ou après MO Mo de .py lus")
+    sous = p.add_subparsers(dest="commande", required=True)
+
+    c = sous.add_parser("scan", parents=[commun, analyse, instrum, elagage, budget], help="rapport complet d’une ou plusieurs cibles")
+    c.add_argument("cibles", nargs="+")
+    c.add_argument("--full", action="store_true", help=f"profondeur {MAX_DEPTH_FULL}, sans analyse .py")
+    c.add_argument("--profondeur", type=int, help=f"profondeur max (défaut {MAX_DEPTH})")
+    c.add_argument("--rapport", metavar="FICHIER", help="écrit aussi le rapport texte dans FICHIER")
+    c.add_argument("--sans-index", action="store_true", help=f"ne pas enregistrer le scan dans {INDEX_FICHIER}")
+    c.add_argument("--reprise", action="store_true",
+                   help="points de reprise dans FICHIER.reprise.json (avec --rapport) ; "
+                        "reprend le scan interrompu s’il en existe un pour les mêmes options")
+    c.add_argument("--reprise-intervalle", type=float, default=REPRISE_INTERVALLE, metavar="S",
+                   help="s entre deux points de reprise (défaut %(default)s)")
+
+    c = sous.add_parser("prescan", parents=[commun, analyse, instrum, elagage, budget], help="aperçu rapide (profondeur 2, 50 éléments)")
+    c.add_argument("dossier")
+
+    c = sous.add_parser("image", parents=[commun, instrum, elagage], help="image .kbi d’un dossier (+ .sha256)")
+    c.add_argument("dossier")
+    c.add_argument("--sortie", help="fichier .kbi (défaut : kerb_image_<dossier>.kbi)")
+    c.add_argument("--v2", action="store_true", help="format binaire indexé")
+    c.add_argument("--incremental", action="store_true", help="réutilise le .kbi précédent")
+    c.add_argument("--empreinte", choices=list(EMPREINTES), default="sha1-4k")
+    c.add_argument("--sans-index", action="store_true", help=f"ne pas enregistrer l’image dans {INDEX_FICHIER}")
+
+    c = sous.add_parser("doublons", parents=[commun, instrum, elagage], help="fichiers identiques (taille → 4 Ko → contenu)")
+    c.add_argument("dossier")
+    c.add_argument("--image", metavar="FICHIER.kbi", help="reprend les empreintes d’une image de ce dossier")
+    c.add_argument("--empreinte", choices=["sha256", "blake2b"], default="sha256", help="empreinte du contenu complet")
+    c.add_argument("--taille-min", type=int, default=1, help="ignore les fichiers plus petits (octets)")
+    c.add_argument("--profondeur", type=int, default=MAX_DEPTH_FULL, help=f"profondeur max (défaut {MAX_DEPTH_FULL})")
+    c.add_argument("--max-elements", type=int, default=MAX_ITEMS_PER_DIR, help="entrées lues par dossier")
+    c.add_argument("--max-groupes", type=int, default=50, help="groupes listés en sortie texte")
+
+    c = sous.add_parser("veille", parents=[commun, instrum, elagage], help="suit les changements d’un dossier (.py à risque)")
+    c.add_argument("dossier")
+    c.add_argument("--intervalle", type=float, default=VEILLE_INTERVALLE, help="s entre deux passes (défaut %(default)s)")
+    c.add_argument("--duree", type=float, help="arrêt après N s (défaut : jusqu’à Ctrl+C)")
+    c.add_argument("--scrutation", action="store_true", help="sans inotify : taille + mtime relus par lots")
+    c.add_argument("--profondeur", type=int, default=MAX_DEPTH_FULL, help=f"profondeur max (défaut {MAX_DEPTH_FULL})")
+    c.add_argument("--tous-risques", action="store_true", help="lister tous les risques de chaque .py")
+    c.add_argument("--sans-cache", action="store_true", help=f"ne pas utiliser {CACHE_FICHIER}")
+    c.add_argument("--garder-corbeille", action="store_true", help="ne pas exclure $RECYCLE.BIN")
+
+    c = sous.add_parser("index", parents=[commun], help=f"interroge l’index des scans ({INDEX_FICHIER})")
+    c.add_argument("--base", default=INDEX_FICHIER, help="fichier d’index (défaut %(default)s)")
+    c.add_argument("--sous", metavar="DOSSIER", help="entrées situées sous ce dossier")
+    c.add_argument("--ext", help="extension (.py, .dll…)")
+    c.add_argument("--regle", help="constat .py dont le message contient ce texte (ex. subprocess)")
+    c.add_argument("--import", dest="module", metavar="MODULE", help="fichiers qui importent ce module")
+    c.add_argument("--genre", choices=["fichiers", "dossiers"], help="seulement les fichiers / les dossiers")
+    c.add_argument("--taille-min", type=int, help="taille minimale (octets)")
+    c.add_argument("--tri", choices=["chemin", "taille"], default="chemin")
+    c.add_argument("--limite", type=int, default=100, help="résultats au plus (défaut %(default)s)")
+    c.add_argument("--tous-risques", action="store_true", help="lister tous les constats de chaque .py")
+
+    c = sous.add_parser("verify", parents=[commun], help="contrôle des images .kbi contre leur .sha256")
+    c.add_argument("images", nargs="+")
+    return p
+
+class _SortieCli:
+    """Lignes du rapport vers stdout : texte brut ou NDJSON ({"type": "ligne"|"py"|…})."""
+    def __init__(self, ndjson, rapport=None):
+        self.ndjson = ndjson
+        self.rapport = rapport
+
+    def ecrire(self, objet):
+        sys.stdout.write(json.dumps(objet, ensure_ascii=False) + "\n")
+
+    def __call__(self, ligne):
+        if self.rapport:
+            self.rapport.write(ligne + "\n")
+        if self.ndjson:
+            self.ecrire({"type": "ligne", "texte": ligne})
+        else:
+            sys.stdout.write(ligne + "\n")
+
+    def py(self, entree, resultat):
+        statut, imports, risques = resultat
+        self.ecrire({"type": "py", "chemin": entree.chemin, "statut": statut, "imports": imports,
+                     "risques": [list(r) for r in risques]})
+
+    def message(self, texte, **champs):
+        if self.ndjson:
+            self.ecrire(champs)
+        else:
+            sys.stdout.write(texte + "\n")
+
+def _budget_cli(args):
+    if args.budget_temps is None and args.budget_entrees is None and args.budget_mo is None:
+        return None
+    return Budget(args.budget_temps, args.budget_entrees,
+                  None if args.budget_mo is None else int(args.budget_mo * (1 << 20)))
+
+def _ouvrir_rapport_cli(args):
+    """(fichier du rapport ou None, PointsReprise ou None). Avec --reprise et un point compatible,
+    le rapport partiel est tronqué à la longueur notée puis ouvert en ajout."""
+    if not getattr(args, "rapport", None):
+        return None, None
+    if not args.reprise:
+        return open(args.rapport, "w", encoding="utf-8"), None
+    prof = args.profondeur or (MAX_DEPTH_FULL if args.full else MAX_DEPTH)
+    reprise = PointsReprise(args.rapport + ".reprise.json",
+                            signature_rapport(args.cibles, prof, not args.full, not args.garder_corbeille,
+                                              None if args.tous_risques else 1, args.regles),
+                            args.reprise_intervalle)
+    point = reprise.charger()
+    if point and os.path.exists(args.rapport):
+        tronquer_rapport(args.rapport, point["rapport_octets"])
+        print(f"♻️ Reprise du scan interrompu (point du {point['date']})", file=sys.stderr)
+        reprise.fichier = open(args.rapport, "a", encoding="utf-8")
+    else:
+        reprise.donnees = None
+        reprise.fichier = open(args.rapport, "w", encoding="utf-8")
+    return reprise.fichier, reprise
+
+def _cli_scan(args, sortie, etat):
+    cibles = args.cibles if args.commande == "scan" else [args.dossier]
+    for c in cibles:
+        if not os.path.isdir(c):
+            print(f"❌ Dossier invalide : {c}", file=sys.stderr)
+            return 2
+    analyze_py = not getattr(args, "full", False)
+    cache = ouvrir_cache() if analyze_py and not args.sans_cache else None
+    options = dict(ignore_recycle=not args.garder_corbeille, analyze_py=analyze_py, workers=max(1, args.workers),
+                   max_risques=None if args.tous_risques else 1, cache=cache,
+                   ordonnanceur=OrdonnanceurES(forcer=args.disque),
+                   rapporter=sortie.py if sortie.ndjson else None, exclusions=args.regles)
+    index = ouvrir_index() if args.commande == "scan" and not args.sans_index else None
+    budget = _budget_cli(args)
+    try:
+        if args.commande == "prescan":
+            if budget:
+                options.pop("workers")
+                arbre_budgete(args.dossier, budget, sortie, etat=etat, **options)
+            else:
+                arbre_securise(args.dossier, max_prof=2, limit_per_dir=50, sortie=sortie, etat=etat, **options)
+            sortie("")
+            if cache:
+                sortie(cache.resume())
+            etat.mesures.terminer(etat)
+            for ligne in etat.mesures.resume():
+                sortie(ligne)
+        else:
+            prof = args.profondeur or (MAX_DEPTH_FULL if args.full else MAX_DEPTH)
+            produire_rapport(cibles, sortie, etat, prof=prof, index=index, budget=budget, reprise=args.points_reprise,
+                             **options)
+            if args.points_reprise:
+                args.points_reprise.effacer()
+    finally:
+        if cache:
+            cache.fermer()
+        if index:
+            index.fermer()
+    return 0
+
+def _cli_image(args, sortie, etat):
+    if not os.path.isdir(args.dossier):
+        print(f"❌ Dossier invalide : {args.dossier}", file=sys.stderr)
+        return 2
+    if args.sortie:
+        chemin = args.sortie
+    else:
+        basename = os.path.basename(os.path.abspath(args.dossier).strip(":\\/")) or "racine"
+        chemin = f"kerb_image_{basename.lower().replace(' ', '_')}{'.v2.kbi' if args.v2 else '.kbi'}"
+    index = None if args.sans_index else ouvrir_index()
+    try:
+        chemin, stats = ecrire_image_kbi(args.dossier, chemin, etat=etat, incremental=args.incremental,
+                                         format_kbi=2 if args.v2 else 1, empreinte=args.empreinte,
+                                         ordonnanceur=OrdonnanceurES(forcer=args.disque), exclusions=args.regles,
+                                         index=index)
+    finally:
+        if index:
+            index.fermer()
+    texte = (f"📸 Image générée : {chemin} (+ .sha256)\n"
+             f"   ♻️ {stats['reutilises']} empreinte(s) réutilisée(s), {stats['recalcules']} recalculée(s)\n")
+    if "diff" in stats:
+        texte += "   🔀 Diff : +{} / -{} / ~{}\n".format(*stats["diff"])
+    sortie.message(texte + f"   {resume_debit(stats)}", type="image", image=chemin, **stats)
+    if not sortie.ndjson:
+        sortie.message("\n".join(etat.mesures.resume()))
+    return 0
+
+def _cli_doublons(args, sortie, etat):
+    if not os.path.isdir(args.dossier):
+        print(f"❌ Dossier invalide : {args.dossier}", file=sys.stderr)
+        return 2
+    groupes, stats = trouver_doublons(args.dossier, etat=etat, image=args.image, mode=args.empreinte,
+                                      taille_min=args.taille_min, max_prof=args.profondeur,
+                                      limit_per_dir=args.max_elements, ordonnanceur=OrdonnanceurES(forcer=args.disque),
+                                      exclusions=args.regles)
+    if sortie.ndjson:
+        for taille, h, chemins in groupes:
+            sortie.ecrire({"type": "doublon", "taille": taille, "empreinte": h, "chemins": chemins})
+        sortie.ecrire({"type": "doublons", **stats})
+        return 0
+    for ligne in resume_doublons(groupes, stats, args.max_groupes) + etat.mesures.resume():
+        sortie(ligne)
+    return 0
+
+def _cli_veille(args, sortie, etat):
+    if not os.path.isdir(args.dossier):
+        print(f"❌ Dossier invalide : {args.dossier}", file=sys.stderr)
+        return 2
+    cache = None if args.sans_cache else ouvrir_cache()
+    veille = Veille(args.dossier, max_prof=args.profondeur, ignore_recycle=not args.garder_corbeille,
+                    exclusions=args.regles, cache=cache, ordonnanceur=OrdonnanceurES(forcer=args.disque),
+                    inotify=not args.scrutation, intervalle=args.intervalle)
+    max_risques = None if args.tous_risques else 1
+
+    def etat_veille():
+        octets, fichiers = veille.total()
+        return dict(type="veille", source=veille.source, dossiers=len(veille.dossiers), fichiers=fichiers,
+                    octets=octets, py=len(veille.resultats), py_risques=len(veille.risques()))
+
+    try:
+        veille.demarrer(etat)
+        sortie.message(veille.resume(), **etat_veille())
+        sys.stdout.flush()
+        fin = time.perf_counter() + args.duree if args.duree else None
+        while fin is None or time.perf_counter() < fin:
+            total = veille.total()
+            for c in veille.etape(etat):
+                if sortie.ndjson:
+                    statut, imports, risques = c.resultat
+                    sortie.ecrire({"type": "changement", "genre": c.genre, "chemin": c.chemin, "statut": statut,
+                                   "imports": imports, "risques": [list(r) for r in risques]})
+                else:
+                    sortie(ligne_changement(c, max_risques))
+            if veille.total() != total:
+                sortie.message("   " + veille.resume(), **etat_veille())
+            sys.stdout.flush()
+    finally:
+        veille.fermer()
+        if cache:
+            cache.fermer()
+    return 0
+
+def _cli_index(args, sortie, etat):
+    if not os.path.exists(args.base):
+        print(f"❌ Index absent : {args.base} (lancez d’abord un scan)", file=sys.stderr)
+        return 2
+    index = ouvrir_index(args.base)
+    if index is None:
+        print(f"❌ Index illisible : {args.base}", file=sys.stderr)
+        return 2
+    try:
+        t0 = time.perf_counter()
+        resultats = index.chercher(sous=args.sous, ext=args.ext, regle=args.regle, module=args.module,
+                                   genre={"fichiers": "F", "dossiers": "D"}.get(args.genre),
+                                   taille_min=args.taille_min, tri=args.tri, limite=args.limite)
+        duree = time.perf_counter() - t0
+        for e in resultats:
+            if sortie.ndjson:
+                sortie.ecrire({"type": "entree", **e, "constats": [list(c) for c in e["constats"]]})
+            else:
+                sortie(ligne_index(e, None if args.tous_risques else 1))
+        sortie.message(f"🗂️ {len(resultats)} résultat(s) en {duree * 1000:.1f} ms — {index.resume()}",
+                       type="index", resultats=len(resultats), ms=duree * 1000)
+    finally:
+        index.fermer()
+    return 0
+
+def _cli_verify(args, sortie, etat):
+    code = 0
+    for chemin in args.images:
+        try:
+            ok, attendu, calcule = verifier_image_kbi(chemin)
+        except OSError as e:
+            sortie.message(f"❓ {chemin} : {e}", type="verify", image=chemin, ok=False, erreur=str(e))
+            code = 1
+            continue
+        if not ok:
+            code = 1
+        sortie.message(f"{'✅' if ok else '❌'} {chemin} : {'intègre' if ok else 'ALTÉRÉE'} ({calcule})",
+                       type="verify", image=chemin, ok=ok, attendu=attendu, calcule=calcule)
+    return code
+
+def kerberos_cli(argv):
+    """Point d’entrée sans interface → code de sortie (0 OK, 1 image altérée, 2 usage, 130 interrompu)."""
+    args = _parseur_cli().parse_args(argv)
+    args.regles = None
+    if hasattr(args, "exclusions") and not args.sans_exclusions:
+        try:
+            args.regles = charger_exclusions(args.exclusions)
+        except (OSError, ValueError) as e:
+            print(f"❌ Exclusions ({args.exclusions}) : {e}", file=sys.stderr)
+            return 2
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(errors="replace")  # console Windows cp1252 : pas de crash sur les emojis
+    if getattr(args, "reprise", False) and not args.rapport:
+        print("❌ --reprise exige --rapport FICHIER", file=sys.stderr)
+        return 2
+    rapport, args.points_reprise = _ouvrir_rapport_cli(args)
+    sortie = _SortieCli(args.format == "ndjson", rapport)
+    commande = {"scan": _cli_scan, "prescan": _cli_scan, "image": _cli_image, "doublons": _cli_doublons,
+                "veille": _cli_veille, "index": _cli_index, "verify": _cli_verify}[args.commande]
+    etat = EtatScan()
+    try:
+        if getattr(args, "cprofile", None):
+            code = executer_profile(args.cprofile, commande, args, sortie, etat)
+        else:
+            code = commande(args, sortie, etat)
+        if args.commande not in ("verify", "index") and code == 0:
+            if sortie.ndjson:
+                sortie.ecrire({"type": "mesures", **etat.mesures.vers_dict()})
+            if args.mesures:
+                etat.mesures.ecrire_json(args.mesures)
+        return code
+    except KeyboardInterrupt:
+        print("\n⛔ Interrompu.", file=sys.stderr)
+        if args.points_reprise and os.path.exists(args.points_reprise.chemin):
+            print("♻️ Point de reprise conservé : relancer la même commande (avec --reprise) pour continuer.",
+                  file=sys.stderr)
+        return 130
+    finally:
+        sys.stdout.flush()
+        if rapport:
+            rapport.close()
+
+def lancer_interface():
+    global tk, ttk, scrolledtext, messagebox, filedialog, webbrowser, MODE_INTERFACE
+    import tkinter as tk
+    from tkinter import ttk, scrolledtext, messagebox, filedialog
+    import webbrowser  # ← liens cliquables
+    MODE_INTERFACE = True
     root = tk.Tk()
     app = KerberosDiskAnalyzer(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+
+# === LANCEMENT ===
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(kerberos_cli(sys.argv[1:]))
+    lancer_interface()
@@ -11,8 +11,11 @@ import traceback
 from datetime import datetime
 import ast
 import re
-import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox, filedialog
+
+# tkinter n’est importé que par lancer_interface() : le mode ligne de commande (scan) tourne
+# sans écran, en SSH ou en tâche planifiée
+tk = ttk = scrolledtext = messagebox = filedialog = None
+MODE_INTERFACE = False  # True une fois la fenêtre Tk lancée (dialogue d’erreur, pause console)
 
 # === GESTIONNAIRE D'ERREUR GLOBAL – KERBEROS v2 ===
 def kerberos_excepthook(exc_type, exc_value, exc_tb):
@@ -28,6 +31,8 @@ def kerberos_excepthook(exc_type, exc_value, exc_tb):
         f.write(err)
     print("💥 ERREUR KERBEROS :\n" + err, file=sys.stderr)
     print(f"📝 Log sauvegardé : {log_path}", file=sys.stderr)
+    if not MODE_INTERFACE:  # ligne de commande / tâche planifiée : ni fenêtre, ni attente clavier
+        return
     try:
         tmp = tk.Tk()
         tmp.withdraw()
@@ -198,6 +203,35 @@ def arbre_securise(racine, prefix="", prof=0, max_prof=4, ignore_recycle=True):
 
     return lignes
 
+# === RAPPORT ===
+def produire_rapport(cibles, ignore_recycle=True, max_prof=MAX_DEPTH):
+    """Texte complet du rapport (partagé par l’interface et la ligne de commande)."""
+    lignes = []
+    lignes.append("=" * 60)
+    lignes.append("RAPPORT KERBEROS – ANALYSE DE DISQUES v2.3")
+    lignes.append("=" * 60)
+    lignes.append(f"Date : {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    lignes.append(f"Système : {platform.system()} {platform.release()}")
+    lignes.append(f"Profondeur : {max_prof}")
+    lignes.append("Corbeille exclue : " + ("Oui" if ignore_recycle else "Non"))
+    lignes.append("Licence : GNU GPLv3 – https://liberapay.com/EthicalKerberos/  ")
+    lignes.append("Code : https://github.com/victorpozen/kerberos")
+    lignes.append("=" * 60)
+    lignes.append("")
+
+    for cible in cibles:
+        lignes.append(f"\n{'='*60}\nCIBLE : {cible}\n{'='*60}")
+        if os.path.exists(cible) and len(cible) == 3 and cible[1:] == ":\\":  # ex: "C:\\"
+            lignes.append(f"📊 Espace : {espace_disque_win(cible)}")
+        else:
+            lignes.append("📊 Espace : N/A (dossier personnalisé)")
+        lignes.append("\nArborescence :")
+        lignes.extend(arbre_securise(cible, max_prof=max_prof, ignore_recycle=ignore_recycle))
+        lignes.append("")
+
+    lignes.append("✅ Rapport généré – Projet Kerberos (GPLv3)")
+    return "\n".join(lignes)
+
 # === INTERFACE KERBEROS – v2.3 ===
 class KerberosDiskAnalyzer:
     def __init__(self, root):
@@ -269,31 +303,7 @@ class KerberosDiskAnalyzer:
         self.console.insert(tk.END, "🔍 Génération du rapport en cours… (patientez)\n\n")
 
         # ✅ Construction hors UI → rapport complet à la fin
-        lignes = []
-        lignes.append("=" * 60)
-        lignes.append("RAPPORT KERBEROS – ANALYSE DE DISQUES v2.3")
-        lignes.append("=" * 60)
-        lignes.append(f"Date : {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        lignes.append(f"Système : {platform.system()} {platform.release()}")
-        lignes.append(f"Profondeur : {MAX_DEPTH}")
-        lignes.append("Corbeille exclue : " + ("Oui" if self.ignore_recycle.get() else "Non"))
-        lignes.append("Licence : GNU GPLv3 – https://liberapay.com/EthicalKerberos/  ")
-        lignes.append("Code : https://github.com/victorpozen/kerberos")
-        lignes.append("=" * 60)
-        lignes.append("")
-
-        for cible in cibles:
-            lignes.append(f"\n{'='*60}\nCIBLE : {cible}\n{'='*60}")
-            if os.path.exists(cible) and len(cible) == 3 and cible[1:] == ":\\":  # ex: "C:\\"
-                lignes.append(f"📊 Espace : {espace_disque_win(cible)}")
-            else:
-                lignes.append("📊 Espace : N/A (dossier personnalisé)")
-            lignes.append("\nArborescence :")
-            lignes.extend(arbre_securise(cible, max_prof=MAX_DEPTH, ignore_recycle=self.ignore_recycle.get()))
-            lignes.append("")
-
-        lignes.append("✅ Rapport généré – Projet Kerberos (GPLv3)")
-        rapport = "\n".join(lignes)
+        rapport = produire_rapport(cibles, self.ignore_recycle.get())
 
         # ✅ Insertion UNIQUE à la fin
         self.console.insert(tk.END, rapport)
@@ -306,8 +316,40 @@ class KerberosDiskAnalyzer:
         except Exception as e:
             self.console.insert(tk.END, f"\n\n⚠️ Erreur sauvegarde : {e}")
 
-# === LANCEMENT ===
-if __name__ == "__main__":
+# === LIGNE DE COMMANDE (sans interface) ===
+# python analyseur_disques_only_py.py scan C:\ D:\ [--rapport rapport.txt]
+def kerberos_cli(argv):
+    import argparse
+    p = argparse.ArgumentParser(prog="analyseur_disques_only_py.py",
+                                description="Kerberos v2.3 — arbre + analyse .py, sans interface")
+    sous = p.add_subparsers(dest="commande", required=True)
+    scan = sous.add_parser("scan", help="rapport des cibles sur la sortie standard")
+    scan.add_argument("cibles", nargs="+")
+    scan.add_argument("--profondeur", type=int, default=MAX_DEPTH)
+    scan.add_argument("--garder-corbeille", action="store_true", help="ne pas exclure $RECYCLE.BIN")
+    scan.add_argument("--rapport", metavar="FICHIER", help="écrit aussi le rapport dans FICHIER")
+    args = p.parse_args(argv)
+    try:
+        rapport = produire_rapport(args.cibles, not args.garder_corbeille, args.profondeur)
+    except KeyboardInterrupt:
+        return 130
+    sys.stdout.write(rapport + "\n")
+    if args.rapport:
+        with open(args.rapport, "w", encoding="utf-8") as f:
+            f.write(rapport)
+    return 0
+
+def lancer_interface():
+    global tk, ttk, scrolledtext, messagebox, filedialog, MODE_INTERFACE
+    import tkinter as tk
+    from tkinter import ttk, scrolledtext, messagebox, filedialog
+    MODE_INTERFACE = True
     root = tk.Tk()
     app = KerberosDiskAnalyzer(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+
+# === LANCEMENT ===
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(kerberos_cli(sys.argv[1:]))
+    lancer_interface()
\ No newline at end of file
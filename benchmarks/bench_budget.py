@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# bench_budget.py — Kerberos : ordre du parcours budgété (priorités) sur un arbre synthétique
+# GPLv3 – Projet Kerberos
+#
+# Usage : python benchmarks/bench_budget.py [--profil petit|moyen|grand] [--entrees 500]
+# Vérifie qu’à bonus propres égaux le parcours budgété reste en largeur : un dossier de
+# profondeur p est toujours listé avant ceux de profondeur p + 1, que l’arbre soit tout récent
+# (dates des dossiers = génération) ou ancien (dates ramenées en 2020). Affiche, pour un budget
+# d’entrées donné, les dossiers listés par niveau. Code de sortie 1 si l’ordre n’est pas respecté.
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+from commun import charger_kerberos
+from synthetique import PROFILS, generer_arbre
+
+DATE_ANCIENNE = 1_577_836_800  # 2020-01-01
+
+def verifier_priorites(kb, niveaux=64):
+    """Chaîne de dossiers identiques (même densité .py, même date) : la priorité (prof - bonus)
+    doit croître strictement d’un niveau à l’autre, que le dossier soit récent ou non."""
+    maintenant = time.time()
+    erreurs = []
+    for titre, mtime in (("récent", maintenant), ("ancien", DATE_ANCIENNE)):
+        for densite in (0.0, 0.5, 1.0):
+            parent = kb._NoeudBudget("r", "r", "", 0)
+            precedente = None
+            for prof in range(1, niveaux + 1):
+                noeud = kb._NoeudBudget("d", "d", "d", prof)
+                noeud.bonus, noeud.elan = kb._bonus_dossier(parent, densite, int(mtime * 1e9), maintenant)
+                priorite = prof - noeud.bonus
+                if precedente is not None and priorite <= precedente:
+                    erreurs.append(f"{titre}, densité {densite} : niveau {prof} ({priorite:.2f}) "
+                                   f"pas après le niveau {prof - 1} ({precedente:.2f})")
+                    break
+                precedente, parent = priorite, noeud
+    return erreurs
+
+def dater(racine, date):
+    for d, _, _ in os.walk(racine, topdown=False):
+        os.utime(d, (date, date))
+
+def niveaux_listes(kb, racine, entrees):
+    """Budget d’entrées → {profondeur: [dossiers listés, dossiers vus]}."""
+    tete, _, _ = kb.parcours_budgete(racine, kb.Budget(entrees=entrees), analyze_py=False, exclusions=None)
+    niveaux, pile = {}, [tete]
+    while pile:
+        n = pile.pop()
+        compte = niveaux.setdefault(n.prof, [0, 0])
+        compte[0] += n.statut == "ok"
+        compte[1] += 1
+        pile.extend(n.dossiers)
+    return niveaux
+
+def main():
+    p = argparse.ArgumentParser(description="Ordre du parcours budgété")
+    p.add_argument("--profil", choices=list(PROFILS), default="moyen")
+    p.add_argument("--entrees", type=int, default=500, help="budget d’entrées listées")
+    args = p.parse_args()
+
+    kb = charger_kerberos()
+    erreurs = verifier_priorites(kb)
+    tmp = tempfile.mkdtemp(prefix="kerb_budget_")
+    try:
+        racine = os.path.join(tmp, "arbre")
+        os.mkdir(racine)
+        generer_arbre(racine, **PROFILS[args.profil])
+        for titre, date in (("récent", None), ("ancien", DATE_ANCIENNE)):
+            if date:
+                dater(racine, date)
+            niveaux = niveaux_listes(kb, racine, args.entrees)
+            print(f"⏱️ Arbre {titre}, budget {args.entrees} entrées : " + " | ".join(
+                f"niveau {prof} : {ok}/{vus}" for prof, (ok, vus) in sorted(niveaux.items())))
+            # En largeur : un niveau n’est entamé que si le précédent est entièrement listé
+            for prof, (ok, _) in sorted(niveaux.items()):
+                precedent = niveaux.get(prof - 1)
+                if ok and precedent and precedent[0] < precedent[1]:
+                    erreurs.append(f"arbre {titre} : niveau {prof} entamé avant la fin du niveau {prof - 1}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if erreurs:
+        print("\n❌ Ordre en largeur non respecté :")
+        for e in erreurs:
+            print(f"   {e}")
+        return 1
+    print("\n✅ Parcours en largeur à bonus égaux")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# bench_demarrage.py — Kerberos : temps de démarrage du mode ligne de commande
+# GPLv3 – Projet Kerberos
+#
+# Usage : python benchmarks/bench_demarrage.py [essais]
+# Mesure `python <script> --version` (import complet + argparse) contre `python -c pass`,
+# le temps d’import seul (bytecode en cache) et vérifie qu’un scan sans interface
+# n’importe jamais tkinter. Code de sortie 1 si un budget est dépassé ou si tkinter est chargé.
+#
+# Lancé directement, le script est recompilé à chaque exécution (CPython ne met pas en
+# cache le bytecode de __main__) : environ 40 ms compris dans BUDGET_CLI_MS.
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import subprocess
+import statistics
+import time
+
+from commun import SCRIPT
+BUDGET_CLI_MS = 120  # surcoût médian de `--version` par rapport à l’interpréteur nu
+BUDGET_IMPORT_MS = 30  # import du module (bytecode en cache), sans la compilation
+INTERDITS = ("tkinter", "webbrowser")
+# Modules lourds à chargement différé : doivent rester des _LazyModule tant qu’inutilisés
+DIFFERES = ("sqlite3", "concurrent.futures", "ast", "hashlib", "json", "platform", "traceback")
+
+SONDE = """
+import sys, time, importlib.util
+t0 = time.perf_counter()
+spec = importlib.util.spec_from_file_location("kerberos", sys.argv[1])
+kb = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(kb)
+duree = (time.perf_counter() - t0) * 1000
+def charges():
+    return sorted(n for n in sys.modules if type(sys.modules[n]).__name__ != "_LazyModule")
+apres_import = charges()
+code = kb.kerberos_cli(sys.argv[2:])
+sys.stdout.flush()
+import json
+sys.stderr.write(json.dumps({"ms": duree, "import": apres_import, "fin": charges(), "code": code}) + "\\n")
+"""
+
+def chrono(cmd, essais):
+    durees = []
+    for _ in range(essais):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        durees.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(durees)
+
+def sonder(*argv):
+    r = subprocess.run([sys.executable, "-c", SONDE, SCRIPT, *argv],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, encoding="utf-8")
+    return json.loads(r.stderr.strip().splitlines()[-1])
+
+def main():
+    essais = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    ok = True
+    nu = chrono([sys.executable, "-c", "pass"], essais)
+    cli = chrono([sys.executable, SCRIPT, "--version"], essais)
+    print(f"🐍 python -c pass          : {nu:7.1f} ms (médiane sur {essais})")
+    print(f"🛡️ kerberos --version      : {cli:7.1f} ms → surcoût {cli - nu:.1f} ms (budget {BUDGET_CLI_MS} ms)")
+    if cli - nu > BUDGET_CLI_MS:
+        print("❌ Budget de démarrage dépassé")
+        ok = False
+
+    tmp = tempfile.mkdtemp(prefix="kerb_demarrage_")
+    try:
+        os.makedirs(os.path.join(tmp, "src"))
+        with open(os.path.join(tmp, "src", "a.py"), "w") as f:
+            f.write("import os\n")
+        sonder("verify", os.path.join(tmp, "absent.kbi"))  # 1er passage : écrit le bytecode en cache
+        imports = []
+        for _ in range(essais):
+            s = sonder("scan", tmp, "--sans-cache", "--sans-index", "--format", "ndjson")
+            imports.append(s["ms"])
+        imp = statistics.median(imports)
+        print(f"📦 import du module         : {imp:7.1f} ms (budget {BUDGET_IMPORT_MS} ms)")
+        if imp > BUDGET_IMPORT_MS:
+            print("❌ Budget d’import dépassé")
+            ok = False
+        pas_charges = [n for n in DIFFERES if n not in s["import"]]
+        print(f"⏳ Différés non chargés à l’import : {', '.join(pas_charges) or '—'}")
+        if len(pas_charges) != len(DIFFERES):
+            print(f"⚠️ Chargés dès l’import : {', '.join(n for n in DIFFERES if n in s['import'])}")
+            ok = False
+        interdits = [n for n in INTERDITS if n in s["fin"]]
+        print(f"🖥️ scan sans interface → modules interdits chargés : {', '.join(interdits) or 'aucun'}")
+        ok = ok and not interdits and s["code"] == 0
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print("✅ Démarrage dans le budget" if ok else "❌ Échec")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+# bench_parcours.py — Kerberos : listdir + isdir/isfile  vs  moteur os.scandir
+# GPLv3 – Projet Kerberos
+#
+# Usage : python benchmarks/bench_parcours.py [dossier]
+# Sans argument, un arbre synthétique est généré dans un dossier temporaire.
+# Les appels système sont comptés au niveau Python (os.stat / os.listdir /
+# os.scandir / DirEntry.stat) : c’est une borne basse, mais la comparaison
+# entre les deux moteurs est à périmètre identique.
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+from commun import charger_kerberos
+from synthetique import generer_arbre
+
+# === COMPTAGE DES APPELS SYSTÈME ===
+class Compteur:
+    def __init__(self):
+        self.appels = {"stat": 0, "listdir": 0, "scandir": 0}
+
+    def total(self):
+        return sum(self.appels.values())
+
+class _EntreeComptee:
+    """Proxy de DirEntry : compte uniquement les stat() réellement émis (DirEntry met en cache)."""
+    __slots__ = ("_e", "_c", "_vu", "name", "path")
+
+    def __init__(self, e, c):
+        self._e, self._c, self._vu = e, c, False
+        self.name, self.path = e.name, e.path
+
+    def is_dir(self, follow_symlinks=True):
+        return self._e.is_dir(follow_symlinks=follow_symlinks)
+
+    def is_file(self, follow_symlinks=True):
+        return self._e.is_file(follow_symlinks=follow_symlinks)
+
+    def stat(self, follow_symlinks=True):
+        if not self._vu:
+            self._c.appels["stat"] += 1
+            self._vu = True
+        return self._e.stat(follow_symlinks=follow_symlinks)
+
+class _ScandirCompte:
+    def __init__(self, it, c):
+        self._it, self._c = it, c
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._it.close()
+
+    def __iter__(self):
+        return (_EntreeComptee(e, self._c) for e in self._it)
+
+def instrumenter(c):
+    orig = os.stat, os.listdir, os.scandir
+
+    def stat(*a, **k):
+        c.appels["stat"] += 1
+        return orig[0](*a, **k)
+
+    def listdir(*a, **k):
+        c.appels["listdir"] += 1
+        return orig[1](*a, **k)
+
+    def scandir(*a, **k):
+        c.appels["scandir"] += 1
+        return _ScandirCompte(orig[2](*a, **k), c)
+
+    os.stat, os.listdir, os.scandir = stat, listdir, scandir
+    return orig
+
+def restaurer(orig):
+    os.stat, os.listdir, os.scandir = orig
+
+# === MOTEUR HISTORIQUE (référence v2.4) ===
+def parcours_listdir(racine, avec_taille):
+    n = 0
+    pile = [racine]
+    while pile:
+        d = pile.pop()
+        try:
+            noms = sorted(os.listdir(d))
+        except OSError:
+            continue
+        for e in noms:
+            chemin = os.path.join(d, e)
+            n += 1
+            if os.path.isdir(chemin):
+                pile.append(chemin)
+            elif os.path.isfile(chemin) and avec_taille:
+                os.path.getsize(chemin)
+    return n
+
+def parcours_scandir(kb, racine, avec_taille):
+    n = 0
+    for genre, _, _, entree in kb.parcourir(racine, max_prof=10**6, limit_per_dir=10**9):
+        if genre == "D":
+            n += 1
+        elif genre == "F":
+            n += 1
+            if avec_taille:
+                entree.taille
+    return n
+
+def mesurer(nom, fn):
+    c = Compteur()
+    orig = instrumenter(c)
+    try:
+        t0 = time.perf_counter()
+        n = fn()
+        dt = time.perf_counter() - t0
+    finally:
+        restaurer(orig)
+    print(f"{nom:<32} {n:>8} entrées  {c.total():>8} appels  "
+          f"{c.total() / max(n, 1):>5.2f} appels/entrée  {dt * 1000:>8.1f} ms   {c.appels}")
+    return c.total() / max(n, 1)
+
+def main():
+    kb = charger_kerberos()
+    tmp = None
+    if len(sys.argv) > 1:
+        racine = sys.argv[1]
+    else:
+        tmp = tempfile.mkdtemp(prefix="kerb_bench_")
+        racine = tmp
+        generer_arbre(racine, largeur=8, profondeur=3, fichiers=20, taille_max=4096)
+    try:
+        print(f"🔍 Benchmark parcours : {racine}  ({sys.platform})\n")
+        for avec_taille in (False, True):
+            titre = "type + taille (image)" if avec_taille else "type seul (arbre)"
+            print(f"--- {titre} ---")
+            a = mesurer("listdir + isdir/isfile", lambda: parcours_listdir(racine, avec_taille))
+            b = mesurer("os.scandir (EntreeFS)", lambda: parcours_scandir(kb, racine, avec_taille))
+            print(f"➡️  gain : {a:.2f} → {b:.2f} appels/entrée\n")
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
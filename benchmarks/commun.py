@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+# commun.py — Kerberos : chargement du script principal pour les benchmarks
+# GPLv3 – Projet Kerberos
+
+import os
+import sys
+import importlib.util
+
+RACINE_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(RACINE_REPO, "analyseur_disques_profond.v1.0+deep.kbi-enabled.py.py")
+
+def charger_kerberos():
+    # Enregistré dans sys.modules : les pools de processus doivent pouvoir retrouver _analyser_lot
+    spec = importlib.util.spec_from_file_location("kerberos", SCRIPT)
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules["kerberos"] = mod
+    spec.loader.exec_module(mod)
+    sys.excepthook = sys.__excepthook__  # pas de log de crash Kerberos pour une erreur de bench
+    return mod
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+# harnais.py — Kerberos : chronométrage par étape + référence JSON + détection de régression
+# GPLv3 – Projet Kerberos
+#
+# Usage :
+#   python benchmarks/harnais.py [--profil petit|moyen|grand] [--repetitions 3]
+#                                [--enregistrer] [--reference FICHIER] [--seuil 0.15]
+# Un arbre synthétique déterministe (synthetique.py) est généré dans un dossier temporaire,
+# chaque étape est exécutée une fois à blanc (cache disque chaud) puis --repetitions fois ;
+# le meilleur temps est retenu. --enregistrer écrit la référence ; sinon, si elle existe,
+# toute étape dont le débit baisse de plus de --seuil fait sortir avec le code 1.
+# Les références dépendent de la machine : elles ne sont pas versionnées.
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+
+from commun import charger_kerberos
+from synthetique import PROFILS, generer_arbre
+
+DOSSIER_REFERENCES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "references")
+
+# === ÉTAPES ===
+# Chaque étape : fonction(kb, racine, fichiers) → quantité traitée ; l’unité sert au débit affiché.
+def etape_parcours(kb, racine, fichiers):
+    return sum(1 for g, _, _, _ in kb.parcourir(racine, max_prof=10**6, limit_per_dir=10**9) if g in "DF")
+
+def etape_arbre(kb, racine, fichiers):
+    return len(kb.arbre_securise(racine, max_prof=64, limit_per_dir=10**9, analyze_py=False))
+
+def etape_analyse_py(kb, racine, fichiers):
+    py = [f for f in fichiers if f.endswith(".py")]
+    for f in py:
+        kb.analyser_fichier_py(f)
+    return len(py)
+
+def etape_arbre_py(kb, racine, fichiers):
+    return len(kb.arbre_securise(racine, max_prof=64, limit_per_dir=10**9, analyze_py=True))
+
+def etape_hachage(kb, racine, fichiers):
+    return sum(kb.hacher_fichier(f, "sha256")[1] for f in fichiers) / (1024 * 1024)
+
+def etape_doublons(kb, racine, fichiers):
+    _, stats = kb.trouver_doublons(racine, max_prof=64, limit_per_dir=10**9)
+    return stats["fichiers"]
+
+def etape_image(kb, racine, fichiers):
+    sortie = os.path.join(os.path.dirname(racine), "bench.kbi")
+    _, stats = kb.ecrire_image_kbi(racine, sortie, empreinte="sha1-4k")
+    return stats["recalcules"] + stats["reutilises"]
+
+ETAPES = [
+    ("parcours", etape_parcours, "entrées/s"),
+    ("arbre", etape_arbre, "lignes/s"),
+    ("analyse_py", etape_analyse_py, ".py/s"),
+    ("arbre_py", etape_arbre_py, "lignes/s"),
+    ("hachage", etape_hachage, "Mo/s"),
+    ("doublons", etape_doublons, "fichiers/s"),
+    ("image", etape_image, "fichiers/s"),
+]
+
+def mesurer(kb, racine, fichiers, repetitions, etapes):
+    resultats = {}
+    for nom, fonction, unite in ETAPES:
+        if etapes and nom not in etapes:
+            continue
+        quantite = fonction(kb, racine, fichiers)  # à blanc : cache disque chaud
+        meilleur = float("inf")
+        for _ in range(repetitions):
+            t0 = time.perf_counter()
+            fonction(kb, racine, fichiers)
+            meilleur = min(meilleur, time.perf_counter() - t0)
+        resultats[nom] = {"secondes": meilleur, "quantite": quantite, "unite": unite,
+                          "debit": quantite / max(meilleur, 1e-9)}
+        print(f"  {nom:<12} {meilleur * 1000:>9.1f} ms  {resultats[nom]['debit']:>12.1f} {unite}")
+    return resultats
+
+def comparer(resultats, reference, seuil):
+    """Liste des régressions (débit < référence × (1 - seuil))."""
+    regressions = []
+    print(f"\n📏 Comparaison à la référence ({reference.get('date')}, seuil {seuil:.0%}) :")
+    for nom, r in resultats.items():
+        ref = reference["etapes"].get(nom)
+        if not ref:
+            print(f"  {nom:<12} (pas de référence)")
+            continue
+        ecart = r["debit"] / ref["debit"] - 1
+        marque = "✅"
+        if ecart < -seuil:
+            marque = "❌"
+            regressions.append(nom)
+        print(f"  {marque} {nom:<12} {ref['debit']:>12.1f} → {r['debit']:>12.1f} {r['unite']}  ({ecart:+.1%})")
+    return regressions
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmarks Kerberos par étape")
+    p.add_argument("--profil", choices=list(PROFILS), default="petit")
+    p.add_argument("--repetitions", type=int, default=3)
+    p.add_argument("--etapes", nargs="*", choices=[e[0] for e in ETAPES], help="sous-ensemble d’étapes")
+    p.add_argument("--reference", help="fichier JSON (défaut : benchmarks/references/<profil>.json)")
+    p.add_argument("--enregistrer", action="store_true", help="écrit les résultats comme nouvelle référence")
+    p.add_argument("--seuil", type=float, default=0.15, help="baisse de débit tolérée (0.15 = 15 %%)")
+    args = p.parse_args()
+    chemin_ref = args.reference or os.path.join(DOSSIER_REFERENCES, f"{args.profil}.json")
+
+    kb = charger_kerberos()
+    tmp = tempfile.mkdtemp(prefix="kerb_harnais_")
+    try:
+        racine = os.path.join(tmp, "arbre")
+        os.mkdir(racine)
+        t0 = time.perf_counter()
+        gen = generer_arbre(racine, **PROFILS[args.profil])
+        print(f"🌲 Profil {args.profil} : {gen['dossiers']} dossiers, {gen['fichiers']} fichiers "
+              f"({gen['py']} .py dont {gen['py_gros']} > 10 Ko), {gen['octets'] / 1e6:.1f} Mo "
+              f"— généré en {time.perf_counter() - t0:.1f} s\n")
+        fichiers = sorted(os.path.join(d, f) for d, _, fs in os.walk(racine) for f in fs)
+        resultats = mesurer(kb, racine, fichiers, args.repetitions, args.etapes)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if args.enregistrer:
+        os.makedirs(os.path.dirname(os.path.abspath(chemin_ref)), exist_ok=True)
+        with open(chemin_ref, "w", encoding="utf-8") as f:
+            json.dump({"profil": args.profil, "parametres": PROFILS[args.profil], "generation": gen,
+                       "date": time.strftime("%Y-%m-%d %H:%M:%S"), "python": platform.python_version(),
+                       "plateforme": platform.platform(), "etapes": resultats}, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Référence enregistrée : {chemin_ref}")
+        return 0
+    if not os.path.exists(chemin_ref):
+        print(f"\nℹ️ Pas de référence ({chemin_ref}) — relancer avec --enregistrer pour en créer une.")
+        return 0
+    with open(chemin_ref, encoding="utf-8") as f:
+        reference = json.load(f)
+    if reference.get("parametres") != PROFILS[args.profil]:
+        print("⚠️ Paramètres du profil différents de ceux de la référence : comparaison indicative.")
+    regressions = comparer(resultats, reference, args.seuil)
+    if regressions:
+        print(f"\n❌ Régression : {', '.join(regressions)}")
+        return 1
+    print("\n✅ Aucune régression")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
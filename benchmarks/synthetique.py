@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# synthetique.py — Kerberos : générateur déterministe d’arbres de test
+# GPLv3 – Projet Kerberos
+#
+# Même graine + mêmes paramètres → même arbre, octet pour octet (noms, contenus, dates).
+# Usage : python benchmarks/synthetique.py <dossier> [profil]
+
+import os
+import sys
+import math
+import random
+
+# Profils prédéfinis (utilisés par harnais.py) ; tout paramètre de generer_arbre() est surchargeable
+PROFILS = {
+    "petit": dict(largeur=4, profondeur=3, fichiers=12),
+    "moyen": dict(largeur=6, profondeur=4, fichiers=20),
+    "grand": dict(largeur=8, profondeur=4, fichiers=40),
+}
+EXT_AUTRES = (".txt", ".log", ".json", ".csv", ".dat", ".bin", ".png", ".dll")
+MTIME_FIXE = 1_600_000_000  # dates identiques d’une génération à l’autre (images incrémentales)
+
+_BLOCS_PY = (
+    "def f{n}(x, y={k}):\n    \"\"\"Fonction {n}.\"\"\"\n    return [x * i + y for i in range({k})]\n\n",
+    "class C{n}:\n    seuil = {k}\n\n    def m(self, a):\n        if a > self.seuil:\n"
+    "            return a - self.seuil\n        return {{'a': a, 'n': {n}}}\n\n",
+    "import json\nDONNEES_{n} = json.dumps({{'cle': {k}, 'liste': list(range({k} % 7))}})\n\n",
+    "# commentaire {n} : " + "x" * 60 + "\n",
+)
+_RISQUES_PY = (
+    "import subprocess\nsubprocess.call(['echo', '{n}'])\n",
+    "resultat_{n} = eval('{k} + 1')\n",
+    "import shutil\nshutil.rmtree('/tmp/kerb_{n}', ignore_errors=True)\n",
+    "exec('v_{n} = {k}')\n",
+)
+
+def _taille(rng, mini, maxi):
+    # Log-uniforme : beaucoup de petits fichiers, quelques gros — comme un vrai disque
+    return int(math.exp(rng.uniform(math.log(mini), math.log(maxi))))
+
+def source_py(rng, taille, risque):
+    """Source Python valide d’environ `taille` octets ; un appel dangereux placé au hasard si risque."""
+    blocs, total, n = [], 0, 0
+    while total < taille:
+        b = rng.choice(_BLOCS_PY).format(n=n, k=rng.randrange(1, 1000))
+        blocs.append(b)
+        total += len(b)
+        n += 1
+    if risque:
+        blocs.insert(rng.randrange(len(blocs) + 1), rng.choice(_RISQUES_PY).format(n=n, k=rng.randrange(1000)))
+    return "".join(blocs)
+
+def generer_arbre(racine, largeur=8, profondeur=3, fichiers=20, ratio_py=0.25, taille_min=64,
+                  taille_max=64 << 10, ratio_gros_py=0.1, taille_gros_py=(12 << 10, 96 << 10),
+                  ratio_risque=0.15, graine=42):
+    """Crée l’arbre sous `racine` (dossier existant) → statistiques de génération.
+    largeur : sous-dossiers par dossier ; profondeur : niveaux sous la racine ; fichiers : par dossier ;
+    ratio_py : part de .py ; ratio_gros_py : part des .py de plus de 10 Ko (taille_gros_py) ;
+    ratio_risque : part des .py contenant un appel dangereux."""
+    rng = random.Random(graine)
+    stats = {"dossiers": 1, "fichiers": 0, "py": 0, "py_gros": 0, "py_risque": 0, "octets": 0}
+
+    def remplir(d, prof):
+        for i in range(fichiers):
+            if rng.random() < ratio_py:
+                gros = rng.random() < ratio_gros_py
+                taille = rng.randrange(*taille_gros_py) if gros else _taille(rng, taille_min, 10 << 10)
+                risque = rng.random() < ratio_risque
+                contenu = source_py(rng, taille, risque).encode("utf-8")
+                nom = f"m{i:03d}.py"
+                stats["py"] += 1
+                stats["py_gros"] += gros
+                stats["py_risque"] += risque
+            else:
+                contenu = rng.randbytes(_taille(rng, taille_min, taille_max))
+                nom = f"f{i:03d}{rng.choice(EXT_AUTRES)}"
+            chemin = os.path.join(d, nom)
+            with open(chemin, "wb") as f:
+                f.write(contenu)
+            os.utime(chemin, (MTIME_FIXE, MTIME_FIXE))
+            stats["fichiers"] += 1
+            stats["octets"] += len(contenu)
+        if prof < profondeur:
+            for i in range(largeur):
+                sd = os.path.join(d, f"d{i:02d}")
+                os.mkdir(sd)
+                stats["dossiers"] += 1
+                remplir(sd, prof + 1)
+
+    remplir(racine, 0)
+    return stats
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("Usage : python benchmarks/synthetique.py <dossier> [" + "|".join(PROFILS) + "]")
+    os.makedirs(sys.argv[1], exist_ok=True)
+    print(generer_arbre(sys.argv[1], **PROFILS[sys.argv[2] if len(sys.argv) > 2 else "petit"]))